@@ -0,0 +1,163 @@
+"""Инкрементальные итоги тренировок по спортсменам.
+
+`Aggregator` принимает сообщения `InfoMessage` (или сырые пакеты) с
+идентификатором спортсмена и временем тренировки и за O(1) обновляет
+накопленные суммы в каждом ключе
+`(спортсмен, гранулярность, период, тип тренировки)`. Суммы хранятся в
+`array('d')` из пяти чисел: количество, длительность, дистанция,
+скорость и калории.
+
+Состояние сохраняется в файл (`snapshot`) и восстанавливается
+(`restore`), поэтому после перезапуска историю не нужно пересчитывать.
+"""
+import json
+import os
+import time
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+from homework import InfoMessage, read_package
+
+GRANULARITIES = ('day', 'week', 'month')
+TOTAL_FIELDS = ('count', 'duration', 'distance', 'speed', 'calories')
+SECONDS_IN_DAY = 86400
+SNAPSHOT_VERSION = 1
+
+Key = Tuple[str, str, int, str]
+
+
+def bucket_of(timestamp: float, granularity: str) -> int:
+    """Номер периода для времени в секундах Unix (UTC).
+
+    Дни и недели (с понедельника) считаются от 1970-01-01, месяцы — как
+    `год * 12 + месяц - 1`.
+    """
+    if granularity == 'day':
+        return int(timestamp // SECONDS_IN_DAY)
+    if granularity == 'week':
+        return int((timestamp // SECONDS_IN_DAY + 3) // 7)
+    if granularity == 'month':
+        moment = time.gmtime(timestamp)
+        return moment.tm_year * 12 + moment.tm_mon - 1
+    raise ValueError(f"Неизвестная гранулярность: {granularity}")
+
+
+def bucket_label(bucket: int, granularity: str) -> str:
+    """Человекочитаемое начало периода, например `2024-03`."""
+    if granularity == 'month':
+        return f'{bucket // 12:04d}-{bucket % 12 + 1:02d}'
+    days = bucket if granularity == 'day' else bucket * 7 - 3
+    return time.strftime('%Y-%m-%d', time.gmtime(days * SECONDS_IN_DAY))
+
+
+class Aggregator:
+    """Накопитель итогов по спортсменам, типам и периодам."""
+
+    def __init__(self, granularities: Iterable[str] = ('week', 'month')):
+        self.granularities = tuple(granularities)
+        for granularity in self.granularities:
+            bucket_of(0, granularity)
+        self.totals: Dict[Key, array] = {}
+        self.updates = 0
+
+    def add(self, athlete: str, timestamp: float,
+            info: InfoMessage) -> None:
+        """Учесть тренировку спортсмена."""
+        totals = self.totals
+        for granularity in self.granularities:
+            key = (athlete, granularity, bucket_of(timestamp, granularity),
+                   info.training_type)
+            values = totals.get(key)
+            if values is None:
+                values = totals[key] = array('d', bytes(8 * 5))
+            values[0] += 1
+            values[1] += info.duration
+            values[2] += info.distance
+            values[3] += info.speed
+            values[4] += info.calories
+        self.updates += 1
+
+    def add_package(self, athlete: str, timestamp: float,
+                    workout_type: str, data: list) -> InfoMessage:
+        """Разобрать пакет, учесть тренировку и вернуть сообщение о ней."""
+        info = read_package(workout_type, data).show_training_info()
+        self.add(athlete, timestamp, info)
+        return info
+
+    def summary(self, athlete: str, granularity: str, bucket: int,
+                training_type: Optional[str] = None) -> Dict[str, float]:
+        """Итоги спортсмена за период, по одному или всем типам.
+
+        Кроме сумм возвращает средние `mean_speed` и `mean_calories`.
+        """
+        result = dict.fromkeys(TOTAL_FIELDS, 0.0)
+        if training_type is not None:
+            keys = [(athlete, granularity, bucket, training_type)]
+        else:
+            keys = [
+                key for key in self.totals
+                if key[:3] == (athlete, granularity, bucket)
+            ]
+        for key in keys:
+            values = self.totals.get(key)
+            if values is not None:
+                for field, value in zip(TOTAL_FIELDS, values):
+                    result[field] += value
+        count = result['count']
+        result['mean_speed'] = result['speed'] / count if count else 0.0
+        result['mean_calories'] = (
+            result['calories'] / count if count else 0.0)
+        return result
+
+    def buckets(self, athlete: str, granularity: str):
+        """Периоды, за которые у спортсмена есть тренировки."""
+        return sorted({
+            key[2] for key in self.totals
+            if key[0] == athlete and key[1] == granularity
+        })
+
+    def merge(self, other: 'Aggregator') -> None:
+        """Добавить итоги другого накопителя."""
+        for key, values in other.totals.items():
+            own = self.totals.get(key)
+            if own is None:
+                self.totals[key] = array('d', values)
+            else:
+                for index, value in enumerate(values):
+                    own[index] += value
+        self.updates += other.updates
+
+    def snapshot(self, path: str, meta: Optional[Dict] = None) -> None:
+        """Атомарно сохранить состояние в файл.
+
+        В `meta` можно положить позицию во входном потоке, с которой
+        продолжать после восстановления.
+        """
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'granularities': self.granularities,
+            'updates': self.updates,
+            'meta': meta or {},
+            'totals': [
+                [*key, *values] for key, values in self.totals.items()
+            ],
+        }
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as output:
+            json.dump(state, output, ensure_ascii=False,
+                      separators=(',', ':'))
+        os.replace(temporary, path)
+
+    @classmethod
+    def restore(cls, path: str) -> Tuple['Aggregator', Dict]:
+        """Восстановить накопитель из файла, вернуть его и `meta`."""
+        with open(path, encoding='utf-8') as stream:
+            state = json.load(stream)
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError("Неподдерживаемая версия снимка")
+        aggregator = cls(state['granularities'])
+        aggregator.updates = state['updates']
+        for row in state['totals']:
+            key = tuple(row[:4])
+            aggregator.totals[key] = array('d', row[4:])
+        return aggregator, state['meta']
@@ -0,0 +1,338 @@
+"""Архив истории тренировок в столбцах, отображаемых в память.
+
+Вместо текстовых журналов `get_message()` записи `InfoMessage` вместе
+со спортсменом и временем (секунды Unix) хранятся в файле столбцами
+фиксированной ширины:
+
+    заголовок, каталог смещений, таблица имён спортсменов и типов,
+    timestamp d, duration d, distance d, speed d, calories d,
+    athlete I, training_type B, time_index I, athlete_offsets Q
+
+Строки упорядочены по спортсмену, внутри спортсмена — по времени.
+`athlete_offsets` — индекс начала строк каждого спортсмена, поэтому
+записи спортсмена за период — непрерывный срез, который находится
+двоичным поиском по `timestamp`. `time_index` — номера строк,
+упорядоченные по времени, для запросов по всем спортсменам.
+
+`ArchiveReader` отображает файл через `mmap` и отдаёт столбцы как
+`memoryview` без копирования: запрос читает только страницы нужных
+столбцов в нужном диапазоне строк.
+
+    with ArchiveWriter('history.arc') as archive:
+        archive.add('anna', 1709251200, info)
+    with ArchiveReader('history.arc') as archive:
+        archive.aggregate('anna', *month_bounds(2024, 3))['calories']
+"""
+import calendar
+import math
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from homework import InfoMessage, read_package
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'TRKARCH1'
+HEADER = struct.Struct('<8sIIQ')
+NUMERIC_FIELDS = InfoMessage.FIELDS[1:]
+COLUMNS = (
+    ('timestamp', 'd'),
+    *((name, 'd') for name in NUMERIC_FIELDS),
+    ('athlete', 'I'),
+    ('training_type', 'B'),
+    ('time_index', 'I'),
+    ('athlete_offsets', 'Q'),
+)
+DIRECTORY = struct.Struct(f'<{2 + len(COLUMNS)}Q')
+
+Rows = Union[range, memoryview]
+
+
+def month_bounds(year: int, month: int) -> Tuple[float, float]:
+    """Начало месяца и начало следующего, секунды Unix (UTC)."""
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return start, calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+def _aligned(size: int) -> int:
+    return size + -size % 8
+
+
+class ArchiveWriter:
+    """Накопить записи и записать их в файл архива при `close()`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._columns = {name: array(code) for name, code in COLUMNS[:-2]}
+        self._athletes: Dict[str, int] = {}
+        self._types: Dict[str, int] = {}
+
+    def add(self, athlete: str, timestamp: float, info: InfoMessage) -> None:
+        """Добавить сообщение о тренировке спортсмена."""
+        columns = self._columns
+        athlete_id = self._athletes.setdefault(athlete, len(self._athletes))
+        type_id = self._types.setdefault(
+            info.training_type, len(self._types))
+        if type_id > 255:
+            raise ValueError("В архиве не больше 256 типов тренировок")
+        columns['timestamp'].append(timestamp)
+        columns['duration'].append(info.duration)
+        columns['distance'].append(info.distance)
+        columns['speed'].append(info.speed)
+        columns['calories'].append(info.calories)
+        columns['athlete'].append(athlete_id)
+        columns['training_type'].append(type_id)
+
+    def add_package(self, athlete: str, timestamp: float,
+                    workout_type: str, data: list) -> InfoMessage:
+        """Разобрать пакет, добавить тренировку и вернуть сообщение."""
+        info = read_package(workout_type, data).show_training_info()
+        self.add(athlete, timestamp, info)
+        return info
+
+    def __len__(self) -> int:
+        return len(self._columns['timestamp'])
+
+    def _sorted_columns(self) -> Dict[str, array]:
+        columns = self._columns
+        athletes = sorted(self._athletes)
+        rank = array('I', bytes(4 * len(athletes)))
+        for position, name in enumerate(athletes):
+            rank[self._athletes[name]] = position
+        timestamps = columns['timestamp']
+        owners = [rank[athlete] for athlete in columns['athlete']]
+        order = sorted(
+            range(len(self)), key=lambda row: (owners[row], timestamps[row]))
+        result = {
+            name: array(column.typecode, (column[row] for row in order))
+            for name, column in columns.items() if name != 'athlete'
+        }
+        result['athlete'] = array('I', (owners[row] for row in order))
+        timestamps = result['timestamp']
+        result['time_index'] = array(
+            'I', sorted(range(len(self)), key=timestamps.__getitem__))
+        offsets = array('Q', bytes(8 * (len(athletes) + 1)))
+        for athlete in result['athlete']:
+            offsets[athlete + 1] += 1
+        for position in range(len(athletes)):
+            offsets[position + 1] += offsets[position]
+        result['athlete_offsets'] = offsets
+        self._athlete_names = athletes
+        return result
+
+    def close(self) -> None:
+        """Отсортировать записи и атомарно записать файл."""
+        columns = self._sorted_columns()
+        types = sorted(self._types, key=self._types.get)
+        names = '\0'.join([*self._athlete_names, *types]).encode('utf-8')
+        offset = _aligned(HEADER.size + DIRECTORY.size)
+        directory = [offset, len(names)]
+        offset = _aligned(offset + len(names))
+        for name, _ in COLUMNS:
+            directory.append(offset)
+            column = columns[name]
+            offset = _aligned(offset + column.itemsize * len(column))
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'wb') as output:
+            output.write(HEADER.pack(
+                MAGIC, len(self._athlete_names), len(types), len(self)))
+            output.write(DIRECTORY.pack(*directory))
+            for position, data in zip(
+                    directory[:1] + directory[2:],
+                    [names, *(columns[name] for name, _ in COLUMNS)]):
+                output.seek(position)
+                output.write(data)
+            output.truncate(offset)
+        os.replace(temporary, self.path)
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is None:
+            self.close()
+
+
+class ArchiveReader:
+    """Запросы к архиву без копирования данных.
+
+    Перед `close()` нужно освободить полученные из `column()` и
+    `select()` представления.
+    """
+
+    def __init__(self, path: str):
+        self._columns: Dict[str, memoryview] = {}
+        self._mmap = self._buffer = None
+        self._file = open(path, 'rb')
+        try:
+            self._load()
+        except (ValueError, TypeError, struct.error) as error:
+            self.close()
+            raise ValueError(
+                f"Не удалось открыть архив {path}: {error}") from error
+
+    def _load(self) -> None:
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        magic, athletes, types, rows = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError("это не файл архива тренировок")
+        names_offset, names_size, *offsets = DIRECTORY.unpack_from(
+            self._buffer, HEADER.size)
+        if names_offset + names_size > len(self._buffer):
+            raise ValueError("файл обрезан")
+        names = bytes(
+            self._buffer[names_offset:names_offset + names_size])
+        names = names.decode('utf-8').split('\0') if names else []
+        self.athletes = tuple(names[:athletes])
+        self.training_types = tuple(names[athletes:athletes + types])
+        self._athlete_ids = {
+            name: index for index, name in enumerate(self.athletes)}
+        self._rows = rows
+        for (name, code), offset in zip(COLUMNS, offsets):
+            count = athletes + 1 if name == 'athlete_offsets' else rows
+            size = struct.calcsize(code) * count
+            if offset + size > len(self._buffer):
+                raise ValueError("файл обрезан")
+            self._columns[name] = self._buffer[
+                offset:offset + size].cast(code)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def column(self, name: str) -> memoryview:
+        """Столбец целиком как `memoryview` поверх файла."""
+        return self._columns[name]
+
+    def athlete_rows(self, athlete: str) -> range:
+        """Строки спортсмена; пустой диапазон, если его нет в архиве."""
+        index = self._athlete_ids.get(athlete)
+        if index is None:
+            return range(0)
+        offsets = self._columns['athlete_offsets']
+        return range(offsets[index], offsets[index + 1])
+
+    def rows(self, athlete: Optional[str] = None,
+             start: Optional[float] = None,
+             end: Optional[float] = None) -> Rows:
+        """Строки с временем в `[start, end)`, у спортсмена или у всех.
+
+        Для спортсмена (и для всего архива без ограничения времени)
+        возвращается непрерывный `range`, иначе — срез `time_index`.
+        """
+        timestamps = self._columns['timestamp']
+        if athlete is not None:
+            rows = self.athlete_rows(athlete)
+            low, high = rows.start, rows.stop
+            if start is not None:
+                low = bisect_left(timestamps, start, low, high)
+            if end is not None:
+                high = bisect_left(timestamps, end, low, high)
+            return range(low, high)
+        if start is None and end is None:
+            return range(self._rows)
+        index = self._columns['time_index']
+        key = timestamps.__getitem__
+        low = 0 if start is None else bisect_left(index, start, key=key)
+        high = (len(index) if end is None
+                else bisect_left(index, end, low, key=key))
+        return index[low:high]
+
+    def select(self, name: str, rows: Rows):
+        """Значения столбца в строках `rows`.
+
+        Для `range` — срез `memoryview` без копирования, для номеров
+        строк из `time_index` — выборка (массив NumPy или `array`).
+        """
+        column = self._columns[name]
+        if isinstance(rows, range):
+            return column[rows.start:rows.stop]
+        if np is not None:
+            return np.frombuffer(column, dtype=column.format)[
+                np.frombuffer(rows, dtype=np.uint32)]
+        return array(column.format, (column[row] for row in rows))
+
+    def aggregate(self, athlete: Optional[str] = None,
+                  start: Optional[float] = None,
+                  end: Optional[float] = None,
+                  training_type: Optional[str] = None) -> Dict[str, float]:
+        """Итоги за период, как `Aggregator.summary`.
+
+        Читаются только столбцы показателей в найденных строках.
+        """
+        rows = self.rows(athlete, start, end)
+        mask = None
+        if training_type is not None:
+            if training_type not in self.training_types:
+                rows = range(0)
+            else:
+                code = self.training_types.index(training_type)
+                mask = _mask(self.select('training_type', rows), code)
+        count = float(len(rows) if mask is None else _total(mask, None))
+        result = {'count': count}
+        for name in NUMERIC_FIELDS:
+            result[name] = _total(self.select(name, rows), mask)
+        result['mean_speed'] = result['speed'] / count if count else 0.0
+        result['mean_calories'] = (
+            result['calories'] / count if count else 0.0)
+        return result
+
+    def records(self, athlete: Optional[str] = None,
+                start: Optional[float] = None,
+                end: Optional[float] = None,
+                ) -> Iterator[Tuple[str, float, InfoMessage]]:
+        """Записи `(спортсмен, время, InfoMessage)` в порядке строк."""
+        columns = self._columns
+        for row in self.rows(athlete, start, end):
+            yield (
+                self.athletes[columns['athlete'][row]],
+                columns['timestamp'][row],
+                InfoMessage(
+                    self.training_types[columns['training_type'][row]],
+                    *(columns[name][row] for name in NUMERIC_FIELDS)),
+            )
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        if self._buffer is not None:
+            self._buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _vector(values):
+    if isinstance(values, memoryview):
+        return np.frombuffer(values, dtype=values.format)
+    return values
+
+
+def _mask(codes, code: int):
+    if np is not None:
+        return _vector(codes) == code
+    return array('B', (value == code for value in codes))
+
+
+def _total(values, mask) -> float:
+    if np is not None:
+        vector = _vector(values)
+        return float((vector if mask is None else vector[mask]).sum())
+    if mask is not None:
+        values = (value for value, keep in zip(values, mask) if keep)
+    return math.fsum(values)
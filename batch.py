@@ -0,0 +1,72 @@
+"""Пакетный расчёт показателей тренировок по столбцам данных.
+
+Ядра собираются из тех же формул `FORMULAS`, что и методы
+`get_distance`, `get_mean_speed` и `get_spent_calories` классов из
+`homework` (см. `formulas`), поэтому результат побитово совпадает с
+поштучным расчётом для любого зарегистрированного типа. Если установлен
+NumPy, столбцы считаются векторно, иначе — циклом по `array('d')`.
+"""
+from array import array
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+from formulas import METRICS, Kernel
+from homework import TRAININGS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass
+class BatchResult:
+    """Столбцы рассчитанных показателей пачки тренировок."""
+
+    distance: Sequence[float]
+    speed: Sequence[float]
+    calories: Sequence[float]
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+
+def _as_vector(column):
+    if np is not None:
+        return np.asarray(column)
+    return column
+
+
+def _apply(kernel: Kernel, columns: Mapping[str, Sequence]):
+    func, fields = kernel
+    args = [columns[field] for field in fields]
+    if np is not None:
+        return np.asarray(func(*args), dtype=np.float64)
+    return array('d', map(func, *args))
+
+
+def compute_batch(workout_type: str,
+                  columns: Mapping[str, Sequence]) -> BatchResult:
+    """Рассчитать дистанцию, скорость и калории для пачки тренировок.
+
+    `columns` сопоставляет имени поля пакета типа (`PACKAGE_FIELDS`)
+    столбец значений одинаковой длины.
+    """
+    if workout_type not in TRAININGS:
+        raise KeyError(f"Неизвестный тип тренировки: {workout_type}")
+    kernels = TRAININGS[workout_type].kernels()
+    missing = [name for name in METRICS if name not in kernels]
+    if missing:
+        raise KeyError(
+            f"Для {workout_type} нет формул: {', '.join(missing)}")
+    values = {name: _as_vector(column) for name, column in columns.items()}
+    lengths = {len(column) for column in values.values()}
+    if len(lengths) > 1:
+        raise ValueError("Столбцы пачки должны быть одинаковой длины")
+    for name in METRICS:
+        values[name] = _apply(kernels[name], values)
+    return BatchResult(
+        distance=values['distance'],
+        speed=values['speed'],
+        calories=values['calories'],
+    )
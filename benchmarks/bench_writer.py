@@ -0,0 +1,90 @@
+"""Сравнение скорости вывода отчёта: построчный print против ReportWriter.
+
+    python -m benchmarks.bench_writer --count 200000
+
+Запускается из корня репозитория, чтобы модули проекта были видны.
+"""
+import argparse
+import contextlib
+import os
+import random
+import time
+
+from homework import InfoMessage
+from writer import ReportWriter
+
+
+def legacy_message(info: InfoMessage) -> str:
+    """Рендеринг строки так, как это делал прежний `get_message`."""
+    return (
+        f"Тип тренировки: {info.training_type}; "
+        f"Длительность: {'{:.3f}'.format(info.duration)} ч.; "
+        f"Дистанция: {'{:.3f}'.format(info.distance)} км; "
+        f"Ср. скорость: {'{:.3f}'.format(info.speed)} км/ч; "
+        f"Потрачено ккал: {'{:.3f}'.format(info.calories)}."
+    )
+
+
+def make_messages(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    names = ('Running', 'SportsWalking', 'Swimming')
+    return [
+        InfoMessage(rnd.choice(names), rnd.uniform(0.1, 5),
+                    rnd.uniform(0, 50), rnd.uniform(0, 20),
+                    rnd.uniform(0, 3000))
+        for _ in range(count)
+    ]
+
+
+def print_legacy(messages, output):
+    with contextlib.redirect_stdout(output):
+        for info in messages:
+            print(legacy_message(info))
+
+
+def print_lines(messages, output):
+    with contextlib.redirect_stdout(output):
+        for info in messages:
+            print(info.get_message())
+
+
+def report_writer(messages, output):
+    with ReportWriter(output) as writer:
+        writer.write_many(messages)
+
+
+CASES = {
+    'print + прежний get_message': print_legacy,
+    'print + get_message': print_lines,
+    'ReportWriter': report_writer,
+}
+
+
+def run(count: int, repeat: int = 3):
+    messages = make_messages(count)
+    results = {}
+    with open(os.devnull, 'w', encoding='utf-8') as output:
+        for name, case in CASES.items():
+            best = min(
+                _timed(case, messages, output) for _ in range(repeat))
+            results[name] = count / best
+    return results
+
+
+def _timed(case, messages, output) -> float:
+    start = time.perf_counter()
+    case(messages, output)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    for name, rate in run(args.count, args.repeat).items():
+        print(f'{name:<30} {rate:>12,.0f} строк/с')
+
+
+if __name__ == '__main__':
+    main()
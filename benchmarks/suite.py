@@ -0,0 +1,314 @@
+"""Набор бенчмарков модуля фитнес-трекера.
+
+Запускается локально, без сети, из корня репозитория:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --sizes 1e3 1e5 1e7 --compare results.json
+
+Разделы результата:
+
+- `micro` — наносекунды на вызов для каждого метода каждого типа
+  тренировки; `show_training_info.methods` — то же сообщение через
+  отдельные вызовы методов показателей, для сравнения с расчётом за
+  один проход, `show_training_info.repeat` и методы показателей —
+  повторные вызовы на одном объекте (показатели берутся из памяти
+  экземпляра), `report` — пакет от `read_package` до `get_message`;
+- `macro` — пакетов в секунду при обработке синтетического CSV-файла
+  заданного размера (`loadgen`) через `streaming.process`;
+- `threads` — пакетов в секунду при расчёте сообщений в пуле из N
+  потоков (`threaded.compute_messages`). На обычной сборке CPython
+  потоки упираются в GIL, на сборке без GIL должны масштабироваться;
+  какая сборка, видно по `meta.gil`. Запускать на обеих:
+
+      python -m benchmarks.suite --output gil.json
+      python3.13t -m benchmarks.suite --output nogil.json
+
+- `memory` — байт на запись для обычных и компактных классов;
+- `startup` — миллисекунды на запуск интерпретатора: пустого, с
+  `import homework` и CLI на одном пакете (`homework.py FILE`).
+  `--startup-budget` задаёт допустимую надбавку CLI к пустому
+  интерпретатору.
+
+`--compare` сравнивает с сохранённым JSON и завершается с кодом 1, если
+что-то замедлилось больше чем на `--tolerance`.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import compact
+import homework
+import loadgen
+import streaming
+import threaded
+
+SAMPLE_PACKAGES = {
+    'RUN': [15000, 1, 75],
+    'WLK': [9000, 1, 75, 180],
+    'SWM': [720, 1, 80, 25, 40],
+}
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_THREADS = (1, 2, 4, 8)
+THREADS_SIZE = 100000
+BASE_DIR = Path(__file__).resolve().parent.parent
+STARTUP_BUDGET_MS = 20.0
+METRICS = ('get_distance', 'get_mean_speed', 'get_spent_calories')
+
+
+def time_call(func, repeat: int = 5) -> float:
+    """Лучшее время одного вызова `func`, наносекунд."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+
+def separate_methods_info(training) -> homework.InfoMessage:
+    """Сообщение через отдельные вызовы методов показателей.
+
+    Так работал `show_training_info` до `formulas.compile_metrics`:
+    калории заново считают скорость, а скорость — дистанцию.
+    """
+    return homework.InfoMessage(
+        type(training).__name__, training.duration, training.get_distance(),
+        training.get_mean_speed(), training.get_spent_calories())
+
+
+def micro_benchmarks(repeat: int = 5) -> Dict[str, float]:
+    results = {}
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        for workout_type, data in SAMPLE_PACKAGES.items():
+            training = homework.read_package(workout_type, data)
+            name = type(training).__name__
+            info = training.show_training_info()
+            cases = {
+                'read_package': lambda: homework.read_package(
+                    workout_type, data),
+                'show_training_info': lambda: homework.read_package(
+                    workout_type, data).show_training_info(),
+                'get_message': info.get_message,
+            }
+            for metric in METRICS:
+                cases[metric] = getattr(training, metric)
+            cases['show_training_info.methods'] = (
+                lambda training=training: separate_methods_info(training))
+            cases['show_training_info.repeat'] = training.show_training_info
+            cases['report'] = lambda: homework.read_package(
+                workout_type, data).show_training_info().get_message()
+
+            def run_main():
+                with contextlib.redirect_stdout(devnull):
+                    homework.main(homework.read_package(workout_type, data))
+            cases['main'] = run_main
+            for case, func in cases.items():
+                results[f'{name}.{case}'] = time_call(func, repeat)
+    return results
+
+
+def synthetic_packages(count: int, seed: int = 0) -> Iterator[str]:
+    """Строки CSV со случайными корректными пакетами."""
+    return loadgen.LoadGenerator(seed).lines(count)
+
+
+def macro_benchmarks(sizes=DEFAULT_SIZES, repeat: int = 3
+                     ) -> Dict[str, float]:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = Path(directory, f'packages_{size}.csv')
+            with open(path, 'wb') as output:
+                loadgen.LoadGenerator().write(output, size)
+            timings = []
+            for _ in range(repeat):
+                with open(path, encoding='utf-8') as stream, \
+                        open(os.devnull, 'w', encoding='utf-8') as devnull:
+                    start = time.perf_counter()
+                    streaming.process(stream, devnull, 'csv')
+                    timings.append(time.perf_counter() - start)
+            results[f'pipeline.{size}'] = size / min(timings)
+            path.unlink()
+    return results
+
+
+def gil_enabled() -> bool:
+    """Включён ли GIL в текущем интерпретаторе."""
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+def thread_benchmarks(threads=DEFAULT_THREADS, size: int = THREADS_SIZE,
+                      repeat: int = 3) -> Dict[str, float]:
+    """Пакетов в секунду в `threaded.compute_messages` по числу потоков."""
+    packages = list(loadgen.LoadGenerator().packages(size))
+    chunk_size = max(1, size // (4 * max(threads)))
+    results = {}
+    for count in threads:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            threaded.compute_messages(packages, count, chunk_size)
+            timings.append(time.perf_counter() - start)
+        results[f'compute.{count}'] = size / min(timings)
+    return results
+
+
+def memory_benchmarks() -> Dict[str, float]:
+    results = {}
+    for workout_type, data in SAMPLE_PACKAGES.items():
+        for module in (homework, compact):
+            training = module.read_package(workout_type, data)
+            name = f'{module.__name__}.{type(training).__name__}'
+            results[name] = compact.measure_record_size(
+                lambda i: module.read_package(workout_type, data))
+        array = compact.TrainingArray(workout_type, [data] * 1000)
+        results[f'TrainingArray.{workout_type}'] = array.nbytes() / 1000
+    info = homework.InfoMessage('Running', 1.5, 2.5, 3.5, 4.5)
+    results['homework.InfoMessage'] = compact.measure_record_size(
+        lambda i: homework.InfoMessage(*vars(info).values()))
+    return results
+
+
+def startup_benchmarks(repeat: int = 10) -> Dict[str, float]:
+    """Время запуска процессов, мс (минимум из `repeat` запусков)."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory, 'package.csv')
+        path.write_text('RUN,15000,1,75\n', encoding='utf-8')
+        commands = {
+            'python': ['-c', 'pass'],
+            'import_homework': ['-c', 'import homework'],
+            'cli_one_package': ['homework.py', str(path)],
+        }
+        results = {}
+        for name, args in commands.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *args], cwd=BASE_DIR,
+                               stdout=subprocess.DEVNULL, check=True)
+                timings.append(time.perf_counter() - start)
+            results[name] = min(timings) * 1000
+    results['cli_overhead'] = results['cli_one_package'] - results['python']
+    return results
+
+
+def check_startup_budget(results: Dict,
+                         budget: float = STARTUP_BUDGET_MS) -> List[str]:
+    """Сообщения о превышении бюджета запуска CLI."""
+    overhead = results['startup']['cli_overhead']
+    if overhead > budget:
+        return [f'startup.cli_overhead: {overhead:.1f} мс > {budget:.1f} мс']
+    return []
+
+
+def run(sizes=DEFAULT_SIZES, repeat: int = 5,
+        threads=DEFAULT_THREADS) -> Dict:
+    """Выполнить все бенчмарки и вернуть результаты в виде словаря."""
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'gil': gil_enabled(),
+            'free_threaded_build': bool(
+                sysconfig.get_config_var('Py_GIL_DISABLED')),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'micro': micro_benchmarks(repeat),
+        'macro': macro_benchmarks(sizes, max(1, repeat // 2)),
+        'threads': thread_benchmarks(threads, repeat=max(1, repeat // 2)),
+        'memory': memory_benchmarks(),
+        'startup': startup_benchmarks(max(3, repeat * 2)),
+    }
+
+
+def compare(current: Dict, baseline: Dict,
+            tolerance: float = 0.1) -> List[str]:
+    """Найти ухудшения относительно `baseline`.
+
+    Для `micro`, `memory` и `startup` хуже — больше, для `macro` и
+    `threads` — меньше.
+    """
+    regressions = []
+    for section, higher_is_better in (
+            ('micro', False), ('macro', True), ('threads', True),
+            ('memory', False), ('startup', False)):
+        for name, value in current.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if not old:
+                continue
+            change = value / old - 1
+            if higher_is_better:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f'{section}.{name}: {old:.1f} -> {value:.1f} '
+                    f'({change:+.0%})')
+    return regressions
+
+
+def format_results(results: Dict) -> str:
+    lines = []
+    for section, unit in (('micro', 'нс'), ('macro', 'пакетов/с'),
+                          ('threads', 'пакетов/с'), ('memory', 'байт'),
+                          ('startup', 'мс')):
+        lines.append(f'[{section}]')
+        for name, value in results.get(section, {}).items():
+            lines.append(f'  {name:<48} {value:>14,.1f} {unit}')
+    lines.append(
+        f"медиана micro: {statistics.median(results['micro'].values()):.1f}"
+        ' нс')
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Бенчмарки модуля фитнес-трекера.')
+    parser.add_argument(
+        '--sizes', type=float, nargs='+', default=DEFAULT_SIZES,
+        help='число пакетов в синтетических файлах, например 1e3 1e7')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--threads', type=int, nargs='+', default=DEFAULT_THREADS,
+        help='числа потоков для раздела threads')
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', help='JSON с базовыми результатами')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument(
+        '--startup-budget', type=float, default=None,
+        help='допустимая надбавка CLI к пустому интерпретатору, мс')
+    args = parser.parse_args(argv)
+    results = run([int(size) for size in args.sizes], args.repeat,
+                  args.threads)
+    print(format_results(results))
+    failed = []
+    if args.startup_budget is not None:
+        failed = check_startup_budget(results, args.startup_budget)
+        for message in failed:
+            print(f'БЮДЖЕТ ЗАПУСКА {message}')
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(results, indent=2, ensure_ascii=False),
+            encoding='utf-8')
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}')
+        failed.extend(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,310 @@
+"""Кэш результатов расчёта по содержимому пакета.
+
+Повторные пакеты (ретраи устройств, пересинхронизации) не проходят
+`read_package` и формулы калорий заново. Ключ — код тренировки и данные
+пакета, приведённые к `float`.
+
+Два уровня:
+
+- в памяти — LRU на `OrderedDict` с ограничением числа записей;
+- на диске (необязательный) — хеш-таблица фиксированного размера в
+  файле, отображённом в память через `mmap`. Ячейка хранит 16 байт
+  хеша ключа и четыре `double`: длительность, дистанцию, скорость и
+  калории. При заполнении окна проб старая запись перезаписывается.
+
+Оба уровня привязаны к отпечатку констант классов тренировок
+(`LEN_STEP`, `CALORIES_MEAN_SPEED_MULTIPLIER` и т. д.): если константы
+или классы в реестре изменились, кэш очищается, в том числе файл при
+следующем открытии. Константы сверяются, только когда изменился
+`homework.TrainingType.version`, так что попадание не перечитывает их.
+
+`ResultCache` можно делить между потоками: словарь, файл и статистика
+меняются под одной блокировкой, а расчёт при промахе идёт без неё.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from homework import (TRAININGS, InfoMessage, PackageError, TrainingType,
+                      as_package_error, check_package, is_valid_package,
+                      read_package)
+
+MAGIC = b'TRKCACH1'
+HEADER = struct.Struct('<8sQ16s')
+SLOT = struct.Struct('<16s4d')
+EMPTY = bytes(16)
+PROBES = 8
+SEQUENCES = frozenset((list, tuple))
+NUMBER_TYPES = frozenset((int, float))
+
+
+def constant_names(training: type) -> Tuple[str, ...]:
+    """Имена констант класса тренировки, включая унаследованные."""
+    return tuple(sorted(
+        name for name in dir(training)
+        if name.isupper() and not callable(getattr(training, name))
+        and not isinstance(getattr(training, name), (frozenset, tuple))
+    ))
+
+
+def numeric_constant_names(training: type) -> Tuple[str, ...]:
+    """Имена числовых констант класса: их можно подменять в формулах.
+
+    `CODE`, `FIELDS`, `FORMULAS` и другие нечисловые атрибуты в верхнем
+    регистре сюда не входят.
+    """
+    return tuple(
+        name for name in constant_names(training)
+        if type(getattr(training, name)) in (int, float))
+
+
+# По классу, а не по коду: код можно зарегистрировать заново с другим
+# классом и другим набором констант.
+_CONSTANT_GETTERS: Dict[type, Callable] = {}
+
+
+def _constant_getter(training: type) -> Callable:
+    getter = _CONSTANT_GETTERS.get(training)
+    if getter is None:
+        getter = _CONSTANT_GETTERS[training] = attrgetter(
+            *constant_names(training))
+    return getter
+
+
+def constants() -> Dict[str, Tuple]:
+    """Текущие значения констант классов по кодам тренировок."""
+    return {
+        workout_type: _constant_getter(training)(training)
+        for workout_type, training in TRAININGS.items()
+    }
+
+
+def fingerprint(values: Dict[str, Tuple]) -> bytes:
+    """Отпечаток констант для заголовка дискового кэша."""
+    return hashlib.blake2b(
+        repr(sorted(values.items())).encode(), digest_size=16).digest()
+
+
+@dataclass
+class CacheStats:
+    """Статистика попаданий и промахов кэша."""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
+
+
+class DiskTier:
+    """Хеш-таблица с открытой адресацией в файле, отображённом в память."""
+
+    def __init__(self, path: str, slots: int, stamp: bytes):
+        if slots < PROBES or slots & (slots - 1):
+            raise ValueError("Число ячеек должно быть степенью двойки")
+        size = HEADER.size + slots * SLOT.size
+        exists = os.path.exists(path) and os.path.getsize(path) == size
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if not exists:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self.slots = slots
+        magic, stored_slots, stored_stamp = HEADER.unpack_from(self._map)
+        if magic != MAGIC or stored_slots != slots or stored_stamp != stamp:
+            self.reset(stamp)
+
+    def reset(self, stamp: bytes) -> None:
+        """Очистить таблицу и записать новый отпечаток констант."""
+        self._map[:] = bytes(len(self._map))
+        HEADER.pack_into(self._map, 0, MAGIC, self.slots, stamp)
+
+    def _offsets(self, digest: bytes) -> Iterator[int]:
+        start = int.from_bytes(digest[:8], 'little')
+        for probe in range(PROBES):
+            yield HEADER.size + ((start + probe) & (self.slots - 1)) * (
+                SLOT.size)
+
+    def get(self, digest: bytes) -> Optional[Tuple[float, ...]]:
+        for offset in self._offsets(digest):
+            stored, *values = SLOT.unpack_from(self._map, offset)
+            if stored == digest:
+                return tuple(values)
+            if stored == EMPTY:
+                return None
+        return None
+
+    def put(self, digest: bytes, values: Tuple[float, ...]) -> bool:
+        """Сохранить значения, вернуть True, если запись была вытеснена."""
+        offsets = list(self._offsets(digest))
+        for offset in offsets:
+            stored = self._map[offset:offset + 16]
+            if stored == digest or stored == EMPTY:
+                SLOT.pack_into(self._map, offset, digest, *values)
+                return False
+        SLOT.pack_into(self._map, offsets[digest[8] % PROBES], digest, *values)
+        return True
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+class ResultCache:
+    """Кэш `InfoMessage` по содержимому пакетов."""
+
+    def __init__(self, max_entries: int = 100000,
+                 path: Optional[str] = None, disk_slots: int = 1 << 20):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = TrainingType.version
+        self._classes = dict(TRAININGS)
+        self._constants = constants()
+        self._disk = (
+            DiskTier(path, disk_slots, fingerprint(self._constants))
+            if path is not None else None)
+
+    def _check_constants(self) -> None:
+        """Очистить кэш, если классы или константы тренировок изменились."""
+        version = TrainingType.version
+        classes = dict(TRAININGS)
+        current = constants()
+        if classes != self._classes or current != self._constants:
+            self._classes = classes
+            self._constants = current
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.reset(fingerprint(current))
+            self.stats.invalidations += 1
+        self._version = version
+
+    @staticmethod
+    def key(workout_type: str, data) -> Tuple:
+        """Ключ пакета.
+
+        Данные не приводятся к `float`: `1 == 1.0` и `hash(1) == hash(1.0)`.
+        """
+        return (workout_type, *data)
+
+    @staticmethod
+    def digest(key: Tuple) -> bytes:
+        packed = key[0].encode() + struct.pack(f'<{len(key) - 1}d', *key[1:])
+        return hashlib.blake2b(packed, digest_size=16).digest()
+
+    def _lookup(self, workout_type: str, data) -> Optional[InfoMessage]:
+        """Сообщение из памяти, если пакет уже встречался.
+
+        В память попадают только корректные пакеты, поэтому здесь
+        достаточно проверить типы: равные по значению данные другого
+        типа (`True` вместо `1`) не должны находить чужую запись.
+        """
+        if (type(workout_type) is not str or type(data) not in SEQUENCES
+                or not NUMBER_TYPES.issuperset(map(type, data))):
+            return None
+        key = (workout_type, *data)
+        with self._lock:
+            if TrainingType.version != self._version:
+                self._check_constants()
+            values = self._memory.get(key)
+            if values is None:
+                return None
+            self._memory.move_to_end(key)
+            self.stats.hits += 1
+        return InfoMessage(*values)
+
+    def get_info(self, workout_type: str, data) -> InfoMessage:
+        """Сообщение о тренировке из кэша или с расчётом при промахе."""
+        info = self._lookup(workout_type, data)
+        if info is not None:
+            return info
+        if not is_valid_package(workout_type, data):
+            error = check_package(workout_type, data)
+            if error is not None:
+                raise error
+        key = self.key(workout_type, data)
+        with self._lock:
+            if TrainingType.version != self._version:
+                self._check_constants()
+            version = self._version
+            disk = self._disk
+            if disk is not None:
+                digest = self.digest(key)
+                stored = disk.get(digest)
+                if stored is not None:
+                    self.stats.disk_hits += 1
+                    values = (TRAININGS[workout_type].__name__, *stored)
+                    self._remember(key, values)
+                    return InfoMessage(*values)
+        info = read_package(workout_type, data).show_training_info()
+        values = (info.training_type, info.duration, info.distance,
+                  info.speed, info.calories)
+        with self._lock:
+            self.stats.misses += 1
+            # Если константы изменились во время расчёта, результат мог
+            # получиться со старыми: в уже очищенный кэш его не кладём.
+            if TrainingType.version == version:
+                self._remember(key, values)
+                if disk is not None and disk is self._disk:
+                    self.stats.evictions += disk.put(digest, values[1:])
+        return info
+
+    def _remember(self, key: Tuple, values: Tuple) -> None:
+        self._memory[key] = values
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.reset(fingerprint(self._constants))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def __enter__(self) -> 'ResultCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def iter_messages(packages: Iterable[Tuple[str, list]], cache: ResultCache,
+                  errors: Optional[List[PackageError]] = None,
+                  ) -> Iterator[InfoMessage]:
+    """Как `streaming.iter_messages`, но через кэш результатов.
+
+    Ошибочные пакеты обрабатываются как в `homework.read_packages`.
+    """
+    for index, package in enumerate(packages):
+        try:
+            workout_type, data = package
+            info = cache.get_info(workout_type, data)
+        except (TypeError, ValueError) as exc:
+            error = as_package_error(exc, package)
+            error.index = index
+            if errors is None:
+                raise error
+            errors.append(error)
+            continue
+        yield info
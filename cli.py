@@ -0,0 +1,241 @@
+"""Командная строка модуля фитнес-трекера.
+
+    python homework.py packages.jsonl
+    cat packages.csv | python homework.py - --format csv
+    python homework.py packages.jsonl --workers 16 --chunk-size 50000
+    python homework.py packages.jsonl --workers 8 --threads
+    python homework.py packages.csv --output-format binary > report.bin
+    python homework.py packages.csv --skip-errors 2> errors.txt
+    producer | python homework.py --worker | consumer
+
+Короткие запуски по одному файлу упираются во время старта
+интерпретатора, поэтому простой вызов `homework.py FILE` разбирается
+без `argparse`, а тяжёлые части (параллельная обработка, форматы
+вывода, статистика) импортируются только когда нужны. `--worker`
+держит процесс запущенным и отвечает на пакеты из канала по одному.
+"""
+from __future__ import annotations
+
+import sys
+from types import SimpleNamespace
+
+import streaming
+from homework import PackageError
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import argparse
+    from typing import List, Optional
+
+DEFAULTS = {
+    'input': '-',
+    'format': None,
+    'output_format': 'text',
+    'workers': 1,
+    'chunk_size': None,
+    'unordered': False,
+    'threads': False,
+    'stats': False,
+    'stats_interval': None,
+    'worker': False,
+    'outliers': None,
+    'outlier_config': None,
+    'skip_errors': False,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='homework.py',
+        description='Обработка пакетов датчиков фитнес-трекера.',
+    )
+    parser.add_argument(
+        'input', nargs='?',
+        help='файл с пакетами или `-` для чтения из stdin (по умолчанию)')
+    parser.add_argument(
+        '--format', choices=streaming.FORMATS,
+        help='формат пакетов; по умолчанию определяется автоматически')
+    parser.add_argument(
+        '--output-format',
+        choices=('text', 'jsonl', 'csv', 'binary'),
+        help='формат отчёта; text — строки `get_message`')
+    parser.add_argument(
+        '--workers', type=int,
+        help='число рабочих процессов; 0 — по числу ядер')
+    parser.add_argument(
+        '--chunk-size', type=int,
+        help='число пакетов в куске для рабочего процесса')
+    parser.add_argument(
+        '--threads', action='store_true',
+        help='рабочие — потоки, а не процессы (для сборки без GIL)')
+    parser.add_argument(
+        '--unordered', action='store_true',
+        help='выводить куски по мере готовности, без сохранения порядка')
+    parser.add_argument(
+        '--stats', action='store_true',
+        help='собирать статистику этапов и вывести её в stderr')
+    parser.add_argument(
+        '--stats-interval', type=float,
+        help='период вывода статистики в stderr, секунд')
+    parser.add_argument(
+        '--worker', action='store_true',
+        help='постоянный процесс: отвечать на каждую строку сразу')
+    parser.add_argument(
+        '--outliers', choices=('drop', 'flag'),
+        help='отбраковывать аномальные тренировки (модуль outliers): '
+             'drop — убирать из отчёта, flag — сообщать в stderr')
+    parser.add_argument(
+        '--outlier-config',
+        help='JSON с настройками фильтра аномалий')
+    parser.add_argument(
+        '--skip-errors', action='store_true',
+        help='пропускать ошибочные пакеты и сообщать о них в stderr; '
+             'код возврата 1, если такие были')
+    parser.set_defaults(**DEFAULTS)
+    return parser
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Разобрать аргументы; `homework.py FILE` — без импорта `argparse`."""
+    if len(argv) == 1 and (argv[0] == '-' or not argv[0].startswith('-')):
+        return SimpleNamespace(**{**DEFAULTS, 'input': argv[0]})
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.output_format != 'text' and args.workers != 1:
+        parser.error('--output-format поддерживается только при --workers 1')
+    if args.threads and args.workers == 1:
+        parser.error('--threads имеет смысл только вместе с --workers')
+    if args.worker and (args.workers != 1 or args.output_format != 'text'):
+        parser.error('--worker несовместим с --workers и --output-format')
+    if args.outlier_config and not args.outliers:
+        parser.error('--outlier-config требует --outliers')
+    if args.outliers and (args.workers != 1 or args.worker):
+        parser.error('--outliers несовместим с --workers и --worker')
+    if ((args.stats or args.stats_interval) and args.workers != 1
+            and not args.threads):
+        parser.error('--stats не видит рабочие процессы: используйте '
+                     '--threads или --workers 1')
+    if args.skip_errors and (args.workers != 1 or args.worker):
+        parser.error('--skip-errors несовместим с --workers и --worker')
+    return args
+
+
+def write_messages(messages, output_format: str) -> None:
+    """Записать сообщения в stdout в машиночитаемом формате."""
+    import formats
+
+    binary = formats.WRITERS[output_format].binary
+    output = sys.stdout.buffer if binary else sys.stdout
+    with formats.open_writer(output_format, output) as writer:
+        writer.write_many(messages)
+
+
+class ErrorReport:
+    """Приёмник ошибок для `--skip-errors`.
+
+    Передаётся в конвейер вместо списка `errors`: каждая ошибка сразу
+    печатается, а в памяти остаётся только их число.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def append(self, error) -> None:
+        self.count += 1
+        print(format_error(error), file=self.stream)
+
+
+def format_error(error) -> str:
+    """Строка об ошибке в пакете; пакеты нумеруются с единицы."""
+    if error.index is None:
+        return f'Ошибка в пакете: {error}'
+    return f'Ошибка в пакете {error.index + 1}: {error}'
+
+
+def run(argv: Optional[List[str]] = None) -> int:
+    """Обработать пакеты согласно аргументам командной строки.
+
+    Возвращает 1, если в пакетах были ошибки: без `--skip-errors`
+    обработка останавливается на первой из них.
+    """
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    fmt = args.format or streaming.format_for_path(args.input)
+    errors = ErrorReport(sys.stderr) if args.skip_errors else None
+    collector = None
+    if args.stats or args.stats_interval:
+        import instrumentation
+
+        collector = instrumentation.enable(dump_interval=args.stats_interval)
+    stage = None
+    if args.outliers:
+        stage = build_outlier_filter(args)
+    try:
+        process(args, fmt, stage, errors)
+    except PackageError as error:
+        print(format_error(error), file=sys.stderr)
+        return 1
+    finally:
+        if collector is not None:
+            instrumentation.disable()
+            collector.dump(sys.stderr)
+        if stage is not None:
+            print(stage.stats.format(), file=sys.stderr)
+    if errors is not None and errors.count:
+        print(f'Пропущено ошибочных пакетов: {errors.count}',
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_outlier_filter(args: argparse.Namespace):
+    """Фильтр аномалий по аргументам; в режиме flag — с выводом в stderr."""
+    import outliers
+
+    config = {}
+    if args.outlier_config:
+        config = outliers.load_config(args.outlier_config)
+
+    def report(info, reasons) -> None:
+        print(f"Аномалия ({', '.join(reasons)}): {info.get_message()}",
+              file=sys.stderr)
+
+    return outliers.OutlierFilter.from_config(
+        config, mode=args.outliers,
+        on_flag=report if args.outliers == 'flag' else None)
+
+
+def process(args: argparse.Namespace, fmt: Optional[str],
+            stage=None, errors: Optional[ErrorReport] = None) -> None:
+    with streaming.open_input(args.input) as stream:
+        if args.worker:
+            streaming.serve_worker(stream, sys.stdout, fmt)
+        elif args.output_format != 'text':
+            messages = streaming.iter_messages(
+                streaming.iter_packages(stream, fmt, errors is not None),
+                errors)
+            write_messages(
+                messages if stage is None else stage(messages),
+                args.output_format)
+        elif args.workers == 1:
+            streaming.process(stream, sys.stdout, fmt, stage, errors)
+        else:
+            import parallel
+
+            run_pool = parallel.process_parallel
+            if args.threads:
+                import threaded
+
+                run_pool = threaded.process_threaded
+            run_pool(
+                stream, sys.stdout, fmt,
+                workers=args.workers or None,
+                chunk_size=args.chunk_size or parallel.DEFAULT_CHUNK_SIZE,
+                ordered=not args.unordered,
+            )
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,221 @@
+"""Компактное представление тренировок для хранения в памяти.
+
+Классы с теми же именами, атрибутами и методами, что и в `homework`,
+но на `__slots__`, без словаря атрибутов у каждого объекта. Они
+строятся по классам `homework` (`compact_class`), в том числе для типов,
+зарегистрированных позже. Формулы и константы берутся из классов
+`homework` при каждом вызове, поэтому результаты совпадают.
+`TrainingArray` хранит много тренировок одного типа в столбцах
+`array('d')` — по 8 байт на поле.
+
+Память на одну запись (CPython 3.11, 64 бита, `measure_record_size`,
+без учёта самих чисел):
+
+    homework.Running        ~96 байт    compact.Running       56 байт
+    homework.SportsWalking  ~104 байт   compact.SportsWalking 64 байт
+    homework.Swimming       ~112 байт   compact.Swimming      72 байт
+    homework.InfoMessage    ~112 байт   compact.InfoMessage   72 байт
+    TrainingArray('RUN')    24 байт     TrainingArray('SWM')  40 байт
+"""
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence
+
+import homework
+from formulas import compile_init
+
+
+@dataclass(slots=True)
+class InfoMessage:
+    """Информационное сообщение о тренировке."""
+
+    training_type: str
+    duration: float
+    distance: float
+    speed: float
+    calories: float
+
+    MESSAGE = homework.InfoMessage.MESSAGE
+    get_message = homework.InfoMessage.get_message
+
+
+class _Constant:
+    """Константа, которая читается из класса `homework` при обращении.
+
+    Поэтому изменённые коэффициенты (например, при пересчёте) сразу
+    видны компактным объектам.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return getattr(owner.homework_class, self.name)
+
+
+METHODS = ('get_distance', 'get_mean_speed', 'get_spent_calories',
+           '_compute_metrics')
+
+_CLASSES: Dict[type, type] = {}
+
+
+def _show_training_info(self) -> InfoMessage:
+    """Вернуть информационное сообщение о выполненной тренировке."""
+    distance, speed, calories = self._compute_metrics()
+    return InfoMessage(type(self).__name__, self.duration,
+                       distance, speed, calories)
+
+
+def compact_class(training: type) -> type:
+    """Компактный класс для класса тренировки из `homework`.
+
+    Подкласс получает слоты только для своих новых полей, методы
+    показателей берутся из `training`, а константы читаются через
+    `training` при каждом обращении. Объект хранит только поля пакета:
+    `__init__` собирается по `FIELDS`.
+    """
+    compact = _CLASSES.get(training)
+    if compact is not None:
+        return compact
+    if training is homework.Training:
+        bases: tuple = ()
+        inherited: tuple = ()
+        namespace = {'show_training_info': _show_training_info}
+    else:
+        parent = compact_class(training.__mro__[1])
+        bases = (parent,)
+        inherited = parent.FIELDS
+        namespace = {}
+    namespace.update({
+        '__doc__': training.__doc__,
+        '__module__': __name__,
+        '__slots__': tuple(
+            field for field in training.FIELDS if field not in inherited),
+        '__init__': compile_init(
+            training.FIELDS, f'<compact {training.__name__}>'),
+        'homework_class': training,
+    })
+    for name in dir(training):
+        if name.isupper() and not callable(getattr(training, name)):
+            namespace[name] = _Constant(name)
+    for name in METHODS:
+        # Запоминающие обёртки хранят показатели в `_memo`, для
+        # которого у компактного объекта нет места.
+        method = getattr(training, name)
+        namespace[name] = getattr(method, '__wrapped__', method)
+    compact = type(training.__name__, bases, namespace)
+    return _CLASSES.setdefault(training, compact)
+
+
+Training = compact_class(homework.Training)
+Running = compact_class(homework.Running)
+SportsWalking = compact_class(homework.SportsWalking)
+Swimming = compact_class(homework.Swimming)
+Cycling = compact_class(homework.Cycling)
+Rowing = compact_class(homework.Rowing)
+Skiing = compact_class(homework.Skiing)
+
+
+def training_class(workout_type: str) -> type:
+    """Компактный класс зарегистрированного типа тренировки."""
+    training = homework.TRAININGS.get(workout_type)
+    if training is None:
+        raise homework.PackageError(
+            "Не верно указан тип тренировки", workout_type)
+    return compact_class(training)
+
+
+def read_package(workout_type: str, data: list) -> Training:
+    """Создать компактный объект тренировки по пакету датчиков.
+
+    Пакет проверяется как в `homework.read_package`; ошибка —
+    `PackageError`.
+    """
+    if not homework.is_valid_package(workout_type, data):
+        error = homework.check_package(workout_type, data)
+        if error is not None:
+            raise error
+    return training_class(workout_type)(*data)
+
+
+class TrainingArray:
+    """Упакованный набор тренировок одного типа в столбцах `array('d')`.
+
+    Объекты тренировок создаются только при обращении по индексу.
+    """
+
+    def __init__(self, workout_type: str,
+                 packages: Iterable[Sequence[float]] = ()):
+        self.training = training_class(workout_type)
+        self.workout_type = workout_type
+        self.fields = homework.PACKAGE_FIELDS[workout_type]
+        self.columns = {field: array('d') for field in self.fields}
+        self.extend(packages)
+
+    def append(self, data: Sequence[float]) -> None:
+        """Добавить тренировку по данным пакета.
+
+        Пакет сначала проверяется целиком (`homework.check_package`),
+        поэтому при ошибке столбцы не меняются.
+        """
+        data = list(data)
+        if not homework.is_valid_package(self.workout_type, data):
+            error = homework.check_package(self.workout_type, data)
+            if error is not None:
+                raise error
+        values = [float(value) for value in data]
+        for field, value in zip(self.fields, values):
+            self.columns[field].append(value)
+
+    def extend(self, packages: Iterable[Sequence[float]]) -> None:
+        for data in packages:
+            self.append(data)
+
+    def __len__(self) -> int:
+        return len(self.columns['action'])
+
+    def row(self, index: int) -> List[float]:
+        """Вернуть данные пакета по индексу."""
+        return [self.columns[field][index] for field in self.fields]
+
+    def __getitem__(self, index: int) -> Training:
+        return self.training(*self.row(index))
+
+    def __iter__(self) -> Iterator[Training]:
+        cls = self.training
+        for row in zip(*(self.columns[field] for field in self.fields)):
+            yield cls(*row)
+
+    def nbytes(self) -> int:
+        """Объём данных в столбцах, байт."""
+        return sum(
+            column.itemsize * len(column) for column in self.columns.values())
+
+    def compute(self):
+        """Рассчитать показатели всего набора через `batch.compute_batch`."""
+        import batch
+
+        return batch.compute_batch(self.workout_type, self.columns)
+
+
+def measure_record_size(factory: Callable[[int], object],
+                        count: int = 10000) -> float:
+    """Измерить среднюю память на объект, созданный `factory(i)`, байт.
+
+    Значения полей должны создаваться вне `factory`, чтобы учитывался
+    только сам объект.
+    """
+    tracemalloc.start()
+    try:
+        records = [None] * count
+        empty, _ = tracemalloc.get_traced_memory()
+        for i in range(count):
+            records[i] = factory(i)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del records
+    return (after - empty) / count
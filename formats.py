@@ -0,0 +1,264 @@
+"""Машиночитаемые форматы вывода `InfoMessage`.
+
+JSON Lines и CSV сохраняют числа через `repr`, поэтому чтение
+восстанавливает их точно. Двоичный формат хранит каждое сообщение в
+записи фиксированной длины:
+
+    <d duration> <d distance> <d speed> <d calories> <B тип> <7x>
+
+После заголовка с таблицей имён типов записи идут подряд, и
+`BinaryReader` отдаёт столбцы как срезы `memoryview` прямо поверх
+буфера или `mmap` без копирования.
+"""
+import csv
+import itertools
+import json
+import mmap
+import os
+import struct
+from abc import ABC, abstractmethod
+from operator import attrgetter
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from homework import TRAININGS, InfoMessage
+
+MESSAGE_FIELDS = InfoMessage.FIELDS
+NUMERIC_FIELDS = MESSAGE_FIELDS[1:]
+message_values = attrgetter(*MESSAGE_FIELDS)
+
+MAGIC = b'TRKINFO1'
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<4dB7x')
+TYPE_OFFSET = 4 * 8
+BLOCK_SIZE = 4096
+
+
+def registered_types() -> tuple[str, ...]:
+    """Имена зарегистрированных типов тренировок на момент вызова."""
+    return tuple(training.__name__ for training in TRAININGS.values())
+
+
+class MessageWriter(ABC):
+    """Базовый писатель потока сообщений."""
+
+    binary = False
+
+    def __init__(self, output: IO):
+        self.output = output
+        self.count = 0
+
+    @abstractmethod
+    def write(self, info: InfoMessage) -> None:
+        """Записать одно сообщение."""
+
+    def write_many(self, messages: Iterable[InfoMessage]) -> None:
+        for info in messages:
+            self.write(info)
+
+    def close(self) -> None:
+        flush = getattr(self.output, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JsonLinesWriter(MessageWriter):
+    """Сообщения в формате JSON Lines, по объекту на строку."""
+
+    def write(self, info: InfoMessage) -> None:
+        self.output.write(
+            json.dumps(dict(zip(MESSAGE_FIELDS, message_values(info))),
+                       ensure_ascii=False) + '\n')
+        self.count += 1
+
+
+class CsvWriter(MessageWriter):
+    """Сообщения в формате CSV с заголовком."""
+
+    def __init__(self, output: IO[str]):
+        super().__init__(output)
+        self._writer = csv.writer(output, lineterminator='\n')
+        self._writer.writerow(MESSAGE_FIELDS)
+
+    def write(self, info: InfoMessage) -> None:
+        self._writer.writerow(message_values(info))
+        self.count += 1
+
+
+class BinaryWriter(MessageWriter):
+    """Сообщения в двоичных записях фиксированной длины."""
+
+    binary = True
+
+    def __init__(self, output: IO[bytes],
+                 training_types: Optional[Sequence[str]] = None):
+        super().__init__(output)
+        if training_types is None:
+            training_types = registered_types()
+        self.training_types = tuple(training_types)
+        self._codes = {
+            name: code for code, name in enumerate(self.training_types)}
+        output.write(encode_header(self.training_types))
+
+    def write(self, info: InfoMessage) -> None:
+        self.output.write(self.pack(info))
+        self.count += 1
+
+    def write_many(self, messages: Iterable[InfoMessage]) -> None:
+        messages = iter(messages)
+        while True:
+            records = [
+                self.pack(info)
+                for info in itertools.islice(messages, BLOCK_SIZE)]
+            if not records:
+                return
+            self.output.write(b''.join(records))
+            self.count += len(records)
+
+    def pack(self, info: InfoMessage) -> bytes:
+        try:
+            code = self._codes[info.training_type]
+        except KeyError:
+            raise ValueError(
+                f"Неизвестный тип тренировки: {info.training_type}")
+        return RECORD.pack(
+            info.duration, info.distance, info.speed, info.calories, code)
+
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'csv': CsvWriter,
+    'binary': BinaryWriter,
+}
+
+
+def encode_header(training_types: Sequence[str]) -> bytes:
+    """Заголовок двоичного файла с таблицей имён типов."""
+    names = '\0'.join(training_types).encode('utf-8')
+    size = HEADER.size + len(names)
+    padding = -size % 8
+    return (
+        HEADER.pack(MAGIC, size + padding, len(training_types))
+        + names + b'\0' * padding)
+
+
+def read_jsonl(stream: Iterable[str]) -> Iterator[InfoMessage]:
+    """Читать сообщения из JSON Lines."""
+    for line in stream:
+        if line.strip():
+            yield InfoMessage(**json.loads(line))
+
+
+def read_csv(stream: Iterable[str]) -> Iterator[InfoMessage]:
+    """Читать сообщения из CSV с заголовком."""
+    for row in csv.DictReader(stream):
+        yield InfoMessage(
+            row['training_type'],
+            *(float(row[name]) for name in NUMERIC_FIELDS))
+
+
+class BinaryReader:
+    """Чтение двоичного формата без копирования данных.
+
+    Принимает объект с буферным протоколом (`bytes`, `mmap`) или путь к
+    файлу, который отображается в память. Перед `close()` нужно
+    освободить полученные из `column()` представления.
+    """
+
+    def __init__(self, source):
+        self._file = self._mmap = None
+        self._buffer = self._records = None
+        if isinstance(source, str) or hasattr(source, '__fspath__'):
+            self._file = open(source, 'rb')
+        try:
+            self._load(source)
+        except (ValueError, TypeError, struct.error) as error:
+            self.close()
+            raise ValueError(
+                f"Не удалось открыть двоичный отчёт: {error}") from error
+
+    def _load(self, source) -> None:
+        if self._file is not None:
+            if not os.fstat(self._file.fileno()).st_size:
+                raise ValueError("файл пуст")
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            source = self._mmap
+        self._buffer = memoryview(source).cast('B')
+        magic, header_size, count = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError("это не двоичный файл отчёта о тренировках")
+        names = bytes(self._buffer[HEADER.size:header_size]).rstrip(b'\0')
+        self.training_types = tuple(names.decode('utf-8').split('\0'))[:count]
+        self._records = self._buffer[header_size:]
+        if len(self._records) % RECORD.size:
+            raise ValueError("размер данных не кратен размеру записи")
+
+    def __len__(self) -> int:
+        return len(self._records) // RECORD.size
+
+    def __getitem__(self, index: int) -> InfoMessage:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._message(
+            *RECORD.unpack_from(self._records, index * RECORD.size))
+
+    def __iter__(self) -> Iterator[InfoMessage]:
+        message = self._message
+        for record in RECORD.iter_unpack(self._records):
+            yield message(*record)
+
+    def _message(self, duration, distance, speed, calories, code):
+        return InfoMessage(
+            self.training_types[code], duration, distance, speed, calories)
+
+    def column(self, name: str) -> memoryview:
+        """Столбец поля как срез `memoryview` без копирования.
+
+        Для `training_type` возвращаются коды типов (`B`), для
+        остальных полей — числа `d`.
+        """
+        if name == 'training_type':
+            return self._records[TYPE_OFFSET::RECORD.size]
+        index = NUMERIC_FIELDS.index(name)
+        return self._records.cast('d')[index::RECORD.size // 8]
+
+    def type_counts(self) -> Dict[str, int]:
+        counts: List[int] = [0] * len(self.training_types)
+        for code in self.column('training_type'):
+            counts[code] += 1
+        return dict(zip(self.training_types, counts))
+
+    def close(self) -> None:
+        if self._records is not None:
+            self._records.release()
+        if self._buffer is not None:
+            self._buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'BinaryReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def open_writer(fmt: str, output: IO,
+                training_types: Optional[Sequence[str]] = None
+                ) -> MessageWriter:
+    """Создать писателя формата `fmt` поверх потока."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Неизвестный формат вывода: {fmt}")
+    if fmt == 'binary' and training_types is not None:
+        return BinaryWriter(output, training_types)
+    return WRITERS[fmt](output)
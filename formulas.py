@@ -0,0 +1,204 @@
+"""Компиляция формул тренировок из декларативного описания.
+
+Формула — арифметическое выражение Python над полями пакета (`action`,
+`weight`, ...), ранее посчитанными показателями (`distance`, `speed`)
+и константами класса в верхнем регистре, например:
+
+    '(CALORIES_MEAN_SPEED_SHIFT + speed) * weight * duration'
+
+Из одного выражения собираются:
+
+- метод экземпляра (`get_spent_calories`): он копирует поля, константы
+  и нужные показатели из `self` в локальные переменные с теми же
+  именами и вычисляет выражение как есть; собирается при объявлении
+  класса;
+- общая для всех показателей класса функция (`compile_metrics`) для
+  `show_training_info`: выражения идут в ней друг за другом, и
+  дистанция со скоростью считаются по одному разу;
+- запоминающие обёртки методов (`compile_memo`): показатели экземпляра
+  хранятся в нём до изменения полей пакета или констант;
+- ядро для `batch`: функция от столбцов, в замыкании которой лежат
+  константы класса; работает и с числами, и с массивами NumPy.
+  Собирается при первом обращении, чтобы не тратить время запуска.
+
+Выражение в методе и ядре одно и то же, поэтому результаты совпадают
+побитово. Модуль не импортирует `ast` и `typing`: имена выражения
+берутся из `co_names` скомпилированного кода.
+"""
+from __future__ import annotations
+
+from types import FunctionType
+
+METRICS = {
+    'distance': 'get_distance',
+    'speed': 'get_mean_speed',
+    'calories': 'get_spent_calories',
+}
+
+METRIC_DOCS = {
+    'distance': 'Получить пройденную дистанцию.',
+    'speed': 'Получить среднюю скорость движения.',
+    'calories': 'Получить количество затраченных калорий.',
+}
+
+Kernel = tuple[FunctionType, tuple[str, ...]]
+
+
+def _exec(source: str, filename: str, name: str,
+          namespace: dict | None = None) -> FunctionType:
+    namespace = {} if namespace is None else namespace
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace[name]
+
+
+def compile_init(fields, filename: str) -> FunctionType:
+    """`__init__`, сохраняющий поля пакета в атрибуты экземпляра."""
+    fields = tuple(fields)
+    body = ''.join(f'    self.{field} = {field}\n' for field in fields)
+    source = f'def __init__(self, {", ".join(fields)}):\n{body}'
+    return _exec(source, filename, '__init__')
+
+
+def compile_metrics(owner: type) -> FunctionType:
+    """Функция, считающая все показатели экземпляра за один вызов.
+
+    Возвращает `(distance, speed, calories)`. Показатель, метод которого
+    собран из формулы, вычисляется выражением прямо в функции, а ранее
+    посчитанные показатели берутся из локальных переменных. Метод,
+    написанный вручную, вызывается как есть.
+    """
+    lines = []
+    loaded = set()
+    for metric, name in METRICS.items():
+        formula = getattr(getattr(owner, name, None), '__formula__', None)
+        if formula is None:
+            lines.append(f'    {metric} = self.{name}()\n')
+        else:
+            for param in (*formula.params, *formula.constants):
+                if param not in METRICS and param not in loaded:
+                    lines.append(f'    {param} = self.{param}\n')
+                    loaded.add(param)
+            lines.append(f'    {metric} = ({formula.expression})\n')
+    source = (
+        f'def metrics(self):\n{"".join(lines)}'
+        f'    return {", ".join(METRICS)}\n')
+    return _exec(source, f'<metrics {owner.__name__}>', 'metrics')
+
+
+def compile_memo(owner: type) -> dict[str, FunctionType]:
+    """Запоминающие методы показателей экземпляров `owner`.
+
+    Показатели хранятся в `self._memo` списком `[ключ, distance, speed,
+    calories]`. Ключ — версия констант (`version` метакласса) и значения
+    полей пакета; он сверяется при каждом вызове, поэтому изменённое
+    поле или константа сбрасывают запомненное без `__setattr__`, а
+    конструктор остаётся прежним. Оборачиваются только методы, собранные
+    из формул (исходный лежит в `__wrapped__`); методы, написанные
+    вручную, вызываются как есть. `_metrics` возвращает все три
+    показателя и при промахе считает их через `_compute_metrics`.
+    """
+    key = ', '.join(
+        ['meta.version', *(f'self.{field}' for field in owner.FIELDS)])
+    head = f'    key = ({key})\n    memo = self._memo\n'
+    stale = 'memo is None or memo[0] != key'
+    namespace = {'meta': type(owner)}
+    sources = [
+        f'def _metrics(self):\n{head}'
+        f'    if {stale} or None in memo:\n'
+        f'        memo = self._memo = [key, *self._compute_metrics()]\n'
+        f'    return memo[1], memo[2], memo[3]\n'
+    ]
+    wrapped = {}
+    for index, name in enumerate(METRICS.values(), 1):
+        method = getattr(owner, name, None)
+        method = getattr(method, '__wrapped__', method)
+        if getattr(method, '__formula__', None) is None:
+            continue
+        namespace[f'{name}_'] = wrapped[name] = method
+        sources.append(
+            f'def {name}(self):\n{head}'
+            f'    if {stale}:\n'
+            f'        memo = self._memo = [key, None, None, None]\n'
+            f'    value = memo[{index}]\n'
+            f'    if value is None:\n'
+            f'        value = memo[{index}] = {name}_(self)\n'
+            f'    return value\n')
+    _exec('\n'.join(sources), f'<memo {owner.__name__}>', '_metrics',
+          namespace)
+    methods = {'_metrics': namespace['_metrics']}
+    for name, method in wrapped.items():
+        memo = methods[name] = namespace[name]
+        memo.__doc__ = method.__doc__
+        memo.__formula__ = method.__formula__
+        memo.__wrapped__ = method
+    return methods
+
+
+class Formula:
+    """Проверенное выражение показателя тренировки."""
+
+    def __init__(self, metric: str, expression: str, fields, owner: type):
+        if metric not in METRICS:
+            raise ValueError(f"Неизвестный показатель: {metric}")
+        self.metric = metric
+        self.expression = expression.strip()
+        self.owner = owner
+        try:
+            code = compile(self.expression, self.filename, 'eval')
+        except SyntaxError as error:
+            raise ValueError(
+                f"Ошибка в формуле {metric}: {error.msg}") from None
+        for value in code.co_consts:
+            if type(value) not in (int, float):
+                raise ValueError(
+                    f"В формуле {metric} допустимы только числа, "
+                    f"имена и арифметика")
+        earlier = tuple(METRICS)[:tuple(METRICS).index(metric)]
+        names = set(code.co_names)
+        for name in names:
+            if (name not in fields and name not in earlier
+                    and not (name.isupper() and hasattr(owner, name))):
+                raise ValueError(
+                    f"Неизвестное имя {name} в формуле {metric} "
+                    f"класса {owner.__name__}")
+        self.params = tuple(
+            name for name in (*fields, *earlier) if name in names)
+        self.constants = tuple(
+            sorted(name for name in names if name.isupper()))
+        self._factory = None
+
+    @property
+    def filename(self) -> str:
+        return f'<formula {self.owner.__name__}.{self.metric}>'
+
+    def method(self) -> FunctionType:
+        """Метод экземпляра, вычисляющий показатель."""
+        loads = ''.join(
+            f'    {name} = self.{METRICS[name]}()\n' if name in METRICS
+            else f'    {name} = self.{name}\n'
+            for name in (*self.params, *self.constants))
+        name = METRICS[self.metric]
+        source = (
+            f'def {name}(self):\n{loads}'
+            f'    return ({self.expression})\n')
+        method = _exec(source, self.filename, name)
+        method.__doc__ = METRIC_DOCS[self.metric]
+        method.__formula__ = self
+        return method
+
+    def kernel_factory(self):
+        """Фабрика ядра: по классу вернуть функцию и имена её столбцов."""
+        if self._factory is None:
+            copies = ''.join(
+                f'    {name} = cls.{name}\n' for name in self.constants)
+            source = (
+                f'def factory(cls):\n{copies}'
+                f'    def {self.metric}({", ".join(self.params)}):\n'
+                f'        return ({self.expression})\n'
+                f'    return {self.metric}, {self.params!r}\n')
+            self._factory = _exec(source, self.filename, 'factory')
+        return self._factory
+
+    def kernel(self, cls: type) -> Kernel:
+        """Ядро с текущими значениями констант класса `cls`."""
+        return self.kernel_factory()(cls)
@@ -1,31 +1,215 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+from _thread import allocate_lock
+from math import inf as INF
+
+from formulas import (METRICS, Formula, compile_init, compile_memo,
+                      compile_metrics)
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterable, Iterator, Optional, Sequence
+
+    from formulas import Kernel
 
 
-@dataclass
 class InfoMessage:
-    """Информационное сообщение о тренировке."""
+    """Информационное сообщение о тренировке.
+
+    Написан вручную, а не через `dataclasses`: импорт `dataclasses`
+    тянет `inspect` и `re` и заметно удлиняет запуск короткого CLI.
+    """
+
+    FIELDS = ('training_type', 'duration', 'distance', 'speed', 'calories')
+    MESSAGE = (
+        "Тип тренировки: %s; "
+        "Длительность: %.3f ч.; "
+        "Дистанция: %.3f км; "
+        "Ср. скорость: %.3f км/ч; "
+        "Потрачено ккал: %.3f."
+    )
+    __hash__ = None
+    __match_args__ = FIELDS
+
+    def __init__(self,
+                 training_type: str,
+                 duration: float,
+                 distance: float,
+                 speed: float,
+                 calories: float,
+                 ):
+        self.training_type = training_type
+        self.duration = duration
+        self.distance = distance
+        self.speed = speed
+        self.calories = calories
+
+    def _values(self) -> tuple:
+        return (self.training_type, self.duration, self.distance,
+                self.speed, self.calories)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
 
-    training_type: str
-    duration: float
-    distance: float
-    speed: float
-    calories: float
+    def __repr__(self) -> str:
+        values = ', '.join(
+            f'{name}={value!r}'
+            for name, value in zip(self.FIELDS, self._values()))
+        return f'{type(self).__qualname__}({values})'
 
     def get_message(self) -> str:
-        return (
-            f"Тип тренировке: {self.training_type}; "
-            f"Длительность: {"{:.3f}".format(self.duration)} ч.; "
-            f"Дистанция: {"{:.3f}".format(self.distance)} км; "
-            f"Ср. скорость: {"{:.3f}".format(self.speed)} км/ч; "
-            f"Потрачено ккал: {"{:.3f}".format(self.calories)}."
+        return self.MESSAGE % (
+            self.training_type,
+            self.duration,
+            self.distance,
+            self.speed,
+            self.calories,
         )
 
 
-class Training:
-    """Базовый класс тренировки."""
+# Реестр читается без блокировок: `_register` заполняет
+# `PACKAGE_FIELDS` и `_BOUNDS` раньше `TRAININGS`, а
+# `unregister_workout` сначала убирает тип из `TRAININGS`. Читатели
+# берут записи через `get`, поэтому тип, который добавляют или убирают
+# в другом потоке, виден либо целиком, либо как неизвестный.
+TRAININGS: dict[str, type] = {}
+
+FIELD_BOUNDS = {
+    "action": (0, True),
+    "duration": (0, False),
+    "weight": (0, False),
+    "height": (0, False),
+    "length_pool": (0, True),
+    "count_pool": (0, True),
+    "climb": (0, True),
+}
+
+PACKAGE_FIELDS: dict[str, tuple[str, ...]] = {}
+
+_BOUNDS: dict[str, tuple[tuple[float, bool], ...]] = {}
+
+_registry_lock = allocate_lock()
+
+
+def package_fields(training: type) -> tuple[str, ...]:
+    """Вернуть имена полей пакета.
+
+    Это объявленные `FIELDS`, а для класса с собственным `__init__` без
+    `FIELDS` — позиционные параметры конструктора.
+    """
+    own = training.__dict__
+    if 'FIELDS' in own or '__init__' not in own:
+        return tuple(training.FIELDS)
+    # Только для классов с `__init__`, написанным вручную: `inspect`
+    # дорог при запуске CLI.
+    import inspect
+
+    parameters = list(
+        inspect.signature(training.__init__).parameters.values())
+    if any(parameter.kind is parameter.VAR_POSITIONAL
+           for parameter in parameters):
+        raise TypeError(
+            f"{training.__name__}: при *args поля пакета нужно объявить "
+            "в FIELDS")
+    return tuple(
+        parameter.name for parameter in parameters[1:]
+        if parameter.kind in (parameter.POSITIONAL_ONLY,
+                              parameter.POSITIONAL_OR_KEYWORD))
+
+
+def _register(training: type) -> None:
+    code = training.CODE
+    unknown = [field for field in training.FIELDS
+               if field not in FIELD_BOUNDS]
+    if unknown:
+        raise ValueError(
+            f"Не заданы границы полей {', '.join(unknown)} в FIELD_BOUNDS")
+    with _registry_lock:
+        if code in TRAININGS or code in PACKAGE_FIELDS:
+            raise ValueError(f"Тип тренировки {code} уже зарегистрирован")
+        PACKAGE_FIELDS[code] = training.FIELDS
+        _BOUNDS[code] = tuple(
+            FIELD_BOUNDS[field] for field in training.FIELDS)
+        TRAININGS[code] = training
+
+
+def unregister_workout(workout_type: str) -> type:
+    """Убрать тип тренировки из реестра и вернуть его класс."""
+    with _registry_lock:
+        training = TRAININGS.pop(workout_type)
+        _BOUNDS.pop(workout_type)
+        PACKAGE_FIELDS.pop(workout_type)
+    return training
+
+
+def _compile_formulas(training: type, formulas: dict[str, str]) -> None:
+    compiled = dict(training._formulas)
+    for metric, name in METRICS.items():
+        if name in training.__dict__ and metric not in formulas:
+            compiled.pop(metric, None)
+    for metric, expression in formulas.items():
+        formula = Formula(metric, expression, training.FIELDS, training)
+        setattr(training, METRICS[metric], formula.method())
+        compiled[metric] = formula
+    training._formulas = compiled
+    for name, method in compile_memo(training).items():
+        setattr(training, name, method)
+    training._compute_metrics = compile_metrics(training)
+
+
+class TrainingType(type):
+    """Метакласс тренировок: считает изменения атрибутов классов.
+
+    `version` растёт при каждом присваивании или удалении атрибута
+    класса тренировки, например константы. Кэши результатов
+    (`cache.ResultCache`) сверяют одно число вместо всех констант.
+    """
+
+    version = 0
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        TrainingType.version += 1
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        TrainingType.version += 1
+
+
+class Training(metaclass=TrainingType):
+    """Базовый класс тренировки.
+
+    Подкласс описывается декларативно: код в `CODE`, поля пакета в
+    `FIELDS`, константы атрибутами класса и формулы показателей
+    выражениями в `FORMULAS` (см. `formulas`). Методы показателей,
+    `__init__` и ядра для `batch` собираются при объявлении класса,
+    а класс с `CODE` регистрируется в `TRAININGS`. Посчитанные
+    показатели запоминаются в экземпляре (`formulas.compile_memo`).
+    """
     LEN_STEP: float = 0.65
     M_IN_KM: int = 1000
     MIN_IN_H: int = 60
+    FIELDS = ('action', 'duration', 'weight')
+    FORMULAS = {
+        'distance': 'action * LEN_STEP / M_IN_KM',
+        'speed': 'distance / duration',
+    }
+    _formulas: dict[str, Formula] = {}
+    _memo = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        own = cls.__dict__
+        if 'FIELDS' in own and '__init__' not in own:
+            cls.__init__ = compile_init(cls.FIELDS, f'<fields {cls.__name__}>')
+        cls.FIELDS = package_fields(cls)
+        formulas = own.get('FORMULAS', {})
+        cls.FORMULAS = {**super(cls, cls).FORMULAS, **formulas}
+        _compile_formulas(cls, formulas)
+        if 'CODE' in own:
+            _register(cls)
 
     def __init__(self,
                  action: int,
@@ -37,129 +221,265 @@ class Training:
         self.duration = duration
         self.weight = weight
 
-    def get_distance(self) -> float:
-        """Получить пройденную дистанция"""
-        return self.action * self.LEN_STEP / self.M_IN_KM
-
-    def get_mean_speed(self) -> float:
-        """Получить среднюю скорость движения."""
-        return self.get_distance() / self.duration
+    @classmethod
+    def kernels(cls) -> dict[str, Kernel]:
+        """Ядра формул для `batch` с текущими значениями констант."""
+        return {
+            metric: formula.kernel(cls)
+            for metric, formula in cls._formulas.items()
+        }
+
+    @classmethod
+    def compiled_formulas(cls) -> dict[str, Formula]:
+        """Скомпилированные формулы показателей в порядке расчёта."""
+        return {
+            metric: cls._formulas[metric]
+            for metric in METRICS if metric in cls._formulas
+        }
 
     def show_training_info(self):
-        """Вернуть информационное сообщение о выполненной тренировке."""
-        return InfoMessage(
-            training_type=type(self).__name__,
-            duration=self.duration,
-            distance=self.get_distance(),
-            speed=self.get_mean_speed(),
-            calories=self.get_spent_calories(),
-        )
+        """Вернуть информационное сообщение о выполненной тренировке.
+
+        Показатели считаются за один проход (`formulas.compile_metrics`):
+        дистанция и скорость не пересчитываются для калорий. Повторный
+        вызов берёт их из памяти экземпляра, пока не изменились поля.
+        """
+        distance, speed, calories = self._metrics()
+        return InfoMessage(type(self).__name__, self.duration,
+                           distance, speed, calories)
 
     def get_spent_calories(self) -> float:
         """Получить количество колорий."""
         pass
 
 
+_compile_formulas(Training, Training.FORMULAS)
+
+
 class Running(Training):
     """Тренировка: бег."""
+    CODE = "RUN"
     CALORIES_MEAN_SPEED_MULTIPLIER = 18
     CALORIES_MEAN_SPEED_SHIFT = 1.79
-
-    def get_spent_calories(self) -> float:
-        """Получить количество затраченных калорий."""
-        return (
-            (
-                self.CALORIES_MEAN_SPEED_MULTIPLIER
-                * self.get_mean_speed()
-                + self.CALORIES_MEAN_SPEED_SHIFT
-            )
-            * self.weight
-            / self.M_IN_KM
-            * self.duration
-            * self.MIN_IN_H)
+    FORMULAS = {
+        'calories': (
+            '(CALORIES_MEAN_SPEED_MULTIPLIER * speed'
+            ' + CALORIES_MEAN_SPEED_SHIFT)'
+            ' * weight / M_IN_KM * duration * MIN_IN_H'),
+    }
 
 
 class SportsWalking(Training):
     """Тренировка: спортивная ходьба."""
+    CODE = "WLK"
     KMH_IN_MSEC: float = 0.278
     CM_IN_M: int = 100
     CALORIES_WEIGHT_MULTIPLIER: float = 0.035
     CALORIES_SPEED_HEIGHT_MULTIPLIER: float = 0.029
-
-    def __init__(self,
-                 action: int,
-                 duration: float,
-                 weight: float,
-                 height: float,
-                 ):
-        super().__init__(action, duration, weight)
-        self.height = height
-
-    def get_spent_calories(self) -> float:
-        """Получить количество затраченных калорий."""
-        return (
-            (
-                self.CALORIES_WEIGHT_MULTIPLIER
-                * self.weight
-                + (
-                    (
-                        self.get_mean_speed()
-                        * self.KMH_IN_MSEC)
-                    ** 2
-                    / (
-                        self.height
-                        / self.CM_IN_M))
-                * self.CALORIES_SPEED_HEIGHT_MULTIPLIER
-                * self.weight)
-            * self.duration * self.MIN_IN_H)
+    FIELDS = ('action', 'duration', 'weight', 'height')
+    FORMULAS = {
+        'calories': (
+            '(CALORIES_WEIGHT_MULTIPLIER * weight'
+            ' + (speed * KMH_IN_MSEC) ** 2 / (height / CM_IN_M)'
+            ' * CALORIES_SPEED_HEIGHT_MULTIPLIER * weight)'
+            ' * duration * MIN_IN_H'),
+    }
 
 
 class Swimming(Training):
     """Тренировка: плавание."""
+    CODE = "SWM"
     LEN_STEP: float = 1.38
     CALORIES_WEIGHT_MULTIPLIER: int = 2
     CALORIES_MEAN_SPEED_SHIFT: float = 1.1
+    FIELDS = ('action', 'duration', 'weight', 'length_pool', 'count_pool')
+    FORMULAS = {
+        'speed': 'length_pool * count_pool / M_IN_KM / duration',
+        'calories': (
+            '(speed + CALORIES_MEAN_SPEED_SHIFT)'
+            ' * CALORIES_WEIGHT_MULTIPLIER * weight * duration'),
+    }
 
-    def __init__(self,
-                 action: int,
-                 duration: float,
-                 weight: float,
-                 length_pool: int,
-                 count_pool: int,
-                 ) -> None:
-
-        super().__init__(action, duration, weight)
-        self.length_pool = length_pool
-        self.count_pool = count_pool
-
-    def get_mean_speed(self) -> float:
-        """Получить среднюю скорость движения."""
-        return (
-            self.length_pool
-            * self.count_pool
-            / self.M_IN_KM
-            / self.duration)
 
-    def get_spent_calories(self) -> float:
-        """Получить количество затраченных калорий."""
-        return (
-            (
-                self.get_mean_speed()
-                + self.CALORIES_MEAN_SPEED_SHIFT)
-            * self.CALORIES_WEIGHT_MULTIPLIER
-            * self.weight
-            * self.duration)
-
-
-def read_package(workout_type: str, data: list):
-    trainings = {
-        "RUN": Running,
-        "SWM": Swimming,
-        "WLK": SportsWalking,
+class Cycling(Training):
+    """Тренировка: велосипед; `action` — обороты колеса."""
+    CODE = "CYC"
+    LEN_STEP: float = 2.1
+    CALORIES_WEIGHT_MULTIPLIER: float = 0.07
+    CALORIES_SPEED_MULTIPLIER: float = 0.012
+    FORMULAS = {
+        'calories': (
+            '(CALORIES_WEIGHT_MULTIPLIER * weight'
+            ' + CALORIES_SPEED_MULTIPLIER * speed ** 2)'
+            ' * duration * MIN_IN_H'),
+    }
+
+
+class Rowing(Training):
+    """Тренировка: гребля; `action` — гребки."""
+    CODE = "ROW"
+    LEN_STEP: float = 8.0
+    CALORIES_MEAN_SPEED_MULTIPLIER: float = 0.5
+    CALORIES_MEAN_SPEED_SHIFT: float = 2
+    FORMULAS = {
+        'calories': (
+            '(CALORIES_MEAN_SPEED_MULTIPLIER * speed'
+            ' + CALORIES_MEAN_SPEED_SHIFT) * weight * duration'),
     }
 
-    assert workout_type in trainings, "Не верно указан тип тренировки"
-    return trainings[workout_type](*data)
+
+class Skiing(Training):
+    """Тренировка: лыжи; `climb` — набор высоты в метрах."""
+    CODE = "SKI"
+    LEN_STEP: float = 2.5
+    CALORIES_MEAN_SPEED_MULTIPLIER: float = 0.6
+    CALORIES_MEAN_SPEED_SHIFT: float = 2
+    CALORIES_CLIMB_MULTIPLIER: float = 0.0094
+    FIELDS = ('action', 'duration', 'weight', 'climb')
+    FORMULAS = {
+        'calories': (
+            '(CALORIES_MEAN_SPEED_MULTIPLIER * speed'
+            ' + CALORIES_MEAN_SPEED_SHIFT) * weight * duration'
+            ' + CALORIES_CLIMB_MULTIPLIER * climb * weight'),
+    }
+
+
+def register_workout(workout_type: str, name: str, fields: Sequence[str],
+                     formulas: dict[str, str], base: type = Training,
+                     **constants) -> type:
+    """Объявить и зарегистрировать тип тренировки без написания класса.
+
+    Недостающие формулы и константы наследуются от `base`.
+    """
+    return type(name, (base,), {
+        '__doc__': f"Тренировка: {name}.",
+        'CODE': workout_type,
+        'FIELDS': tuple(fields),
+        'FORMULAS': dict(formulas),
+        **constants,
+    })
+
+
+class PackageError(ValueError):
+    """Ошибка в пакете датчиков.
+
+    Кроме текста хранит код тренировки, данные пакета, имя поля с
+    ошибкой и порядковый номер пакета в потоке (для `read_packages`).
+    """
+
+    def __init__(self, reason: str, workout_type=None, data=None,
+                 field: Optional[str] = None, index: Optional[int] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.workout_type = workout_type
+        self.data = data
+        self.field = field
+        self.index = index
+
+
+def _is_valid(bounds, data) -> bool:
+    if len(data) != len(bounds):
+        return False
+    for value, (low, inclusive) in zip(data, bounds):
+        if type(value) is not int and type(value) is not float:
+            return False
+        if not (low < value < INF or inclusive and value == low):
+            return False
+    return True
+
+
+def check_package(workout_type: str, data) -> Optional[PackageError]:
+    """Найти ошибку в пакете или вернуть None, если пакет корректен.
+
+    Числом считается любой `numbers.Real`, кроме bool: значения из numpy
+    или `Fraction` тоже подходят.
+    """
+    from numbers import Real
+
+    fields = (PACKAGE_FIELDS.get(workout_type)
+              if isinstance(workout_type, str) else None)
+    if fields is None or workout_type not in TRAININGS:
+        return PackageError(
+            "Не верно указан тип тренировки", workout_type, data)
+    if not isinstance(data, (list, tuple)) or len(data) != len(fields):
+        return PackageError(
+            f"Для {workout_type} нужно {len(fields)} значений: "
+            f"{', '.join(fields)}", workout_type, data)
+    for field, value in zip(fields, data):
+        low, inclusive = FIELD_BOUNDS[field]
+        if isinstance(value, bool) or not isinstance(value, Real):
+            return PackageError(
+                f"Поле {field} должно быть числом", workout_type, data, field)
+        if not (low < value < INF or inclusive and value == low):
+            return PackageError(
+                f"Недопустимое значение поля {field}: {value}",
+                workout_type, data, field)
+    return None
+
+
+def is_valid_package(workout_type: str, data) -> bool:
+    """Быстро проверить пакет без диагностики ошибки.
+
+    False не всегда означает ошибку: пограничные случаи (например,
+    подклассы `int`) разбирает `check_package`.
+    """
+    bounds = _BOUNDS.get(workout_type) if type(workout_type) is str else None
+    try:
+        return bounds is not None and _is_valid(bounds, data)
+    except TypeError:
+        return False
+
+
+def read_package(workout_type: str, data: list) -> Training:
+    """Создать объект тренировки по пакету датчиков.
+
+    Некорректный пакет вызывает `PackageError`.
+    """
+    if not is_valid_package(workout_type, data):
+        error = check_package(workout_type, data)
+        if error is not None:
+            raise error
+    training = TRAININGS.get(workout_type)
+    if training is None:
+        # Тип убрали из реестра в другом потоке после проверки.
+        raise PackageError(
+            "Не верно указан тип тренировки", workout_type, data)
+    return training(*data)
+
+
+def read_packages(packages: Iterable[tuple[str, list]],
+                  errors: Optional[list[PackageError]] = None,
+                  ) -> Iterator[Training]:
+    """Лениво создавать тренировки из потока пакетов.
+
+    Если передан список `errors`, ошибочные пакеты пропускаются, а
+    ошибки с номером пакета складываются в него; иначе первая ошибка
+    прерывает поток.
+    """
+    for index, package in enumerate(packages):
+        try:
+            workout_type, data = package
+            training = read_package(workout_type, data)
+        except (TypeError, ValueError) as exc:
+            error = as_package_error(exc, package)
+            error.index = index
+            if errors is None:
+                raise error
+            errors.append(error)
+            continue
+        yield training
+
+
+def as_package_error(exc: Exception, package) -> PackageError:
+    """Ошибка разбора или расчёта пакета в виде `PackageError`."""
+    if isinstance(exc, PackageError):
+        return exc
+    if isinstance(package, PackageError):
+        # Строка, которую не удалось разобрать, см.
+        # `streaming.iter_packages(keep_errors=True)`.
+        return package
+    return PackageError(
+        "Пакет должен состоять из кода тренировки и данных", data=package)
 
 
 def main(training: Training):
@@ -168,6 +488,15 @@ def main(training: Training):
 
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        # Остальные модули импортируют `homework`: отдаём им уже
+        # выполненный скрипт, чтобы не объявлять классы второй раз.
+        sys.modules.setdefault("homework", sys.modules[__name__])
+        from cli import run
+        sys.exit(run(sys.argv[1:]))
+
     packages = [
         ("SWM", [720, 1, 80, 25, 40]),
         ("RUN", [15000, 1, 75]),
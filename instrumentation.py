@@ -0,0 +1,311 @@
+"""Инструментирование конвейера обработки пакетов.
+
+Пока инструментирование выключено, код конвейера не меняется и ничего
+не стоит. `enable()` оборачивает этапы:
+
+- `decode` — `homework.read_package`, в том числе в модулях, которые
+  импортировали его по имени (`streaming`, `cache` и т. д.) до
+  `enable()`;
+- `compute` — `Training.show_training_info` (дистанция, скорость,
+  калории);
+- `render` — `InfoMessage.get_message` и `writer.render_block`, в том
+  числе импортированный по имени в `parallel`.
+
+Для каждого этапа и типа тренировки собираются счётчики, ошибки и
+гистограмма задержек по степеням двойки наносекунд. Доля вызовов
+`profile_rate` выполняется под `cProfile`, доля `trace_memory_rate` —
+с подсчётом выделенной памяти через `tracemalloc`. Счётчики меняются
+под блокировкой, поэтому конвейер можно гонять в пуле потоков. Рабочие
+процессы (`parallel`) не инструментируются.
+
+    instrumentation.enable(profile_rate=0.01)
+    ...
+    print(instrumentation.stats())
+    instrumentation.disable()
+"""
+import cProfile
+import json
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from functools import wraps
+from typing import IO, Dict, List, Optional
+
+import homework
+import writer
+
+STAGES = ('decode', 'compute', 'render')
+
+
+class StageStats:
+    """Счётчики и гистограмма задержек одного этапа."""
+
+    __slots__ = ('count', 'errors', 'total_ns', 'min_ns', 'max_ns',
+                 'buckets', 'alloc_bytes', 'alloc_samples')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets: Dict[int, int] = {}
+        self.alloc_bytes = 0
+        self.alloc_samples = 0
+
+    def add(self, elapsed_ns: int, items: int = 1) -> None:
+        """Учесть вызов, обработавший `items` записей."""
+        self.count += items
+        self.total_ns += elapsed_ns
+        per_item = elapsed_ns // items if items else elapsed_ns
+        if self.min_ns is None or per_item < self.min_ns:
+            self.min_ns = per_item
+        if per_item > self.max_ns:
+            self.max_ns = per_item
+        bucket = per_item.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + items
+
+    def percentile(self, q: float) -> int:
+        """Оценка перцентиля задержки по гистограмме (верхняя граница)."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ns': self.total_ns,
+            'mean_ns': self.total_ns / self.count if self.count else 0,
+            'min_ns': self.min_ns or 0,
+            'max_ns': self.max_ns,
+            'p50_ns': self.percentile(0.5),
+            'p99_ns': self.percentile(0.99),
+            'histogram': {
+                f'<{1 << bucket}': count
+                for bucket, count in sorted(self.buckets.items())
+            },
+            'alloc_bytes_per_call': (
+                self.alloc_bytes / self.alloc_samples
+                if self.alloc_samples else None),
+        }
+
+
+class Instrumentation:
+    """Сборщик статистики по этапам и типам тренировок."""
+
+    def __init__(self, profile_rate: float = 0.0,
+                 trace_memory_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.profile_rate = profile_rate
+        self.trace_memory_rate = trace_memory_rate
+        self.profiler = cProfile.Profile() if profile_rate else None
+        self._random = random.Random(seed)
+        self._stats: Dict[str, Dict[str, StageStats]] = {
+            stage: {} for stage in STAGES}
+        self._originals: List = []
+        self._dumper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def stage(self, stage: str, training_type: str) -> StageStats:
+        by_type = self._stats[stage]
+        stats = by_type.get(training_type)
+        if stats is None:
+            stats = by_type[training_type] = StageStats()
+        return stats
+
+    def stats(self) -> Dict:
+        """Снимок статистики: этап -> тип тренировки -> показатели."""
+        with self._lock:
+            return {
+                stage: {
+                    training_type: stats.as_dict()
+                    for training_type, stats in by_type.items()
+                }
+                for stage, by_type in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            for by_type in self._stats.values():
+                by_type.clear()
+
+    def dump(self, output: Optional[IO[str]] = None) -> None:
+        """Записать снимок статистики одной строкой JSON."""
+        output = sys.stderr if output is None else output
+        output.write(json.dumps(
+            {'time': time.time(), 'stats': self.stats()}) + '\n')
+        output.flush()
+
+    def dump_every(self, interval: float,
+                   output: Optional[IO[str]] = None) -> None:
+        """Периодически сбрасывать статистику в `output` в фоне."""
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.dump(output)
+
+        self._dumper = threading.Thread(target=loop, daemon=True)
+        self._dumper.start()
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """Статистика `cProfile` по выборке вызовов."""
+        if self.profiler is None:
+            return None
+        return pstats.Stats(self.profiler)
+
+    def _measure(self, stage: str, func, type_of, items_of=None):
+        instrumentation = self
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            sampled_profile = (
+                instrumentation.profiler is not None
+                and instrumentation._random.random()
+                < instrumentation.profile_rate)
+            sampled_memory = (
+                instrumentation.trace_memory_rate
+                and instrumentation._random.random()
+                < instrumentation.trace_memory_rate)
+            if sampled_memory:
+                memory_before = tracemalloc.get_traced_memory()[0]
+            if sampled_profile:
+                instrumentation.profiler.enable()
+            start = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                training_type = type_of(args, None)
+                with instrumentation._lock:
+                    instrumentation.stage(stage, training_type).errors += 1
+                raise
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                if sampled_profile:
+                    instrumentation.profiler.disable()
+            training_type = type_of(args, result)
+            items = items_of(args) if items_of else 1
+            if sampled_memory:
+                allocated = tracemalloc.get_traced_memory()[0] - memory_before
+            with instrumentation._lock:
+                stats = instrumentation.stage(stage, training_type)
+                stats.add(elapsed, items)
+                if sampled_memory:
+                    stats.alloc_bytes += allocated
+                    stats.alloc_samples += 1
+            return result
+
+        return wrapper
+
+    def _patch(self, owner, name: str, wrapper) -> None:
+        self._originals.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, wrapper)
+
+    def _patch_bindings(self, name: str, original, wrapper) -> None:
+        """Заменить `original` во всех модулях, где он импортирован.
+
+        Модули вроде `parallel` берут функцию по имени (`from writer
+        import render_block`), и замена только в исходном модуле их не
+        затронет.
+        """
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, '__dict__', {})
+            if namespace.get(name) is original:
+                self._patch(module, name, wrapper)
+
+    def install(self) -> None:
+        """Обернуть этапы конвейера."""
+        if self._originals:
+            return
+        if self.trace_memory_rate and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._patch_bindings('read_package', homework.read_package,
+                             self._measure('decode', homework.read_package,
+                                           _decode_type))
+        self._patch(homework.Training, 'show_training_info', self._measure(
+            'compute', homework.Training.show_training_info,
+            lambda args, result: type(args[0]).__name__))
+        self._patch(homework.InfoMessage, 'get_message', self._measure(
+            'render', homework.InfoMessage.get_message,
+            lambda args, result: args[0].training_type))
+        self._patch_bindings('render_block', writer.render_block,
+                             self._measure(
+                                 'render', writer.render_block,
+                                 lambda args, result: 'block',
+                                 lambda args: len(args[0])))
+
+    def uninstall(self) -> None:
+        """Вернуть исходные функции и остановить фоновые задачи."""
+        self._stop.set()
+        if self._dumper is not None:
+            self._dumper.join()
+            self._dumper = None
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> 'Instrumentation':
+        self.install()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.uninstall()
+
+
+def _decode_type(args, result) -> str:
+    if result is not None:
+        return type(result).__name__
+    training = homework.TRAININGS.get(args[0]) if args and isinstance(
+        args[0], str) else None
+    return training.__name__ if training else str(args[0] if args else '')
+
+
+_current: Optional[Instrumentation] = None
+
+
+def enable(profile_rate: float = 0.0, trace_memory_rate: float = 0.0,
+           dump_interval: Optional[float] = None,
+           output: Optional[IO[str]] = None,
+           seed: Optional[int] = None) -> Instrumentation:
+    """Включить инструментирование конвейера."""
+    global _current
+    disable()
+    _current = Instrumentation(profile_rate, trace_memory_rate, seed)
+    _current.install()
+    if dump_interval:
+        _current.dump_every(dump_interval, output)
+    return _current
+
+
+def disable() -> Optional[Instrumentation]:
+    """Выключить инструментирование и вернуть собранную статистику."""
+    global _current
+    instrumentation, _current = _current, None
+    if instrumentation is not None:
+        instrumentation.uninstall()
+    return instrumentation
+
+
+def current() -> Optional[Instrumentation]:
+    return _current
+
+
+def stats() -> Dict:
+    """Статистика текущего инструментирования или пустой словарь."""
+    return _current.stats() if _current is not None else {}
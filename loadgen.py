@@ -0,0 +1,203 @@
+"""Детерминированный генератор синтетических пакетов датчиков.
+
+Пакеты правдоподобны: длительность распределена логнормально вокруг
+45 минут, число шагов или гребков — темп типа тренировки, умноженный
+на длительность, вес и рост — нормально вокруг 75 кг и 172 см, число
+бассейнов следует из скорости плавания 1,5–3,5 км/ч. Доля типов
+задаётся `mix`, доля испорченных пакетов — `malformed` (неизвестный
+код, не хватает поля, отрицательный вес, нулевая длительность); все
+они читаются форматами `streaming`, но отвергаются `check_package`.
+
+Одинаковый `seed` даёт одинаковый поток. `packages()` отдаёт каждый
+пакет заново сгенерированным — для стресс-тестов `read_package`.
+`write()` для скорости один раз рендерит пул из `pool_size` пакетов, а
+потом пишет отрезки пула со случайных мест: файлы в гигабайты пишутся
+со скоростью диска, а распределения значений сохраняются.
+
+    python loadgen.py --count 1e7 --mix RUN=6 WLK=3 SWM=1 packages.csv
+"""
+import argparse
+import math
+import random
+import sys
+from itertools import accumulate
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from homework import PACKAGE_FIELDS, TRAININGS
+from streaming import format_for_path
+
+Package = Tuple[str, list]
+
+DEFAULT_MIX = {'RUN': 0.5, 'WLK': 0.3, 'SWM': 0.2}
+# Темп в действиях за минуту: шаги, гребки, обороты педалей.
+ACTION_RATES = {
+    'RUN': (150, 185),
+    'WLK': (95, 125),
+    'SWM': (25, 40),
+    'CYC': (70, 95),
+    'ROW': (22, 32),
+    'SKI': (60, 90),
+}
+DEFAULT_ACTION_RATE = (60, 120)
+MALFORMATIONS = ('type', 'length', 'negative', 'zero_duration')
+POOL_SIZE = 1 << 16
+CHUNK_SIZE = 1 << 14
+RUN_LENGTH = 64
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+
+def render_csv(package: Package) -> str:
+    workout_type, data = package
+    return ','.join([workout_type, *map(str, data)]) + '\n'
+
+
+def render_jsonl(package: Package) -> str:
+    workout_type, data = package
+    return (f'{{"workout_type": "{workout_type}", '
+            f'"data": [{", ".join(map(str, data))}]}}\n')
+
+
+RENDERERS = {'csv': render_csv, 'jsonl': render_jsonl}
+
+
+class LoadGenerator:
+    """Воспроизводимый поток пакетов с заданной смесью типов."""
+
+    def __init__(self, seed: int = 0, mix: Optional[Dict[str, float]] = None,
+                 malformed: float = 0.0, pool_size: int = POOL_SIZE):
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        unknown = [code for code in mix if code not in TRAININGS]
+        if unknown:
+            raise ValueError(
+                f"Неизвестные типы тренировок: {', '.join(unknown)}")
+        if not mix or min(mix.values()) < 0 or sum(mix.values()) <= 0:
+            raise ValueError("Доли типов должны быть неотрицательными")
+        if not 0 <= malformed <= 1:
+            raise ValueError("Доля испорченных пакетов должна быть от 0 до 1")
+        self.seed = seed
+        self.mix = mix
+        self.malformed = malformed
+        self.pool_size = pool_size
+        self._types = tuple(mix)
+        self._weights = tuple(accumulate(mix.values()))
+
+    def _values(self, rnd: random.Random, workout_type: str) -> list:
+        duration = _clamp(rnd.lognormvariate(math.log(0.75), 0.5), 0.1, 5.0)
+        low, high = ACTION_RATES.get(workout_type, DEFAULT_ACTION_RATE)
+        length_pool = rnd.choice((25, 50))
+        values = {
+            'action': round(rnd.uniform(low, high) * duration * 60),
+            'duration': round(duration, 3),
+            'weight': round(_clamp(rnd.gauss(75, 12), 40, 150), 1),
+            'height': round(_clamp(rnd.gauss(172, 9), 140, 210), 1),
+            'length_pool': length_pool,
+            'count_pool': round(
+                rnd.uniform(1.5, 3.5) * duration * 1000 / length_pool),
+            'climb': round(rnd.uniform(0, 800)),
+        }
+        return [
+            values[field] if field in values else round(rnd.uniform(1, 100))
+            for field in PACKAGE_FIELDS[workout_type]
+        ]
+
+    @staticmethod
+    def _malform(rnd: random.Random, workout_type: str,
+                 data: list) -> Package:
+        kind = rnd.choice(MALFORMATIONS)
+        if kind == 'type':
+            return workout_type.lower(), data
+        if kind == 'length':
+            return workout_type, data[:-1]
+        fields = PACKAGE_FIELDS[workout_type]
+        if kind == 'negative':
+            data[fields.index('weight')] *= -1
+        else:
+            data[fields.index('duration')] = 0
+        return workout_type, data
+
+    def package(self, rnd: random.Random) -> Package:
+        """Следующий пакет из генератора случайных чисел `rnd`."""
+        workout_type = rnd.choices(self._types, cum_weights=self._weights)[0]
+        data = self._values(rnd, workout_type)
+        if self.malformed and rnd.random() < self.malformed:
+            return self._malform(rnd, workout_type, data)
+        return workout_type, data
+
+    def packages(self, count: int) -> Iterator[Package]:
+        """`count` пакетов, каждый сгенерирован заново."""
+        rnd = random.Random(self.seed)
+        for _ in range(count):
+            yield self.package(rnd)
+
+    def lines(self, count: int, fmt: str = 'csv') -> Iterator[str]:
+        """Строки `count` пакетов в формате `fmt`."""
+        return map(RENDERERS[fmt], self.packages(count))
+
+    def write(self, output: IO[bytes], count: int, fmt: str = 'csv',
+              unique: bool = False) -> int:
+        """Записать `count` пакетов в двоичный поток, вернуть число байт.
+
+        Без `unique` пишутся отрезки по `RUN_LENGTH` строк подряд из пула
+        со случайного места: срезы `memoryview` без копирования.
+        """
+        written = 0
+        if unique or count <= self.pool_size:
+            lines = self.lines(count, fmt)
+            for start in range(0, count, CHUNK_SIZE):
+                size = min(CHUNK_SIZE, count - start)
+                written += output.write(''.join(
+                    next(lines) for _ in range(size)).encode('utf-8'))
+            return written
+        pool = [line.encode('utf-8')
+                for line in self.lines(self.pool_size, fmt)]
+        pool += pool[:RUN_LENGTH]
+        offsets = list(accumulate(map(len, pool), initial=0))
+        blob = memoryview(b''.join(pool))
+        rnd = random.Random(f'{self.seed}:pool')
+        for start in range(0, count, RUN_LENGTH):
+            size = min(RUN_LENGTH, count - start)
+            line = rnd.randrange(self.pool_size)
+            written += output.write(blob[offsets[line]:offsets[line + size]])
+        return written
+
+
+def parse_mix(items: List[str]) -> Dict[str, float]:
+    """Разобрать доли вида `RUN=0.5`."""
+    mix = {}
+    for item in items:
+        workout_type, _, share = item.partition('=')
+        mix[workout_type] = float(share or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Генератор синтетических пакетов датчиков.')
+    parser.add_argument('output', nargs='?', default='-',
+                        help='файл для записи, по умолчанию stdout')
+    parser.add_argument('--count', type=float, default=1000)
+    parser.add_argument('--format', choices=sorted(RENDERERS), default=None,
+                        help='по умолчанию — по расширению, иначе csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mix', nargs='+', default=None,
+                        help='доли типов, например RUN=6 WLK=3 SWM=1')
+    parser.add_argument('--malformed', type=float, default=0.0)
+    parser.add_argument('--unique', action='store_true',
+                        help='генерировать каждую строку заново')
+    args = parser.parse_args(argv)
+    fmt = args.format or format_for_path(args.output) or 'csv'
+    generator = LoadGenerator(
+        args.seed, parse_mix(args.mix) if args.mix else None, args.malformed)
+    if args.output == '-':
+        generator.write(sys.stdout.buffer, int(args.count), fmt, args.unique)
+        return 0
+    with open(args.output, 'wb') as output:
+        generator.write(output, int(args.count), fmt, args.unique)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""Отбраковка аномальных тренировок прямо в конвейере расчёта.
+
+Сломанные датчики присылают пакеты, из которых получаются абсурдные
+сообщения: скорость плавания из неверных `length_pool`/`count_pool`,
+дистанция из огромного `action`. `OutlierFilter` стоит сразу за
+`show_training_info` и проверяет каждое сообщение, пока оно идёт по
+потоку, без отдельного прохода по результатам.
+
+Правила задаются для каждого типа тренировки отдельно:
+
+- пределы — физически возможные диапазоны показателей
+  (`DEFAULT_LIMITS`, например скорость плавания не выше 10 км/ч).
+  Значения вне пределов, NaN и бесконечности отбраковываются сразу и
+  в статистику не попадают;
+- устойчивая статистика — по каждому показателю из `metrics` ведётся
+  `sketches.QuantileSketch` с ограниченным числом корзин, то есть
+  память на тип постоянна. По квартилям считаются границы Тьюки
+  `Q1 - k * IQR`, `Q3 + k * IQR`; при `scale='log'` — в логарифмах,
+  `Q1 / R ** k` и `Q3 * R ** k`, где `R = Q3 / Q1`: показатели
+  положительны и скошены вправо. Квартилям хватает выборки, поэтому
+  в скетчи идёт каждое `sample`-е правдоподобное сообщение типа.
+  Границы пересчитываются раз в `refresh` значений скетча, так что
+  проверка значения — два сравнения. Правило включается, когда в
+  скетчах типа накопится `warmup` значений.
+
+Режим `drop` убирает аномальные сообщения из потока, `flag` пропускает
+все и передаёт аномальные в `on_flag` вместе с причинами. Счётчики —
+в `FilterStats`: сколько сообщений проверено, пропущено и отбраковано,
+и сколько раз сработала каждая причина для каждого типа.
+"""
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import (Callable, Dict, Iterable, Iterator, List, Mapping,
+                    Optional, Tuple)
+
+from homework import TRAININGS, InfoMessage
+from sketches import QuantileSketch
+
+MODES = ('drop', 'flag')
+SCALES = ('log', 'linear')
+ALL_TYPES = '*'
+CHECKED_FIELDS = ('duration', 'distance', 'speed', 'calories')
+checked_values = attrgetter(*CHECKED_FIELDS)
+DEFAULT_METRICS = ('distance', 'speed', 'calories')
+DEFAULT_LIMITS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    ALL_TYPES: {
+        'duration': (0, 24),
+        'distance': (0, 1000),
+        'speed': (0, 120),
+        'calories': (0, 30000),
+    },
+    'RUN': {'speed': (0, 45)},
+    'WLK': {'speed': (0, 20)},
+    'SWM': {'speed': (0, 10), 'distance': (0, 50)},
+    'ROW': {'speed': (0, 30)},
+    'SKI': {'speed': (0, 100)},
+}
+
+Limits = Mapping[str, Mapping[str, Tuple[float, float]]]
+Reasons = Tuple[str, ...]
+
+
+@dataclass
+class FilterStats:
+    """Счётчики фильтра.
+
+    `reasons` считает срабатывания по парам `(тип, причина)`; у одного
+    сообщения может быть несколько причин.
+    """
+
+    seen: int = 0
+    passed: int = 0
+    rejected: int = 0
+    reasons: Counter = field(default_factory=Counter)
+
+    def merge(self, other: 'FilterStats') -> None:
+        self.seen += other.seen
+        self.passed += other.passed
+        self.rejected += other.rejected
+        self.reasons.update(other.reasons)
+
+    def by_reason(self) -> Counter:
+        """Срабатывания по причинам для всех типов вместе."""
+        totals: Counter = Counter()
+        for (_, reason), count in self.reasons.items():
+            totals[reason] += count
+        return totals
+
+    def format(self) -> str:
+        """Текстовый отчёт о работе фильтра."""
+        lines = [f'Фильтр аномалий: проверено {self.seen}, пропущено '
+                 f'{self.passed}, отбраковано {self.rejected}']
+        for (training_type, reason), count in sorted(self.reasons.items()):
+            lines.append(f'  {training_type} {reason}: {count}')
+        return '\n'.join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            'seen': self.seen,
+            'passed': self.passed,
+            'rejected': self.rejected,
+            'reasons': {
+                f'{training_type}.{reason}': count
+                for (training_type, reason), count in sorted(
+                    self.reasons.items())
+            },
+        }
+
+
+class _TypeState:
+    """Пределы, скетчи и текущие границы одного типа тренировки.
+
+    Пределы и границы хранятся как `(номер поля, нижняя, верхняя,
+    причины)`, чтобы проверка не собирала строки и не искала поля.
+    """
+
+    __slots__ = ('limits', 'sketches', 'fences', 'count', 'samples')
+
+    def __init__(self, limits: Mapping[str, Tuple[float, float]],
+                 sketches: List[QuantileSketch]):
+        self.limits = tuple(
+            (CHECKED_FIELDS.index(metric), low, high,
+             f'limit:{metric}', f'non_finite:{metric}')
+            for metric, (low, high) in limits.items())
+        self.sketches = sketches
+        self.fences: Optional[Tuple[Tuple[int, float, float, str],
+                                    ...]] = None
+        self.count = 0
+        self.samples = 0
+
+
+class OutlierFilter:
+    """Потоковый фильтр аномальных сообщений о тренировках.
+
+    `limits` дополняет и переопределяет `DEFAULT_LIMITS` по кодам
+    тренировок (`'*'` — для всех типов); `fence` — множитель `k`.
+    """
+
+    def __init__(self, limits: Optional[Limits] = None,
+                 metrics: Iterable[str] = DEFAULT_METRICS,
+                 fence: float = 3.0, warmup: int = 100,
+                 refresh: int = 256, sample: int = 4,
+                 scale: str = 'log',
+                 mode: str = 'drop',
+                 on_flag: Optional[Callable[[InfoMessage, Reasons],
+                                            None]] = None,
+                 relative_accuracy: float = 0.02, max_bins: int = 128):
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим фильтра: {mode}")
+        if scale not in SCALES:
+            raise ValueError(f"Неизвестная шкала границ: {scale}")
+        if fence <= 0 or min(warmup, refresh, sample) < 1:
+            raise ValueError(
+                "fence, warmup, refresh и sample должны быть положительными")
+        self.metrics = tuple(metrics)
+        unknown = [name for name in self.metrics
+                   if name not in CHECKED_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Неизвестные показатели: {', '.join(unknown)}")
+        self._indexes = tuple(map(CHECKED_FIELDS.index, self.metrics))
+        self.limits = self._limits_by_name(limits or {})
+        self.fence = fence
+        self.warmup = warmup
+        self.refresh = refresh
+        self.sample = sample
+        self.scale = scale
+        self.mode = mode
+        self.on_flag = on_flag
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.stats = FilterStats()
+        self._states: Dict[str, _TypeState] = {}
+
+    @staticmethod
+    def _limits_by_name(limits: Limits) -> Dict[str, Dict]:
+        """Пределы по именам классов, как в `InfoMessage.training_type`."""
+        merged: Dict[str, Dict] = {}
+        for source in (DEFAULT_LIMITS, limits):
+            for code, bounds in source.items():
+                if code != ALL_TYPES and code not in TRAININGS:
+                    raise ValueError(f"Неизвестный тип тренировки: {code}")
+                for metric, (low, high) in bounds.items():
+                    if metric not in CHECKED_FIELDS:
+                        raise ValueError(
+                            f"Неизвестный показатель: {metric}")
+                    if not low <= high:
+                        raise ValueError(
+                            f"Пустые пределы {code}.{metric}: {low}..{high}")
+                name = (code if code == ALL_TYPES
+                        else TRAININGS[code].__name__)
+                merged.setdefault(name, {}).update(bounds)
+        return merged
+
+    @classmethod
+    def from_config(cls, config: Mapping, **kwargs) -> 'OutlierFilter':
+        """Фильтр по словарю настроек, например из JSON-файла.
+
+        Именованные аргументы переопределяют значения из `config`.
+        """
+        options = {**config, **kwargs}
+        options['limits'] = {
+            code: {metric: tuple(bounds)
+                   for metric, bounds in limits.items()}
+            for code, limits in (options.get('limits') or {}).items()
+        }
+        return cls(**options)
+
+    def _state(self, training_type: str) -> _TypeState:
+        state = self._states.get(training_type)
+        if state is None:
+            limits = {**self.limits[ALL_TYPES],
+                      **self.limits.get(training_type, {})}
+            state = self._states[training_type] = _TypeState(
+                limits,
+                [QuantileSketch(self.relative_accuracy, self.max_bins)
+                 for _ in self.metrics])
+        return state
+
+    def _update_fences(self, state: _TypeState) -> None:
+        state.fences = tuple(
+            (CHECKED_FIELDS.index(metric), *self._fences(sketch),
+             f'outlier:{metric}')
+            for metric, sketch in zip(self.metrics, state.sketches))
+
+    def _fences(self, sketch: QuantileSketch) -> Tuple[float, float]:
+        low = sketch.quantile(0.25)
+        high = sketch.quantile(0.75)
+        if self.scale == 'log' and low > 0:
+            ratio = max(high / low, 1 + 2 * self.relative_accuracy)
+            return low / ratio ** self.fence, high * ratio ** self.fence
+        spread = max(high - low,
+                     (abs(low) + abs(high)) * self.relative_accuracy)
+        return low - self.fence * spread, high + self.fence * spread
+
+    def check(self, info: InfoMessage) -> Reasons:
+        """Причины считать сообщение аномальным; пусто — всё в порядке.
+
+        Обновляет статистику типа и счётчики.
+        """
+        state = self._states.get(info.training_type)
+        if state is None:
+            state = self._state(info.training_type)
+        values = checked_values(info)
+        reasons = []
+        for index, low, high, limit, non_finite in state.limits:
+            value = values[index]
+            if not low <= value <= high:
+                reasons.append(
+                    limit if math.isfinite(value) else non_finite)
+        if not reasons:
+            fences = state.fences
+            if fences is not None:
+                for index, low, high, outlier in fences:
+                    if not low <= values[index] <= high:
+                        reasons.append(outlier)
+            state.count += 1
+            if state.count % self.sample == 0:
+                self._add_sample(state, values)
+        self._count(info.training_type, reasons)
+        return tuple(reasons)
+
+    def _count(self, training_type: str, reasons: List[str]) -> None:
+        stats = self.stats
+        stats.seen += 1
+        if reasons:
+            stats.rejected += 1
+            for reason in reasons:
+                stats.reasons[training_type, reason] += 1
+        else:
+            stats.passed += 1
+
+    def _add_sample(self, state: _TypeState, values: Tuple) -> None:
+        for index, sketch in zip(self._indexes, state.sketches):
+            sketch.add(values[index])
+        state.samples += 1
+        samples = state.samples
+        if samples >= self.warmup and (
+                state.fences is None or samples % self.refresh == 0):
+            self._update_fences(state)
+
+    def filter(self, messages: Iterable[InfoMessage],
+               ) -> Iterator[InfoMessage]:
+        """Пропускать сообщения через фильтр согласно режиму."""
+        check = self.check
+        drop = self.mode == 'drop'
+        on_flag = self.on_flag
+        for info in messages:
+            reasons = check(info)
+            if reasons:
+                if on_flag is not None:
+                    on_flag(info, reasons)
+                if drop:
+                    continue
+            yield info
+
+    __call__ = filter
+
+    def fences(self, training_type: str) -> Optional[Dict[str, Tuple]]:
+        """Текущие границы показателей типа или None до разогрева."""
+        state = self._states.get(training_type)
+        if state is None or state.fences is None:
+            return None
+        return {
+            metric: (low, high)
+            for metric, (_, low, high, _) in zip(self.metrics, state.fences)
+        }
+
+    def merge(self, other: 'OutlierFilter') -> None:
+        """Добавить статистику и счётчики фильтра с теми же настройками."""
+        if other.metrics != self.metrics:
+            raise ValueError("Сливать можно фильтры с одними показателями")
+        for training_type, theirs in other._states.items():
+            state = self._state(training_type)
+            for own, sketch in zip(state.sketches, theirs.sketches):
+                own.merge(sketch)
+            state.count += theirs.count
+            state.samples += theirs.samples
+            if state.samples >= self.warmup:
+                self._update_fences(state)
+        self.stats.merge(other.stats)
+
+
+def load_config(path: str) -> Dict:
+    """Прочитать настройки фильтра из JSON-файла."""
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
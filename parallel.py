@@ -0,0 +1,99 @@
+"""Многопроцессорная обработка больших файлов с пакетами.
+
+Входные строки режутся на куски по `chunk_size` строк, каждый кусок
+целиком проходит `read_package` -> `show_training_info` -> `get_message`
+в отдельном процессе и возвращается одним блоком текста. В работе
+одновременно находится не больше `workers * prefetch` кусков, так что
+память остаётся ограниченной при любом размере входа. Тот же конвейер
+на пуле потоков — в модуле `threaded`.
+"""
+import itertools
+import os
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Executor, ProcessPoolExecutor,
+                                wait)
+from typing import IO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import streaming
+from homework import PackageError
+from writer import render_block
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_PREFETCH = 2
+
+
+def iter_chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Нарезать поток строк на списки длиной не больше `size`."""
+    if size < 1:
+        raise ValueError("Размер куска должен быть положительным")
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_chunk(lines: List[str], fmt: Optional[str]) -> Tuple[str, int]:
+    """Обработать кусок строк в рабочем процессе."""
+    try:
+        messages = list(
+            streaming.iter_messages(streaming.iter_packages(lines, fmt)))
+    except PackageError as error:
+        # Номер пакета внутри куска не указывает на место в файле.
+        error.index = None
+        raise
+    return render_block(messages), len(messages)
+
+
+def iter_results(lines: Iterable[str],
+                 fmt: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 ordered: bool = True,
+                 prefetch: int = DEFAULT_PREFETCH,
+                 executor: Callable[..., Executor] = ProcessPoolExecutor,
+                 ) -> Iterator[Tuple[str, int]]:
+    """Выдавать обработанные блоки отчёта по мере готовности.
+
+    При `ordered=False` блоки выдаются в порядке завершения, а не в
+    порядке входных данных. `executor` — класс пула, по умолчанию
+    пул процессов.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_chunks(lines, chunk_size)
+    window = workers * prefetch
+    with executor(max_workers=workers) as pool:
+        pending = deque(
+            pool.submit(process_chunk, chunk, fmt)
+            for chunk in itertools.islice(chunks, window))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(pool.submit(process_chunk, chunk, fmt))
+
+
+def process_parallel(stream: Iterable[str], output: IO[str],
+                     fmt: Optional[str] = None,
+                     workers: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     ordered: bool = True,
+                     executor: Callable[..., Executor] = ProcessPoolExecutor,
+                     ) -> int:
+    """Обработать поток пакетов в пуле процессов, вернуть число строк."""
+    count = 0
+    results = iter_results(stream, fmt, workers, chunk_size, ordered,
+                           executor=executor)
+    for block, lines in results:
+        output.write(block)
+        count += lines
+    return count
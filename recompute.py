@@ -0,0 +1,400 @@
+"""Пересчёт архива пакетов по шардам с контрольными точками.
+
+Когда меняются коэффициенты формул (например,
+`Running.CALORIES_MEAN_SPEED_SHIFT`), историю нужно пересчитать
+заново. `Coordinator` делит исходный архив пакетов на шарды и раздаёт
+их узлам; здесь узлы — локальные процессы `ProcessPoolExecutor`.
+
+Исходный архив — JSON Lines, по записи на строку:
+
+    {"athlete": "anna", "timestamp": 1709251200,
+     "workout_type": "RUN", "data": [15000, 1, 75]}
+
+Разбиение:
+
+- `by='range'` — по диапазонам байтов файла, выровненным по строкам:
+  исходник не копируется, узел читает только свой диапазон;
+- `by='athlete'` — по хешу спортсмена: координатор один раз
+  раскладывает строки по файлам шардов, и вся история спортсмена
+  оказывается в одном шарде.
+
+Узел прогоняет шард через `read_package` -> `show_training_info`
+(ошибочные записи только считаются), пишет результат в колоночный
+архив (`archive.ArchiveWriter`), а затем атомарно — контрольную
+точку с числом записей и ошибок и отпечатком констант. При повторном
+запуске шарды с действующей контрольной точкой пропускаются; упавшие
+шарды (исключение или гибель процесса) повторяются до `retries` раз,
+готовые при этом не пересчитываются. Манифест помнит размер и время
+изменения исходника: если архив изменился, он разбивается заново, а
+контрольные точки сбрасываются.
+Изменённые константы передаются узлам явно (`overrides`), проверяются
+до раздачи и входят в отпечаток, поэтому контрольные точки со старыми
+коэффициентами считаются устаревшими.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from numbers import Real
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import archive
+import cache
+from homework import TRAININGS, read_package
+
+MANIFEST = 'manifest.json'
+PARTITIONS = ('range', 'athlete')
+
+Overrides = Dict[str, Dict[str, float]]
+Record = Tuple[str, float, str, list]
+
+
+@dataclass
+class Shard:
+    """Задание узлу: где читать записи и куда писать результат."""
+
+    index: int
+    source: str
+    start: int
+    end: Optional[int]
+    output: str
+    checkpoint: str
+    overrides: Overrides = field(default_factory=dict)
+    fingerprint: str = ''
+    attempt: int = 0
+
+
+@dataclass
+class RecomputeReport:
+    """Итог запуска координатора."""
+
+    shards: int = 0
+    completed: int = 0
+    skipped: int = 0
+    retried: int = 0
+    failed: List[int] = field(default_factory=list)
+    records: int = 0
+    errors: int = 0
+
+
+def parse_record(line: str) -> Record:
+    """Разобрать строку исходного архива.
+
+    Спортсмен должен быть строкой, а время — конечным числом, иначе
+    запись не сможет попасть в архив результатов.
+    """
+    record = json.loads(line)
+    if isinstance(record, dict):
+        record = (record['athlete'], record['timestamp'],
+                  record['workout_type'], record['data'])
+    athlete, timestamp, workout_type, data = record
+    if not isinstance(athlete, str):
+        raise ValueError(f"Спортсмен должен быть строкой: {athlete!r}")
+    if (type(timestamp) not in (int, float)
+            or not math.isfinite(timestamp)):
+        raise ValueError(f"Время должно быть числом: {timestamp!r}")
+    return athlete, timestamp, workout_type, data
+
+
+def check_overrides(overrides: Overrides) -> None:
+    """Проверить типы тренировок, имена числовых констант и значения."""
+    for workout_type, constants in overrides.items():
+        if workout_type not in TRAININGS:
+            raise ValueError(f"Неизвестный тип тренировки: {workout_type}")
+        training = TRAININGS[workout_type]
+        names = cache.numeric_constant_names(training)
+        for name, value in constants.items():
+            if name not in names:
+                raise ValueError(
+                    f"У {training.__name__} нет константы {name}")
+            if not isinstance(value, Real) or isinstance(value, bool):
+                raise ValueError(
+                    f"Значение {name} должно быть числом: {value!r}")
+
+
+def apply_overrides(overrides: Overrides) -> None:
+    """Установить константы классов тренировок."""
+    check_overrides(overrides)
+    for workout_type, constants in overrides.items():
+        training = TRAININGS[workout_type]
+        for name, value in constants.items():
+            setattr(training, name, value)
+
+
+def constants_fingerprint(overrides: Overrides) -> str:
+    """Отпечаток констант с учётом `overrides`."""
+    values = cache.constants()
+    for workout_type, constants in overrides.items():
+        names = cache.constant_names(TRAININGS[workout_type])
+        current = dict(zip(names, values[workout_type]))
+        current.update(constants)
+        values[workout_type] = tuple(current[name] for name in names)
+    return cache.fingerprint(values).hex()
+
+
+def iter_range(source: str, start: int,
+               end: Optional[int]) -> Iterator[str]:
+    """Строки файла, начинающиеся в диапазоне байтов `[start, end)`."""
+    with open(source, 'rb') as stream:
+        stream.seek(start)
+        position = start
+        for line in stream:
+            if end is not None and position >= end:
+                return
+            position += len(line)
+            if line.strip():
+                yield line.decode('utf-8')
+
+
+def range_bounds(source: str, shards: int) -> List[Tuple[int, int]]:
+    """Разбить файл на `shards` диапазонов по границам строк."""
+    size = os.path.getsize(source)
+    bounds = [0]
+    with open(source, 'rb') as stream:
+        for index in range(1, shards):
+            stream.seek(max(size * index // shards, bounds[-1]))
+            if stream.tell():
+                stream.seek(stream.tell() - 1)
+                stream.readline()
+            bounds.append(min(stream.tell(), size))
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def athlete_shard(athlete: str, shards: int) -> int:
+    """Номер шарда спортсмена, одинаковый в любом процессе."""
+    return zlib.crc32(athlete.encode('utf-8')) % shards
+
+
+def split_by_athlete(source: str, workdir: str, shards: int) -> List[str]:
+    """Разложить строки исходника по файлам шардов."""
+    paths = [os.path.join(workdir, f'shard-{index:04d}.jsonl')
+             for index in range(shards)]
+    outputs = [open(f'{path}.tmp', 'w', encoding='utf-8')
+               for path in paths]
+    try:
+        with open(source, encoding='utf-8') as stream:
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    index = athlete_shard(parse_record(line)[0], shards)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # Ошибочную запись посчитает узел первого шарда.
+                    index = 0
+                outputs[index].write(line)
+    finally:
+        for output in outputs:
+            output.close()
+    for path in paths:
+        os.replace(f'{path}.tmp', path)
+    return paths
+
+
+def source_stamp(source: str) -> Dict[str, int]:
+    """Размер и время изменения исходника для манифеста."""
+    stat = os.stat(source)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def read_checkpoint(shard: Shard) -> Optional[Dict]:
+    """Контрольная точка шарда или None, если её нет или она устарела."""
+    try:
+        with open(shard.checkpoint, encoding='utf-8') as stream:
+            state = json.load(stream)
+    except (OSError, ValueError):
+        return None
+    if (state.get('fingerprint') != shard.fingerprint
+            or not os.path.exists(shard.output)):
+        return None
+    return state
+
+
+def run_shard(shard: Shard) -> Dict:
+    """Пересчитать шард на узле и записать контрольную точку."""
+    apply_overrides(shard.overrides)
+    records = errors = 0
+    with archive.ArchiveWriter(shard.output) as writer:
+        for line in iter_range(shard.source, shard.start, shard.end):
+            try:
+                athlete, timestamp, workout_type, data = parse_record(line)
+                info = read_package(workout_type, data).show_training_info()
+            except (ValueError, KeyError, TypeError):
+                errors += 1
+                continue
+            writer.add(athlete, timestamp, info)
+            records += 1
+    state = {'index': shard.index, 'records': records, 'errors': errors,
+             'fingerprint': shard.fingerprint, 'attempt': shard.attempt}
+    temporary = f'{shard.checkpoint}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as output:
+        json.dump(state, output)
+    os.replace(temporary, shard.checkpoint)
+    return state
+
+
+class Coordinator:
+    """Разбиение архива на шарды, раздача узлам и повторы."""
+
+    def __init__(self, source: str, workdir: str, shards: int = 8,
+                 by: str = 'range', workers: Optional[int] = None,
+                 retries: int = 2, overrides: Optional[Overrides] = None,
+                 runner: Callable[[Shard], Dict] = run_shard):
+        if by not in PARTITIONS:
+            raise ValueError(f"Неизвестное разбиение: {by}")
+        if shards < 1:
+            raise ValueError("Число шардов должно быть положительным")
+        overrides = overrides or {}
+        check_overrides(overrides)
+        self.source = os.path.abspath(source)
+        self.workdir = workdir
+        self.shards = shards
+        self.by = by
+        self.workers = workers
+        self.retries = retries
+        self.overrides = overrides
+        self.runner = runner
+        self.fingerprint = constants_fingerprint(overrides)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.workdir, name)
+
+    def plan(self) -> List[Shard]:
+        """Шарды по манифесту рабочего каталога.
+
+        Если манифеста нет, он от другого разбиения или исходник с тех
+        пор изменился (размер или время изменения), исходник
+        разбивается заново, а прежние контрольные точки удаляются.
+        """
+        os.makedirs(self.workdir, exist_ok=True)
+        manifest = self._path(MANIFEST)
+        expected = dict(source_stamp(self.source), source=self.source,
+                        by=self.by, shards=self.shards)
+        try:
+            with open(manifest, encoding='utf-8') as stream:
+                state = json.load(stream)
+        except (OSError, ValueError):
+            state = None
+        if state is None or {key: state.get(key) for key in expected} != (
+                expected):
+            self._drop_checkpoints(state)
+            if self.by == 'range':
+                sources = [[self.source, start, end] for start, end in
+                           range_bounds(self.source, self.shards)]
+            else:
+                sources = [[path, 0, None] for path in split_by_athlete(
+                    self.source, self.workdir, self.shards)]
+            state = dict(expected, sources=sources)
+            temporary = f'{manifest}.tmp'
+            with open(temporary, 'w', encoding='utf-8') as output:
+                json.dump(state, output)
+            os.replace(temporary, manifest)
+        return [
+            Shard(index, source, start, end,
+                  self._path(f'shard-{index:04d}.arc'),
+                  self._path(f'shard-{index:04d}.done'),
+                  self.overrides, self.fingerprint)
+            for index, (source, start, end) in enumerate(state['sources'])
+        ]
+
+    def _drop_checkpoints(self, state: Optional[Dict]) -> None:
+        """Удалить контрольные точки шардов прежнего манифеста."""
+        count = len(state.get('sources', ())) if state else 0
+        for index in range(max(count, self.shards)):
+            try:
+                os.remove(self._path(f'shard-{index:04d}.done'))
+            except FileNotFoundError:
+                pass
+
+    def _dispatch(self, pending: List[Shard],
+                  report: RecomputeReport) -> List[Shard]:
+        """Раздать шарды узлам, вернуть упавшие."""
+        failed = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [(shard, executor.submit(self.runner, shard))
+                       for shard in pending]
+            for shard, future in futures:
+                try:
+                    state = future.result()
+                except Exception:
+                    # При гибели процесса пул отменяет и шарды, успевшие
+                    # записать контрольную точку.
+                    state = read_checkpoint(shard)
+                    if state is None:
+                        failed.append(shard)
+                        continue
+                report.completed += 1
+                report.records += state['records']
+                report.errors += state['errors']
+        return failed
+
+    def run(self) -> RecomputeReport:
+        """Пересчитать все шарды без действующей контрольной точки."""
+        shards = self.plan()
+        report = RecomputeReport(shards=len(shards))
+        pending = []
+        for shard in shards:
+            state = read_checkpoint(shard)
+            if state is None:
+                pending.append(shard)
+            else:
+                report.skipped += 1
+                report.records += state['records']
+                report.errors += state['errors']
+        attempt = 0
+        while pending:
+            if attempt:
+                report.retried += len(pending)
+            for shard in pending:
+                shard.attempt = attempt
+            failed = self._dispatch(pending, report)
+            attempt += 1
+            if attempt > self.retries:
+                report.failed = [shard.index for shard in failed]
+                break
+            pending = failed
+        return report
+
+    def outputs(self) -> List[str]:
+        """Архивы результатов готовых шардов."""
+        return [shard.output for shard in self.plan()
+                if read_checkpoint(shard) is not None]
+
+
+def parse_overrides(items: List[str]) -> Overrides:
+    """Разобрать константы вида `RUN.CALORIES_MEAN_SPEED_SHIFT=1.8`."""
+    overrides: Overrides = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        workout_type, _, constant = name.partition('.')
+        overrides.setdefault(workout_type, {})[constant] = float(value)
+    return overrides
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Пересчёт архива пакетов по шардам.')
+    parser.add_argument('source', help='архив пакетов в JSON Lines')
+    parser.add_argument('workdir', help='каталог шардов и контрольных точек')
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--by', choices=PARTITIONS, default='range')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--set', nargs='+', default=[], dest='overrides',
+                        help='константы, например RUN.CALORIES_MEAN_SPEED_'
+                             'SHIFT=1.8')
+    args = parser.parse_args(argv)
+    coordinator = Coordinator(
+        args.source, args.workdir, args.shards, args.by, args.workers,
+        args.retries, parse_overrides(args.overrides))
+    report = coordinator.run()
+    print(json.dumps(asdict(report), ensure_ascii=False))
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
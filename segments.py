@@ -0,0 +1,183 @@
+"""Тренировки по временным рядам отсчётов датчика.
+
+Вместо одного `action` и одной `duration` тренировка задаётся рядом
+отсчётов: моменты времени в секундах и накопленные показания счётчика
+шагов или гребков (для плавания ещё и счётчик бассейнов). Каждый
+промежуток между соседними отсчётами считается отдельной тренировкой
+теми же формулами через `batch.compute_batch`, а итог складывается.
+Объекты на каждый отсчёт не создаются; при наличии NumPy весь ряд
+считается векторно. Ряды лучше передавать массивами NumPy: список
+Python сначала копируется в массив, и на длинном ряду это дольше
+самого расчёта.
+
+Для ровного темпа итог совпадает с расчётом по одному пакету с
+точностью до округления.
+"""
+from array import array
+from typing import Mapping, Optional, Sequence
+
+import batch
+from homework import PACKAGE_FIELDS, TRAININGS, InfoMessage
+
+SECONDS_IN_HOUR = 3600
+
+
+def _diff(values):
+    if batch.np is not None:
+        return batch.np.diff(batch.np.asarray(values, dtype=float))
+    return array('d', (b - a for a, b in zip(values, values[1:])))
+
+
+def _column(values):
+    if batch.np is not None:
+        return batch.np.asarray(values, dtype=float)
+    return array('d', values)
+
+
+def _full(value: float, size: int):
+    if batch.np is not None:
+        return batch.np.full(size, value, dtype=float)
+    return array('d', [value]) * size
+
+
+def _sum(values) -> float:
+    if batch.np is not None:
+        return float(batch.np.sum(values))
+    return float(sum(values))
+
+
+def _min(values) -> float:
+    if batch.np is not None:
+        return float(values.min())
+    return min(values)
+
+
+class SegmentedWorkout:
+    """Тренировка, заданная рядом отсчётов `(время, счётчик)`.
+
+    Поля пакета сверх `action`, `duration` и `weight` берутся из
+    `PACKAGE_FIELDS` типа: постоянные `height` и `length_pool` — из
+    одноимённых аргументов, счётчики — из `counters` по имени поля
+    (`laps` — счётчик бассейнов, `count_pool`), например
+    `counters={'climb': [...]}` для лыж.
+    """
+
+    def __init__(self,
+                 workout_type: str,
+                 timestamps: Sequence[float],
+                 counts: Sequence[float],
+                 weight: float,
+                 height: Optional[float] = None,
+                 length_pool: Optional[float] = None,
+                 laps: Optional[Sequence[float]] = None,
+                 cumulative: bool = True,
+                 counters: Optional[Mapping[str, Sequence[float]]] = None,
+                 ):
+        fields = PACKAGE_FIELDS.get(workout_type)
+        if fields is None or workout_type not in TRAININGS:
+            raise ValueError("Не верно указан тип тренировки")
+        if len(timestamps) != len(counts) or len(timestamps) < 2:
+            raise ValueError(
+                "Нужно не меньше двух отсчётов времени и счётчика")
+        self.workout_type = workout_type
+        self.weight = weight
+        self.length_pool = length_pool
+        self.cumulative = cumulative
+        durations = _diff(timestamps)
+        if _min(durations) <= 0:
+            raise ValueError("Время отсчётов должно строго возрастать")
+        size = len(durations)
+        self.columns = {
+            'action': self._counter('action', counts),
+            'duration': durations / SECONDS_IN_HOUR if batch.np is not None
+            else array('d', (d / SECONDS_IN_HOUR for d in durations)),
+            'weight': _full(weight, size),
+        }
+        constants = {'height': height, 'length_pool': length_pool}
+        self._constants = {'weight': weight}
+        counters = {'count_pool': laps, **(counters or {})}
+        counters = {name: values for name, values in counters.items()
+                    if values is not None}
+        unknown = [name for name in counters
+                   if name not in fields or name in self.columns]
+        if unknown:
+            raise ValueError(
+                f"У {workout_type} нет счётчиков {', '.join(unknown)}")
+        for field in fields:
+            if field in self.columns:
+                continue
+            if field in counters:
+                values = counters[field]
+                if len(values) != len(timestamps):
+                    raise ValueError(
+                        f"Счётчик {field} должен идти по тем же отсчётам")
+                self.columns[field] = self._counter(field, values)
+            elif constants.get(field) is not None:
+                self.columns[field] = _full(constants[field], size)
+                self._constants[field] = constants[field]
+            else:
+                raise ValueError(f"Для {workout_type} нужно поле {field}")
+        self.duration = (timestamps[-1] - timestamps[0]) / SECONDS_IN_HOUR
+        self._segments = None
+
+    def _counter(self, field: str, values: Sequence[float]):
+        """Приращения счётчика по промежуткам.
+
+        Убывание накопленного счётчика — это сброс датчика, а не
+        отрицательная дистанция, поэтому такие ряды отклоняются.
+        """
+        column = _diff(values) if self.cumulative else _column(values[1:])
+        if len(column) and _min(column) < 0:
+            raise ValueError(
+                f"Счётчик {field} не должен убывать (сброс датчика?)")
+        return column
+
+    def segments(self) -> batch.BatchResult:
+        """Дистанция, скорость и калории каждого промежутка."""
+        if self._segments is None:
+            self._segments = batch.compute_batch(
+                self.workout_type, self.columns)
+        return self._segments
+
+    def get_distance(self) -> float:
+        """Получить пройденную дистанцию."""
+        return _sum(self.segments().distance)
+
+    def totals(self) -> dict:
+        """Поля пакета всей тренировки.
+
+        Счётчики суммируются по промежуткам, постоянные поля (`weight`,
+        `height`, `length_pool`) остаются как есть.
+        """
+        totals = {
+            field: self._constants[field] if field in self._constants
+            else _sum(column)
+            for field, column in self.columns.items()
+        }
+        totals['duration'] = self.duration
+        return totals
+
+    def get_mean_speed(self) -> float:
+        """Получить среднюю скорость движения.
+
+        Формула скорости типа считается по полям всей тренировки
+        (`totals`), так что, например, для плавания скорость идёт по
+        проплытым бассейнам, а не по гребкам.
+        """
+        kernel, params = TRAININGS[self.workout_type].kernels()['speed']
+        values = {**self.totals(), 'distance': self.get_distance()}
+        return kernel(*(values[name] for name in params))
+
+    def get_spent_calories(self) -> float:
+        """Получить количество калорий с учётом темпа на промежутках."""
+        return _sum(self.segments().calories)
+
+    def show_training_info(self) -> InfoMessage:
+        """Вернуть информационное сообщение о выполненной тренировке."""
+        return InfoMessage(
+            training_type=TRAININGS[self.workout_type].__name__,
+            duration=self.duration,
+            distance=self.get_distance(),
+            speed=self.get_mean_speed(),
+            calories=self.get_spent_calories(),
+        )
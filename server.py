@@ -0,0 +1,202 @@
+"""Сервер приёма пакетов от трекеров на asyncio.
+
+Строчный протокол поверх TCP или Unix-сокета: клиент шлёт пакеты по
+одному на строку (JSON Lines или CSV, как в `streaming`), сервер на
+каждую строку отвечает строкой `get_message()` или `ERROR: <причина>`
+в том же порядке. На строку длиннее `max_line` приходит одна ошибка
+`LINE_TOO_LONG`, а её остаток отбрасывается до конца строки.
+
+Данные читаются кусками: все полные строки из куска обрабатываются
+одной микропачкой и уходят клиенту одной записью, после которой сервер
+ждёт `drain()`, поэтому медленный клиент притормаживает только своё
+соединение.
+
+    python server.py --port 8765
+    python server.py --unix /tmp/tracker.sock
+"""
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from streaming import handle_line
+
+READ_SIZE = 64 * 1024
+MAX_LINE = 64 * 1024
+ENCODING = 'utf-8'
+LINE_TOO_LONG = 'ERROR: line too long'
+
+
+@dataclass
+class ServerStats:
+    """Счётчики сервера."""
+
+    connections: int = 0
+    active: int = 0
+    packages: int = 0
+    errors: int = 0
+    batches: int = 0
+
+
+class PackageServer:
+    """Обработчик соединений со строчным протоколом."""
+
+    def __init__(self, read_size: int = READ_SIZE,
+                 max_line: int = MAX_LINE):
+        self.read_size = read_size
+        self.max_line = max_line
+        self.stats = ServerStats()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def process_batch(self, lines: Iterable[bytes]) -> bytes:
+        """Обработать микропачку строк и вернуть ответ одним блоком."""
+        responses: List[str] = []
+        for raw in lines:
+            line = raw.decode(ENCODING, errors='replace').strip()
+            if not line:
+                continue
+            if len(raw) > self.max_line:
+                response, ok = LINE_TOO_LONG, False
+            else:
+                response, ok = handle_line(line)
+            responses.append(response)
+            self.stats.packages += 1
+            self.stats.errors += not ok
+        self.stats.batches += 1
+        if not responses:
+            return b''
+        return ('\n'.join(responses) + '\n').encode(ENCODING)
+
+    def feed(self, pending: bytes, chunk: bytes,
+             discarding: bool = False) -> Tuple[bytes, bytes, bool]:
+        """Разобрать очередной кусок соединения.
+
+        Возвращает ответ на полные строки, неполный хвост и признак
+        того, что хвост слишком длинной строки отбрасывается до её
+        конца. На слишком длинную строку отвечается одна ошибка — после
+        ответов на строки перед ней.
+        """
+        if discarding:
+            end = chunk.find(b'\n')
+            if end < 0:
+                return b'', b'', True
+            chunk = chunk[end + 1:]
+        *lines, pending = (pending + chunk).split(b'\n')
+        response = self.process_batch(lines) if lines else b''
+        if len(pending) > self.max_line:
+            self.stats.packages += 1
+            self.stats.errors += 1
+            return response + LINE_TOO_LONG.encode(ENCODING) + b'\n', b'', True
+        return response, pending, False
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Обслужить одно соединение до его закрытия клиентом."""
+        self.stats.connections += 1
+        self.stats.active += 1
+        pending = b''
+        discarding = False
+        try:
+            while True:
+                chunk = await reader.read(self.read_size)
+                if not chunk:
+                    break
+                response, pending, discarding = self.feed(
+                    pending, chunk, discarding)
+                if response:
+                    writer.write(response)
+                    await writer.drain()
+            if pending.strip():
+                writer.write(self.process_batch([pending]))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats.active -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start_tcp(self, host: str = '127.0.0.1',
+                        port: int = 0) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(
+            self.handle, host, port, backlog=4096)
+        return self._server
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_unix_server(
+            self.handle, path, backlog=4096)
+        return self._server
+
+    def address(self):
+        """Адрес, на котором слушает сервер."""
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def send_packages(lines: Iterable[str], host: Optional[str] = None,
+                        port: Optional[int] = None,
+                        path: Optional[str] = None) -> List[str]:
+    """Клиент: отправить строки пакетов и получить ответы по порядку."""
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    lines = list(lines)
+
+    async def send():
+        for line in lines:
+            writer.write(line.rstrip('\n').encode(ENCODING) + b'\n')
+            await writer.drain()
+        writer.write_eof()
+
+    sender = asyncio.ensure_future(send())
+    responses = []
+    while True:
+        response = await reader.readline()
+        if not response:
+            break
+        responses.append(response.decode(ENCODING).rstrip('\n'))
+    await sender
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+async def serve(host: str, port: int, path: Optional[str]) -> None:
+    server = PackageServer()
+    if path is not None:
+        await server.start_unix(path)
+    else:
+        await server.start_tcp(host, port)
+    print(f'Слушаю {server.address()}', file=sys.stderr)
+    await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Сервер приёма пакетов трекеров.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='путь к Unix-сокету')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
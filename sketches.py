@@ -0,0 +1,331 @@
+"""Потоковые квантили и гистограммы показателей тренировок.
+
+`Distributions` принимает сообщения `InfoMessage` и для каждой пары
+`(тип тренировки, показатель)` ведёт два объекта с ограниченной
+памятью, которые можно сливать между процессами и узлами:
+
+- `QuantileSketch` — логарифмические корзины (как DDSketch). Значение
+  `v` попадает в корзину `ceil(log(|v|) / log(gamma))`, где
+  `gamma = (1 + alpha) / (1 - alpha)`, и оценивается её серединой.
+  Гарантия: оценка квантиля `q` отличается от точного значения ранга
+  `q * (n - 1)` не больше чем на `alpha` относительно (по умолчанию
+  1 %), независимо от распределения и порядка данных. Число корзин
+  ограничено `max_bins`; при переполнении сливаются самые малые по
+  модулю корзины — гарантия сохраняется для верхних квантилей, а для
+  значений из слитых корзин оценка может быть завышена.
+- `Histogram` — точные счётчики в корзинах с заданными границами плюс
+  корзины ниже первой и выше последней границы.
+
+Слияние — сложение счётчиков, поэтому результат не зависит от того,
+как поток был разбит между исполнителями. Состояние сохраняется в
+JSON (`to_dict`/`from_dict`, `snapshot`/`restore`).
+"""
+import json
+import math
+import os
+from bisect import bisect_right
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from homework import InfoMessage, read_package
+
+METRICS = ('distance', 'speed', 'calories')
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+MIN_INDEXABLE = 1e-9
+SKETCH_VERSION = 1
+
+Key = Tuple[str, str]
+
+
+def linear_edges(low: float, high: float, count: int) -> Tuple[float, ...]:
+    """`count + 1` равноотстоящих границ от `low` до `high`."""
+    step = (high - low) / count
+    return tuple(low + step * index for index in range(count + 1))
+
+
+DEFAULT_EDGES = {
+    'distance': linear_edges(0, 50, 50),
+    'speed': linear_edges(0, 30, 60),
+    'calories': linear_edges(0, 3000, 60),
+}
+
+
+class QuantileSketch:
+    """Скетч квантилей с относительной ошибкой `relative_accuracy`."""
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Точность должна быть между 0 и 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.non_finite = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Учесть значение `count` раз.
+
+        Бесконечности и NaN в квантили не входят, а только считаются в
+        `non_finite`.
+        """
+        if MIN_INDEXABLE < value < math.inf:
+            bins = self.positive
+            key = self._key(value)
+        elif -math.inf < value < -MIN_INDEXABLE:
+            bins = self.negative
+            key = self._key(-value)
+        elif -MIN_INDEXABLE <= value <= MIN_INDEXABLE:
+            self.zero += count
+            bins = None
+        else:
+            self.non_finite += count
+            return
+        if bins is not None:
+            bins[key] = bins.get(key, 0) + count
+            if len(bins) > self.max_bins:
+                self._collapse(bins)
+        self.count += count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _collapse(self, bins: Dict[int, int]) -> None:
+        keys = sorted(bins)
+        excess = keys[:len(keys) - self.max_bins + 1]
+        target = excess[-1]
+        bins[target] = sum(bins.pop(key) for key in excess[:-1]) + (
+            bins[target])
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """Добавить счётчики скетча с той же точностью."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Сливать можно только скетчи одной точности")
+        for own, bins in ((self.positive, other.positive),
+                          (self.negative, other.negative)):
+            for key, count in bins.items():
+                own[key] = own.get(key, 0) + count
+            if len(own) > self.max_bins:
+                self._collapse(own)
+        self.zero += other.zero
+        self.count += other.count
+        self.non_finite += other.non_finite
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля `q` из `[0, 1]`; NaN для пустого скетча."""
+        if not 0 <= q <= 1:
+            raise ValueError("Квантиль должен быть от 0 до 1")
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_dict(self) -> Dict:
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'positive': sorted(self.positive.items()),
+            'negative': sorted(self.negative.items()),
+            'zero': self.zero,
+            'count': self.count,
+            'non_finite': self.non_finite,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'QuantileSketch':
+        sketch = cls(state['relative_accuracy'], state['max_bins'])
+        sketch.positive = {key: count for key, count in state['positive']}
+        sketch.negative = {key: count for key, count in state['negative']}
+        sketch.zero = state['zero']
+        sketch.count = state['count']
+        sketch.non_finite = state.get('non_finite', 0)
+        if sketch.count:
+            sketch.min = state['min']
+            sketch.max = state['max']
+        return sketch
+
+
+class Histogram:
+    """Счётчики значений в корзинах между границами `edges`.
+
+    Корзина `i` — `[edges[i - 1], edges[i])`, нулевая и последняя —
+    значения ниже первой и не ниже последней границы.
+    """
+
+    def __init__(self, edges: Sequence[float]):
+        self.edges = tuple(edges)
+        if list(self.edges) != sorted(set(self.edges)):
+            raise ValueError("Границы корзин должны строго возрастать")
+        self.counts = [0] * (len(self.edges) + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.counts[bisect_right(self.edges, value)] += count
+
+    def merge(self, other: 'Histogram') -> None:
+        if other.edges != self.edges:
+            raise ValueError("Сливать можно только гистограммы с общими "
+                             "границами")
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def to_dict(self) -> Dict:
+        return {'edges': self.edges, 'counts': self.counts}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'Histogram':
+        histogram = cls(state['edges'])
+        histogram.counts = list(state['counts'])
+        return histogram
+
+
+class Distributions:
+    """Скетчи и гистограммы по типам тренировок и показателям."""
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 max_bins: int = 2048,
+                 edges: Optional[Dict[str, Sequence[float]]] = None,
+                 metrics: Iterable[str] = METRICS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.metrics = tuple(metrics)
+        self.edges = {metric: tuple(DEFAULT_EDGES[metric])
+                      for metric in self.metrics if metric in DEFAULT_EDGES}
+        for metric, values in (edges or {}).items():
+            self.edges[metric] = tuple(values)
+        self.sketches: Dict[Key, QuantileSketch] = {}
+        self.histograms: Dict[Key, Histogram] = {}
+
+    def _get(self, training_type: str, metric: str):
+        key = (training_type, metric)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(
+                self.relative_accuracy, self.max_bins)
+            if metric in self.edges:
+                self.histograms[key] = Histogram(self.edges[metric])
+        return sketch, self.histograms.get(key)
+
+    def add(self, info: InfoMessage) -> None:
+        """Учесть сообщение о тренировке.
+
+        Бесконечные и NaN показатели (например, скорость при почти
+        нулевой длительности) не попадают в гистограммы и считаются в
+        `non_finite` скетча.
+        """
+        for metric in self.metrics:
+            value = getattr(info, metric)
+            sketch, histogram = self._get(info.training_type, metric)
+            sketch.add(value)
+            if histogram is not None and math.isfinite(value):
+                histogram.add(value)
+
+    def add_package(self, workout_type: str, data: list) -> InfoMessage:
+        """Разобрать пакет, учесть тренировку и вернуть сообщение о ней."""
+        info = read_package(workout_type, data).show_training_info()
+        self.add(info)
+        return info
+
+    def training_types(self) -> Tuple[str, ...]:
+        return tuple(sorted({key[0] for key in self.sketches}))
+
+    def sketch(self, metric: str,
+               training_type: Optional[str] = None) -> QuantileSketch:
+        """Скетч показателя по типу или, без `training_type`, по всем."""
+        if training_type is not None:
+            return self.sketches.get((training_type, metric)) or (
+                QuantileSketch(self.relative_accuracy, self.max_bins))
+        total = QuantileSketch(self.relative_accuracy, self.max_bins)
+        for (_, name), sketch in self.sketches.items():
+            if name == metric:
+                total.merge(sketch)
+        return total
+
+    def quantiles(self, metric: str, training_type: Optional[str] = None,
+                  quantiles: Iterable[float] = DEFAULT_QUANTILES,
+                  ) -> Dict[float, float]:
+        """Оценки квантилей, например `{0.5: ..., 0.95: ..., 0.99: ...}`."""
+        sketch = self.sketch(metric, training_type)
+        return {q: sketch.quantile(q) for q in quantiles}
+
+    def merge(self, other: 'Distributions') -> None:
+        """Добавить скетчи и гистограммы другого накопителя."""
+        for key, sketch in other.sketches.items():
+            own, histogram = self._get(*key)
+            own.merge(sketch)
+            if histogram is not None and key in other.histograms:
+                histogram.merge(other.histograms[key])
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': SKETCH_VERSION,
+            'relative_accuracy': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'metrics': self.metrics,
+            'edges': self.edges,
+            'sketches': [
+                [*key, sketch.to_dict(),
+                 self.histograms[key].to_dict()
+                 if key in self.histograms else None]
+                for key, sketch in self.sketches.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'Distributions':
+        if state.get('version') != SKETCH_VERSION:
+            raise ValueError("Неподдерживаемая версия скетчей")
+        distributions = cls(state['relative_accuracy'], state['max_bins'],
+                            state['edges'], state['metrics'])
+        for training_type, metric, sketch, histogram in state['sketches']:
+            key = (training_type, metric)
+            distributions.sketches[key] = QuantileSketch.from_dict(sketch)
+            if histogram is not None:
+                distributions.histograms[key] = Histogram.from_dict(histogram)
+        return distributions
+
+    def snapshot(self, path: str) -> None:
+        """Атомарно сохранить состояние в файл."""
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as output:
+            json.dump(self.to_dict(), output, ensure_ascii=False,
+                      separators=(',', ':'))
+        os.replace(temporary, path)
+
+    @classmethod
+    def restore(cls, path: str) -> 'Distributions':
+        with open(path, encoding='utf-8') as stream:
+            return cls.from_dict(json.load(stream))
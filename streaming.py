@@ -0,0 +1,224 @@
+"""Потоковая обработка пакетов датчиков.
+
+Пакеты читаются построчно из файла или stdin в формате JSON Lines или
+CSV и проходят через цепочку генераторов, поэтому в памяти в каждый
+момент находится только текущая строка.
+
+JSON Lines: `["RUN", [15000, 1, 75]]` или
+`{"workout_type": "RUN", "data": [15000, 1, 75]}`.
+CSV: `RUN,15000,1,75`.
+
+Модуль стоит на пути запуска CLI, поэтому не импортирует сверху
+`typing`, `csv` и `json` (все они тянут `re`) и `contextlib`. `json`
+загружается при первой строке JSON Lines, строки CSV разбирает
+`_csv.reader` — тот же объект, что `csv.reader`.
+"""
+from __future__ import annotations
+
+import itertools
+import sys
+
+from _csv import Error as CsvError
+from _csv import reader as csv_reader
+
+from homework import (InfoMessage, PackageError, Training, read_package,
+                      read_packages)
+from writer import ReportWriter
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import IO, Iterable, Iterator, Optional
+
+Package = tuple[str, list[float]]
+
+FORMATS = ('jsonl', 'csv')
+EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'jsonl',
+    '.csv': 'csv',
+}
+
+
+def _number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_json_line(line: str) -> Package:
+    """Разобрать строку JSON Lines в пакет."""
+    import json
+
+    record = json.loads(line)
+    if isinstance(record, dict):
+        return record['workout_type'], record['data']
+    workout_type, data = record
+    return workout_type, data
+
+
+def parse_csv_row(row: list[str]) -> Package:
+    """Разобрать строку CSV в пакет."""
+    workout_type, *data = row
+    return workout_type.strip(), [_number(value) for value in data]
+
+
+def detect_format(line: str) -> str:
+    """Определить формат по первой непустой строке."""
+    return 'jsonl' if line.lstrip()[:1] in ('[', '{') else 'csv'
+
+
+def format_for_path(path: str) -> Optional[str]:
+    """Определить формат по расширению файла."""
+    for extension, fmt in EXTENSIONS.items():
+        if path.endswith(extension):
+            return fmt
+    return None
+
+
+PARSE_ERRORS = (ValueError, TypeError, KeyError, CsvError)
+
+
+def _parse_all(parse, records, keep_errors: bool) -> Iterator[Package]:
+    packages = map(parse, records)
+    index = -1
+    while True:
+        try:
+            for index, package in enumerate(packages, index + 1):
+                yield package
+            return
+        except PARSE_ERRORS as exc:
+            index += 1
+            error = PackageError(
+                f"Не удалось разобрать пакет: {exc}", index=index)
+            if not keep_errors:
+                raise error from exc
+            yield error
+
+
+def iter_packages(lines: Iterable[str],
+                  fmt: Optional[str] = None,
+                  keep_errors: bool = False) -> Iterator[Package]:
+    """Лениво читать пакеты из итератора строк.
+
+    Строка, которую не удалось разобрать, вызывает `PackageError` с
+    номером пакета (непустой строки) в `index`. С `keep_errors` ошибка
+    вместо этого идёт в поток на место пакета, и `read_packages` со
+    списком ошибок учитывает её под тем же номером.
+    """
+    lines = (line for line in lines if line.strip())
+    if fmt is None:
+        first = next(lines, None)
+        if first is None:
+            return
+        fmt = detect_format(first)
+        lines = itertools.chain((first,), lines)
+    if fmt == 'jsonl':
+        yield from _parse_all(parse_json_line, lines, keep_errors)
+    elif fmt == 'csv':
+        yield from _parse_all(parse_csv_row, csv_reader(lines), keep_errors)
+    else:
+        raise ValueError(f"Неизвестный формат пакетов: {fmt}")
+
+
+def iter_trainings(packages: Iterable[Package],
+                   errors: Optional[list[PackageError]] = None,
+                   ) -> Iterator[Training]:
+    """Превращать пакеты в объекты тренировок.
+
+    Ошибочные пакеты обрабатываются как в `homework.read_packages`.
+    """
+    return read_packages(packages, errors)
+
+
+def iter_messages(packages: Iterable[Package],
+                  errors: Optional[list[PackageError]] = None,
+                  ) -> Iterator[InfoMessage]:
+    """Превращать пакеты в информационные сообщения."""
+    for training in iter_trainings(packages, errors):
+        yield training.show_training_info()
+
+
+def iter_lines(packages: Iterable[Package],
+               errors: Optional[list[PackageError]] = None,
+               ) -> Iterator[str]:
+    """Превращать пакеты в строки отчёта."""
+    for info in iter_messages(packages, errors):
+        yield info.get_message()
+
+
+class _Borrowed:
+    """Менеджер контекста над чужим потоком, который не закрывается."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def __enter__(self) -> IO[str]:
+        return self.stream
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+def open_input(path: str):
+    """Открыть файл с пакетами или stdin, если путь равен `-`.
+
+    Возвращает менеджер контекста; stdin при выходе не закрывается.
+    `contextlib` не используется ради времени запуска.
+    """
+    if path == '-':
+        return _Borrowed(sys.stdin)
+    return open(path, encoding='utf-8', newline='')
+
+
+def process(stream: IO[str], output: IO[str],
+            fmt: Optional[str] = None, stage=None,
+            errors: Optional[list[PackageError]] = None) -> int:
+    """Обработать поток пакетов и записать отчёт, вернуть число строк.
+
+    `stage` — этап над потоком сообщений перед записью, например
+    `outliers.OutlierFilter`. С `errors` ошибочные пакеты пропускаются,
+    а их ошибки складываются в `errors` (см. `homework.read_packages`).
+    """
+    messages = iter_messages(
+        iter_packages(stream, fmt, errors is not None), errors)
+    if stage is not None:
+        messages = stage(messages)
+    with ReportWriter(output) as writer:
+        writer.write_many(messages)
+    return writer.count
+
+
+def handle_line(line: str, fmt: Optional[str] = None) -> tuple[str, bool]:
+    """Обработать одну строку с пакетом, вернуть ответ и признак успеха.
+
+    Ответ — `get_message()` или `ERROR: <причина>`.
+    """
+    try:
+        workout_type, data = next(iter_packages([line], fmt))
+        info = read_package(workout_type, data).show_training_info()
+    except (PackageError, ValueError, TypeError, KeyError,
+            StopIteration, CsvError) as error:
+        return f'ERROR: {error}', False
+    return info.get_message(), True
+
+
+def serve_worker(stream: IO[str], output: IO[str],
+                 fmt: Optional[str] = None) -> int:
+    """Режим рабочего процесса: отвечать на пакеты по одному.
+
+    На каждую непустую строку `stream` сразу пишется и сбрасывается
+    одна строка ответа, поэтому процесс можно держать запущенным и
+    общаться с ним через канал. Работа заканчивается на конце потока.
+    Возвращает число обработанных строк.
+    """
+    count = 0
+    for line in iter(stream.readline, ''):
+        if not line.strip():
+            continue
+        response, _ = handle_line(line, fmt)
+        output.write(response + '\n')
+        output.flush()
+        count += 1
+    return count
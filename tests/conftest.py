@@ -1,7 +1,13 @@
+import json
+import os
+import platform
 import sys
+import tracemalloc
 from pathlib import Path
 from io import StringIO
 
+import pytest
+
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
 sys.path.append(str(BASE_DIR))
 
@@ -29,3 +35,257 @@ class Capturing(list):
 
 def pytest_make_parametrize_id(config, val):
     return repr(val)
+
+
+PERF_BASELINE = BASE_DIR / 'tests' / 'perf_baseline.json'
+PERF_VERSION = 1
+# Пик памяти меньше этой надбавки не считается регрессией: столько
+# может занять служебное состояние интерпретатора.
+PERF_ALLOC_SLACK = 1024
+# Замеры шумят: регрессию перепроверяют столько раз, а новый базовый
+# уровень берут лучшим из стольких же дополнительных замеров.
+PERF_RETRIES = 2
+# Вызовы короче этого (нс) сравниваются с допуском `micro_tolerance`:
+# на них сильнее всего сказываются соседние процессы и частота ядра.
+PERF_MICRO_NS = 10000
+
+
+def perf_environment() -> dict:
+    """Окружение, на котором сравнимы замеры производительности."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+class PerfBaseline:
+    """Сохранённые замеры тестов с меткой `perf` и сравнение с ними.
+
+    Замер — пакетов (операций) в секунду, `ops_per_sec`, и пик памяти
+    одного вызова, `peak_bytes`. Замеры разных машин несравнимы,
+    поэтому файл хранит окружение и с чужим окружением не сравнивается.
+    Новые замеры дописываются в файл, `update` перезаписывает старые.
+    Для вызовов короче `PERF_MICRO_NS` действует `micro_tolerance`.
+    """
+
+    def __init__(self, path, tolerance: float = 0.25,
+                 alloc_tolerance: float = 0.1, update: bool = False,
+                 micro_tolerance: float = 0.5):
+        self.path = Path(path)
+        self.tolerance = tolerance
+        self.micro_tolerance = micro_tolerance
+        self.alloc_tolerance = alloc_tolerance
+        self.update = update
+        self.environment = perf_environment()
+        self.results: dict = {}
+        self.regressions: list = []
+        try:
+            state = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            state = {}
+        if state.get('version', PERF_VERSION) != PERF_VERSION:
+            raise ValueError(
+                f"Неподдерживаемая версия базового уровня: {state['version']}")
+        self.comparable = state.get('environment') in (
+            None, self.environment)
+        self.entries: dict = state.get('entries', {})
+
+    def recording(self, name: str) -> bool:
+        """True, если замер `name` станет новым базовым уровнем."""
+        return self.update or self.comparable and name not in self.entries
+
+    def compare(self, name: str, measurement: dict) -> list:
+        """Описания регрессий замера без его записи."""
+        base = self.entries.get(name)
+        if self.update or not self.comparable or base is None:
+            return []
+        problems = []
+        tolerance = (
+            self.micro_tolerance
+            if base.get('call_ns', PERF_MICRO_NS) < PERF_MICRO_NS
+            else self.tolerance)
+        floor = base['ops_per_sec'] * (1 - tolerance)
+        if measurement['ops_per_sec'] < floor:
+            problems.append(
+                f"{name}: {measurement['ops_per_sec']:,.0f} оп/с против "
+                f"{base['ops_per_sec']:,.0f} в базовом уровне "
+                f"(допуск {tolerance:.0%})")
+        ceiling = (base['peak_bytes'] * (1 + self.alloc_tolerance)
+                   + PERF_ALLOC_SLACK)
+        if measurement['peak_bytes'] > ceiling:
+            problems.append(
+                f"{name}: пик памяти {measurement['peak_bytes']:,} байт "
+                f"против {base['peak_bytes']:,} в базовом уровне "
+                f"(допуск {self.alloc_tolerance:.0%})")
+        return problems
+
+    def check(self, name: str, measurement: dict) -> list:
+        """Записать замер и вернуть описания регрессий."""
+        self.results[name] = measurement
+        problems = self.compare(name, measurement)
+        self.regressions.extend(problems)
+        return problems
+
+    def save(self) -> bool:
+        """Записать новые замеры; вернуть True, если файл изменился."""
+        if self.update:
+            entries = {**self.entries, **self.results}
+        elif self.comparable:
+            entries = {**self.results, **self.entries}
+        else:
+            return False
+        if entries == self.entries and self.path.exists():
+            return False
+        state = {'version': PERF_VERSION, 'environment': self.environment,
+                 'entries': dict(sorted(entries.items()))}
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        temporary.write_text(
+            json.dumps(state, indent=2, ensure_ascii=False) + '\n',
+            encoding='utf-8')
+        os.replace(temporary, self.path)
+        return True
+
+
+def measure(func, items: int = 1, repeat: int = 5) -> dict:
+    """Пропускная способность и пик памяти одного вызова `func`.
+
+    `items` — сколько пакетов обрабатывает один вызов. Время — лучшее
+    из `repeat` серий (`benchmarks.suite.time_call`), память —
+    прирост пика `tracemalloc` за вызов после прогревочного. `call_ns` —
+    время одного вызова, по нему выбирается допуск.
+    """
+    from benchmarks.suite import time_call
+
+    func()
+    nanoseconds = time_call(func, repeat)
+    tracemalloc.start()
+    try:
+        func()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_sec': items / nanoseconds * 1e9,
+            'peak_bytes': max(0, peak - before),
+            'call_ns': nanoseconds}
+
+
+def best(first: dict, second: dict) -> dict:
+    """Лучший из двух замеров по каждому показателю."""
+    return {
+        'ops_per_sec': max(first['ops_per_sec'], second['ops_per_sec']),
+        'peak_bytes': min(first['peak_bytes'], second['peak_bytes']),
+        'call_ns': min(first['call_ns'], second['call_ns']),
+    }
+
+
+class PerfRecorder:
+    """Фикстура `perf`: замер внутри теста со сверкой с базовым уровнем.
+
+    Регрессия перемеряется до `PERF_RETRIES` раз, и сверяется лучший
+    замер: одиночный выброс из-за соседних процессов тест не роняет.
+    Новый базовый уровень тоже берётся лучшим из `1 + PERF_RETRIES`.
+    """
+
+    def __init__(self, baseline: PerfBaseline, nodeid: str):
+        self.baseline = baseline
+        self.nodeid = nodeid
+
+    def __call__(self, func, items: int = 1, name: str = '') -> dict:
+        key = f'{self.nodeid}::{name}' if name else self.nodeid
+        recording = self.baseline.recording(key)
+        measurement = measure(func, items)
+        for _ in range(PERF_RETRIES):
+            if not recording and not self.baseline.compare(key, measurement):
+                break
+            measurement = best(measurement, measure(func, items))
+        problems = self.baseline.check(key, measurement)
+        if problems:
+            pytest.fail('Регрессия производительности:\n' + '\n'.join(
+                problems), pytrace=False)
+        return measurement
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('perf', 'тесты производительности')
+    group.addoption(
+        '--perf', action='store_true',
+        help='запускать тесты с меткой perf и сверять с базовым уровнем')
+    group.addoption(
+        '--perf-update', action='store_true',
+        help='перезаписать базовый уровень текущими замерами')
+    group.addoption(
+        '--perf-baseline', default=str(PERF_BASELINE),
+        help='файл базового уровня (по умолчанию tests/perf_baseline.json)')
+    group.addoption(
+        '--perf-tolerance', type=float, default=0.25,
+        help='допустимое падение пропускной способности, доля')
+    group.addoption(
+        '--perf-micro-tolerance', type=float, default=0.5,
+        help='допустимое падение для вызовов короче '
+             f'{PERF_MICRO_NS // 1000} мкс, доля')
+    group.addoption(
+        '--perf-alloc-tolerance', type=float, default=0.1,
+        help='допустимый рост пика памяти, доля')
+
+
+def _perf_baseline(config):
+    return getattr(config, '_perf_baseline', None)
+
+
+def pytest_configure(config):
+    if config.getoption('perf') or config.getoption('perf_update'):
+        config._perf_baseline = PerfBaseline(
+            config.getoption('perf_baseline'),
+            config.getoption('perf_tolerance'),
+            config.getoption('perf_alloc_tolerance'),
+            config.getoption('perf_update'),
+            config.getoption('perf_micro_tolerance'))
+
+
+def pytest_collection_modifyitems(config, items):
+    if _perf_baseline(config) is not None:
+        return
+    skip = pytest.mark.skip(reason='тесты производительности: нужен --perf')
+    for item in items:
+        if 'perf' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def perf(request):
+    """Замерить `func` и сверить с базовым уровнем: `perf(func, items)`."""
+    baseline = _perf_baseline(request.config)
+    if baseline is None:
+        pytest.skip('тесты производительности: нужен --perf')
+    return PerfRecorder(baseline, request.node.nodeid)
+
+
+def pytest_sessionfinish(session):
+    baseline = _perf_baseline(session.config)
+    if baseline is not None:
+        baseline.save()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    baseline = _perf_baseline(config)
+    if baseline is None or not baseline.results:
+        return
+    terminalreporter.section('perf')
+    if not baseline.comparable:
+        terminalreporter.write_line(
+            f'Базовый уровень {baseline.path} снят в другом окружении и не '
+            'сравнивался; перезапишите его через --perf-update')
+    for name, result in sorted(baseline.results.items()):
+        base = baseline.entries.get(name)
+        change = ''
+        if base is not None and baseline.comparable:
+            ratio = result['ops_per_sec'] / base['ops_per_sec']
+            change = f' ({ratio - 1:+.0%})'
+        terminalreporter.write_line(
+            f"{name}: {result['ops_per_sec']:,.0f} оп/с{change}, "
+            f"пик {result['peak_bytes']:,} байт")
@@ -0,0 +1,84 @@
+import calendar
+
+import pytest
+
+import aggregation
+import homework
+
+MARCH = calendar.timegm((2024, 3, 13, 10, 0, 0))
+APRIL = calendar.timegm((2024, 4, 2, 7, 30, 0))
+PACKAGES = [
+    ('anna', MARCH, 'RUN', [15000, 1, 75]),
+    ('anna', MARCH + 3600, 'RUN', [1206, 12, 6]),
+    ('anna', MARCH + 86400, 'SWM', [720, 1, 80, 25, 40]),
+    ('anna', APRIL, 'WLK', [9000, 1, 75, 180]),
+    ('boris', MARCH, 'WLK', [9000, 1.5, 75, 180]),
+]
+
+
+def info(workout_type, data):
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = aggregation.Aggregator(aggregation.GRANULARITIES)
+    for athlete, timestamp, workout_type, data in PACKAGES:
+        aggregator.add_package(athlete, timestamp, workout_type, data)
+    return aggregator
+
+
+@pytest.mark.parametrize('granularity, label', [
+    ('day', '2024-03-13'), ('week', '2024-03-11'), ('month', '2024-03'),
+])
+def test_buckets(granularity, label):
+    bucket = aggregation.bucket_of(MARCH, granularity)
+    assert aggregation.bucket_label(bucket, granularity) == label
+    with pytest.raises(ValueError):
+        aggregation.bucket_of(MARCH, 'year')
+
+
+def test_summary(aggregator):
+    march = aggregation.bucket_of(MARCH, 'month')
+    runs = [info('RUN', [15000, 1, 75]), info('RUN', [1206, 12, 6])]
+    swim = info('SWM', [720, 1, 80, 25, 40])
+    running = aggregator.summary('anna', 'month', march, 'Running')
+    assert running['count'] == 2
+    assert running['distance'] == runs[0].distance + runs[1].distance
+    assert running['mean_speed'] == (runs[0].speed + runs[1].speed) / 2
+    total = aggregator.summary('anna', 'month', march)
+    assert total['count'] == 3
+    assert total['calories'] == pytest.approx(
+        runs[0].calories + runs[1].calories + swim.calories)
+    week = aggregator.summary(
+        'anna', 'week', aggregation.bucket_of(MARCH, 'week'))
+    assert week['count'] == 3
+    assert aggregator.summary('anna', 'month', march, 'Cycling')[
+        'count'] == 0
+    assert aggregator.buckets('anna', 'month') == [
+        march, aggregation.bucket_of(APRIL, 'month')]
+
+
+def test_snapshot_restore(aggregator, tmp_path):
+    path = str(tmp_path / 'totals.json')
+    aggregator.snapshot(path, meta={'offset': 5})
+    restored, meta = aggregation.Aggregator.restore(path)
+    assert meta == {'offset': 5}
+    assert restored.totals == aggregator.totals, (
+        'Восстановленные итоги должны совпадать с сохранёнными'
+    )
+    restored.add_package('boris', MARCH, 'RUN', [1206, 12, 6])
+    assert restored.updates == aggregator.updates + 1
+
+
+def test_merge(aggregator):
+    first = aggregation.Aggregator(aggregation.GRANULARITIES)
+    second = aggregation.Aggregator(aggregation.GRANULARITIES)
+    for index, (athlete, timestamp, workout_type, data) in enumerate(
+            PACKAGES):
+        target = first if index % 2 else second
+        target.add_package(athlete, timestamp, workout_type, data)
+    first.merge(second)
+    assert first.updates == aggregator.updates
+    for key, values in aggregator.totals.items():
+        assert list(first.totals[key]) == pytest.approx(list(values))
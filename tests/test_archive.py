@@ -0,0 +1,155 @@
+import random
+
+import pytest
+
+import archive
+import homework
+
+MARCH = archive.month_bounds(2024, 3)
+ATHLETES = ('anna', 'boris', 'vera')
+PACKAGES = {
+    'RUN': [15000, 1, 75],
+    'WLK': [9000, 1.5, 75, 180],
+    'SWM': [720, 1, 80, 25, 40],
+}
+
+
+def make_records(size, seed=17):
+    generator = random.Random(seed)
+    records = []
+    for _ in range(size):
+        workout_type = generator.choice(tuple(PACKAGES))
+        data = [value * generator.uniform(0.5, 1.5)
+                for value in PACKAGES[workout_type]]
+        info = homework.read_package(workout_type, data).show_training_info()
+        timestamp = generator.uniform(MARCH[0] - 86400 * 40,
+                                      MARCH[1] + 86400 * 40)
+        records.append((generator.choice(ATHLETES), timestamp, info))
+    return records
+
+
+@pytest.fixture(scope='module')
+def records():
+    return make_records(2000)
+
+
+@pytest.fixture
+def reader(records, tmp_path):
+    path = str(tmp_path / 'history.arc')
+    with archive.ArchiveWriter(path) as writer:
+        for record in records:
+            writer.add(*record)
+    with archive.ArchiveReader(path) as reader:
+        yield reader
+
+
+def brute_force(records, athlete=None, start=None, end=None,
+                training_type=None):
+    selected = [
+        info for owner, timestamp, info in records
+        if (athlete is None or owner == athlete)
+        and (start is None or timestamp >= start)
+        and (end is None or timestamp < end)
+        and (training_type is None or info.training_type == training_type)
+    ]
+    return {
+        'count': len(selected),
+        'calories': sum(info.calories for info in selected),
+        'distance': sum(info.distance for info in selected),
+    }
+
+
+def test_month_bounds():
+    assert archive.month_bounds(2024, 12) == (1733011200, 1735689600)
+    assert MARCH[1] - MARCH[0] == 31 * 86400
+
+
+def test_records_round_trip(reader, records):
+    assert len(reader) == len(records)
+    assert reader.athletes == ATHLETES
+    expected = sorted(records, key=lambda record: record[:2])
+    assert list(reader.records()) == expected, (
+        'Архив должен хранить записи без потерь, по спортсмену и времени'
+    )
+
+
+@pytest.mark.parametrize('athlete', [None, *ATHLETES, 'gleb'])
+@pytest.mark.parametrize('training_type', [None, 'Running', 'Cycling'])
+@pytest.mark.parametrize('period', [MARCH, (None, MARCH[1]), (None, None)])
+def test_aggregate(reader, records, athlete, training_type, period):
+    result = reader.aggregate(athlete, *period, training_type)
+    expected = brute_force(records, athlete, *period, training_type)
+    assert result['count'] == expected['count']
+    assert result['calories'] == pytest.approx(expected['calories'])
+    assert result['distance'] == pytest.approx(expected['distance'])
+
+
+def test_aggregate_without_numpy(monkeypatch, reader, records):
+    monkeypatch.setattr(archive, 'np', None)
+    for athlete in (None, 'anna'):
+        result = reader.aggregate(athlete, *MARCH, 'Swimming')
+        expected = brute_force(records, athlete, *MARCH, 'Swimming')
+        assert result['count'] == expected['count']
+        assert result['calories'] == pytest.approx(expected['calories'])
+
+
+def test_athlete_range_is_zero_copy(reader, records):
+    rows = reader.rows('boris', *MARCH)
+    assert isinstance(rows, range)
+    calories = reader.select('calories', rows)
+    assert isinstance(calories, memoryview), (
+        'Выборка спортсмена должна быть срезом файла без копирования'
+    )
+    assert calories.obj is reader.column('calories').obj
+    assert sorted(calories) == sorted(
+        info.calories for athlete, timestamp, info in records
+        if athlete == 'boris' and MARCH[0] <= timestamp < MARCH[1])
+    calories.release()
+
+
+def test_time_index(reader):
+    timestamps = reader.column('timestamp')
+    ordered = [timestamps[row] for row in reader.column('time_index')]
+    assert ordered == sorted(timestamps)
+    rows = reader.rows(None, *MARCH)
+    assert all(MARCH[0] <= timestamps[row] < MARCH[1] for row in rows)
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'history.arc'
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        archive.ArchiveReader(str(path))
+
+
+@pytest.mark.parametrize('size', [0, 10, archive.HEADER.size + 8, -8])
+def test_truncated_file_is_closed(tmp_path, records, monkeypatch, size):
+    path = str(tmp_path / 'history.arc')
+    with archive.ArchiveWriter(path) as writer:
+        for record in records[:10]:
+            writer.add(*record)
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    with open(path, 'wb') as stream:
+        stream.write(data[:size])
+    opened = []
+
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(archive, 'open', tracking_open, raising=False)
+    with pytest.raises(ValueError, match='Не удалось открыть архив'):
+        archive.ArchiveReader(path)
+    assert opened and all(stream.closed for stream in opened), (
+        'При ошибке в заголовке файл архива должен закрываться'
+    )
+
+
+def test_empty_archive(tmp_path):
+    path = str(tmp_path / 'history.arc')
+    archive.ArchiveWriter(path).close()
+    with archive.ArchiveReader(path) as reader:
+        assert len(reader) == 0
+        assert reader.aggregate()['count'] == 0
+        assert reader.aggregate(start=0)['mean_speed'] == 0.0
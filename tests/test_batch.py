@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+import batch
+import homework
+
+WORKOUT_TYPES = list(homework.TRAININGS)
+
+PACKAGES = {
+    'RUN': [[9000, 1, 75], [420, 4, 20], [1206, 12, 6], [15000, 1, 75]],
+    'WLK': [[9000, 1, 75, 180], [420, 4, 20, 42], [1206, 12, 6, 12],
+            [9000, 1.5, 75, 180], [3000.33, 2.512, 75.8, 180.1]],
+    'SWM': [[720, 1, 80, 25, 40], [420, 4, 20, 42, 4], [1206, 12, 6, 12, 6]],
+    'CYC': [[17000, 1, 75], [4000, 0.25, 60]],
+    'ROW': [[1500, 1, 75], [420, 4, 20]],
+    'SKI': [[4000, 1, 75, 300], [1206, 12, 6, 0]],
+}
+
+
+def to_columns(workout_type, packages):
+    return {
+        field: [data[i] for data in packages]
+        for i, field in enumerate(homework.PACKAGE_FIELDS[workout_type])
+    }
+
+
+def random_packages(workout_type, count, seed=0):
+    rnd = random.Random(seed)
+    packages = []
+    for _ in range(count):
+        data = [rnd.randint(1, 50000), rnd.uniform(0.1, 5),
+                rnd.uniform(30, 150)]
+        if workout_type == 'WLK':
+            data.append(rnd.uniform(120, 210))
+        if workout_type == 'SWM':
+            data.extend([rnd.randint(10, 50), rnd.randint(1, 100)])
+        if workout_type == 'SKI':
+            data.append(rnd.uniform(0, 1500))
+        packages.append(data)
+    return packages
+
+
+def assert_identical(workout_type, packages):
+    result = batch.compute_batch(
+        workout_type, to_columns(workout_type, packages))
+    assert len(result) == len(packages)
+    for i, data in enumerate(packages):
+        training = homework.read_package(workout_type, data)
+        assert float(result.distance[i]) == training.get_distance(), (
+            'Пакетная дистанция должна совпадать с `get_distance`'
+        )
+        assert float(result.speed[i]) == training.get_mean_speed(), (
+            'Пакетная скорость должна совпадать с `get_mean_speed`'
+        )
+        assert float(result.calories[i]) == training.get_spent_calories(), (
+            'Пакетные калории должны совпадать с `get_spent_calories`'
+        )
+
+
+@pytest.mark.parametrize('workout_type', WORKOUT_TYPES)
+def test_compute_batch_test_vectors(workout_type):
+    assert_identical(workout_type, PACKAGES[workout_type])
+
+
+@pytest.mark.parametrize('workout_type', WORKOUT_TYPES)
+def test_compute_batch_random(workout_type):
+    assert_identical(workout_type, random_packages(workout_type, 1000))
+
+
+@pytest.mark.parametrize('workout_type', WORKOUT_TYPES)
+def test_compute_batch_without_numpy(monkeypatch, workout_type):
+    monkeypatch.setattr(batch, 'np', None)
+    assert_identical(workout_type, random_packages(workout_type, 200))
+
+
+def test_compute_batch_follows_constants(monkeypatch):
+    monkeypatch.setattr(homework.Running, 'CALORIES_MEAN_SPEED_SHIFT', 2.5)
+    assert_identical('RUN', PACKAGES['RUN'])
+
+
+def test_compute_batch_errors():
+    with pytest.raises(KeyError):
+        batch.compute_batch('BIKE', {'action': [1]})
+    with pytest.raises(ValueError):
+        batch.compute_batch(
+            'RUN', {'action': [1, 2], 'duration': [1], 'weight': [1]})
+
+
+def test_compute_batch_registered_type():
+    homework.register_workout(
+        'HIK', 'Hiking', ('action', 'duration', 'weight'),
+        {'calories': 'CALORIES_WEIGHT_MULTIPLIER * weight * duration'},
+        CALORIES_WEIGHT_MULTIPLIER=5.5)
+    try:
+        assert_identical('HIK', random_packages('HIK', 100))
+    finally:
+        homework.unregister_workout('HIK')
@@ -0,0 +1,57 @@
+import streaming
+from benchmarks import suite
+
+
+def test_synthetic_packages_are_valid():
+    lines = list(suite.synthetic_packages(300, seed=1))
+    assert lines == list(suite.synthetic_packages(300, seed=1)), (
+        'Синтетические пакеты должны воспроизводиться по seed'
+    )
+    errors = []
+    messages = list(streaming.iter_messages(
+        streaming.iter_packages(lines, 'csv'), errors))
+    assert len(messages) == 300 and not errors
+
+
+def test_macro_and_memory_benchmarks():
+    macro = suite.macro_benchmarks([100], repeat=1)
+    assert list(macro) == ['pipeline.100'] and macro['pipeline.100'] > 0
+    memory = suite.memory_benchmarks()
+    assert memory['compact.Running'] < memory['homework.Running']
+    assert memory['TrainingArray.SWM'] == 40
+
+
+def test_compare_detects_regressions():
+    baseline = {
+        'micro': {'Running.get_message': 100.0},
+        'macro': {'pipeline.1000': 1000.0},
+        'memory': {'compact.Running': 56.0},
+    }
+    current = {
+        'micro': {'Running.get_message': 105.0, 'new.case': 1.0},
+        'macro': {'pipeline.1000': 800.0},
+        'memory': {'compact.Running': 56.0},
+    }
+    regressions = suite.compare(current, baseline, tolerance=0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('macro.pipeline.1000')
+
+
+def test_format_results():
+    results = {
+        'micro': {'Running.get_message': 100.0},
+        'macro': {'pipeline.1000': 1000.0},
+        'memory': {'compact.Running': 56.0},
+    }
+    text = suite.format_results(results)
+    assert 'Running.get_message' in text and 'pipeline.1000' in text
+
+
+def test_startup_benchmarks():
+    startup = suite.startup_benchmarks(repeat=1)
+    assert set(startup) == {
+        'python', 'import_homework', 'cli_one_package', 'cli_overhead'}
+    assert startup['cli_one_package'] > startup['python'] > 0
+    results = {'startup': dict(startup, cli_overhead=5.0)}
+    assert suite.check_startup_budget(results, 10) == []
+    assert len(suite.check_startup_budget(results, 1)) == 1
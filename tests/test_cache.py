@@ -0,0 +1,156 @@
+import pytest
+
+import cache
+import homework
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [1206, 12, 6]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('WLK', [3000.33, 2.512, 75.8, 180.1]),
+]
+
+
+def expected(workout_type, data):
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+def test_memory_tier_hits():
+    results = cache.ResultCache(max_entries=10)
+    for _ in range(3):
+        for workout_type, data in PACKAGES:
+            info = results.get_info(workout_type, data)
+            assert info.get_message() == expected(
+                workout_type, data).get_message()
+    assert results.stats.misses == len(PACKAGES)
+    assert results.stats.hits == 2 * len(PACKAGES)
+    assert results.stats.hit_rate == pytest.approx(2 / 3)
+    results.get_info('RUN', [1206.0, 12.0, 6.0])
+    assert results.stats.hits == 2 * len(PACKAGES) + 1, (
+        'Ключ кэша должен нормализовать числа'
+    )
+
+
+def test_lru_eviction():
+    results = cache.ResultCache(max_entries=2)
+    for workout_type, data in PACKAGES[:3]:
+        results.get_info(workout_type, data)
+    assert len(results) == 2 and results.stats.evictions == 1
+    results.get_info(*PACKAGES[0])
+    assert results.stats.misses == 4
+
+
+def test_invalid_packages_are_not_served():
+    results = cache.ResultCache()
+    results.get_info('RUN', [1206, 12, 6])
+    with pytest.raises(homework.PackageError):
+        results.get_info('RUN', ['1206', 12, 6])
+    with pytest.raises(homework.PackageError):
+        results.get_info('RUN', [1206, 0, 6])
+    errors = []
+    messages = list(cache.iter_messages(
+        [('RUN', [1206, 12, 6]), ('BIKE', [1]), ('RUN', [1206, 12, 6])],
+        results, errors))
+    assert len(messages) == 2 and [error.index for error in errors] == [1]
+
+
+def test_constants_change_invalidates(monkeypatch):
+    results = cache.ResultCache()
+    before = results.get_info('RUN', [1206, 12, 6])
+    monkeypatch.setattr(homework.Running, 'CALORIES_MEAN_SPEED_SHIFT', 2.5)
+    after = results.get_info('RUN', [1206, 12, 6])
+    assert after.calories != before.calories
+    assert after == expected('RUN', [1206, 12, 6])
+    assert results.stats.invalidations == 1
+
+
+@pytest.mark.parametrize('disk', [False, True])
+def test_constants_change_during_computation(monkeypatch, tmp_path, disk):
+    results = cache.ResultCache(
+        path=str(tmp_path / 'cache.bin') if disk else None)
+    data = [1206, 12, 6]
+
+    class Racing:
+        """Константа меняется, пока пакет считается в другом потоке."""
+
+        def __init__(self, training):
+            self.training = training
+
+        def show_training_info(self):
+            info = self.training.show_training_info()
+            monkeypatch.setattr(cache, 'read_package', homework.read_package)
+            monkeypatch.setattr(
+                homework.Running, 'CALORIES_MEAN_SPEED_MULTIPLIER', 20)
+            results.get_info('RUN', [9000, 1, 75])
+            return info
+
+    monkeypatch.setattr(
+        cache, 'read_package',
+        lambda workout_type, data: Racing(
+            homework.read_package(workout_type, data)))
+    results.get_info('RUN', data)
+    assert results.stats.invalidations == 1
+    assert results.get_info('RUN', data) == expected('RUN', data), (
+        'Результат, посчитанный со старыми константами, не должен '
+        'попадать в очищенный кэш'
+    )
+
+
+def test_disk_tier_persists(tmp_path, monkeypatch):
+    path = str(tmp_path / 'results.cache')
+    with cache.ResultCache(path=path, disk_slots=64) as results:
+        for workout_type, data in PACKAGES:
+            results.get_info(workout_type, data)
+    with cache.ResultCache(path=path, disk_slots=64) as results:
+        for workout_type, data in PACKAGES:
+            info = results.get_info(workout_type, data)
+            assert info.get_message() == expected(
+                workout_type, data).get_message()
+        assert results.stats.disk_hits == len(PACKAGES)
+        assert results.stats.misses == 0
+    monkeypatch.setattr(homework.SportsWalking, 'LEN_STEP', 0.7)
+    with cache.ResultCache(path=path, disk_slots=64) as results:
+        info = results.get_info(*PACKAGES[2])
+        assert results.stats.disk_hits == 0, (
+            'Дисковый кэш должен сбрасываться при изменении констант'
+        )
+        assert info == expected(*PACKAGES[2])
+
+
+def test_disk_tier_overflow(tmp_path):
+    path = str(tmp_path / 'small.cache')
+    with cache.ResultCache(max_entries=1, path=path,
+                           disk_slots=8) as results:
+        for action in range(1, 50):
+            results.get_info('RUN', [action, 1, 75])
+        for action in range(1, 50):
+            info = results.get_info('RUN', [action, 1, 75])
+            assert info == expected('RUN', [action, 1, 75])
+    with pytest.raises(ValueError):
+        cache.DiskTier(path, 10, bytes(16))
+
+
+def test_malformed_packages_and_reregistered_types():
+    packages = [('RUN', [15000, 1, 75]), ('RUN', [1, 2], 'extra'), 'RUN']
+    errors = []
+    result_cache = cache.ResultCache()
+    messages = list(cache.iter_messages(packages, result_cache, errors))
+    assert len(messages) == 1
+    assert [error.index for error in errors] == [1, 2], (
+        'Ошибка формы пакета должна попадать в список ошибок'
+    )
+    homework.register_workout(
+        'HIK', 'Hiking', ['action', 'duration', 'weight'],
+        {'calories': 'weight * duration'})
+    try:
+        first = result_cache.get_info('HIK', [9000, 1, 75])
+        homework.unregister_workout('HIK')
+        homework.register_workout(
+            'HIK', 'Hiking', ['action', 'duration', 'weight'],
+            {'calories': 'weight * duration * 2'})
+        second = result_cache.get_info('HIK', [9000, 1, 75])
+    finally:
+        homework.unregister_workout('HIK')
+    assert second.calories == 2 * first.calories, (
+        'Кэш не должен отдавать результаты прежнего класса того же кода'
+    )
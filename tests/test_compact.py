@@ -0,0 +1,138 @@
+import pytest
+
+import compact
+import homework
+
+SKIP_ATTRS = {'CODE', 'FIELDS', 'FORMULAS', 'kernels', 'compiled_formulas'}
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('SWM', [420, 4, 20, 42, 4]),
+    ('RUN', [9000, 1, 75]),
+    ('RUN', [1206, 12, 6]),
+    ('WLK', [9000, 1.5, 75, 180]),
+    ('WLK', [3000.33, 2.512, 75.8, 180.1]),
+]
+
+
+@pytest.mark.parametrize('name', [
+    'Training', 'Running', 'SportsWalking', 'Swimming', 'InfoMessage',
+])
+def test_compact_classes_have_no_dict(name):
+    cls = getattr(compact, name)
+    reference = getattr(homework, name)
+    assert cls.__name__ == reference.__name__
+    for attr in dir(reference):
+        if not attr.startswith('_') and attr not in SKIP_ATTRS:
+            assert hasattr(cls, attr), (
+                f'У компактного класса `{name}` должен быть атрибут `{attr}`'
+            )
+    assert '__dict__' not in dir(cls), (
+        f'Компактный класс `{name}` не должен хранить `__dict__`'
+    )
+
+
+@pytest.mark.parametrize('workout_type, data', PACKAGES)
+def test_compact_results_match(workout_type, data):
+    training = compact.read_package(workout_type, data)
+    reference = homework.read_package(workout_type, data)
+    assert not hasattr(training, '__dict__')
+    assert training.get_distance() == reference.get_distance()
+    assert training.get_mean_speed() == reference.get_mean_speed()
+    assert training.get_spent_calories() == reference.get_spent_calories()
+    info = training.show_training_info()
+    assert isinstance(info, compact.InfoMessage)
+    assert info.get_message() == (
+        reference.show_training_info().get_message())
+
+
+def test_compact_uses_less_memory():
+    compact_size = compact.measure_record_size(
+        lambda i: compact.Swimming(720, 1.5, 80.5, 25, 40))
+    regular_size = compact.measure_record_size(
+        lambda i: homework.Swimming(720, 1.5, 80.5, 25, 40))
+    assert compact_size < regular_size, (
+        'Компактные тренировки должны занимать меньше памяти'
+    )
+
+
+@pytest.mark.parametrize('workout_type', ['RUN', 'WLK', 'SWM'])
+def test_training_array(workout_type):
+    packages = [data for code, data in PACKAGES if code == workout_type]
+    trainings = compact.TrainingArray(workout_type, packages)
+    assert len(trainings) == len(packages)
+    assert trainings.nbytes() == 8 * len(packages) * len(packages[0])
+    result = trainings.compute()
+    for i, data in enumerate(packages):
+        reference = homework.read_package(workout_type, data)
+        assert trainings.row(i) == data
+        assert trainings[i].get_spent_calories() == (
+            reference.get_spent_calories())
+        assert float(result.calories[i]) == reference.get_spent_calories()
+    assert [t.get_distance() for t in trainings] == [
+        homework.read_package(workout_type, data).get_distance()
+        for data in packages
+    ]
+
+
+def test_training_array_wrong_arity():
+    trainings = compact.TrainingArray('RUN')
+    with pytest.raises(ValueError):
+        trainings.append([1, 2])
+
+
+@pytest.mark.parametrize('workout_type, data', [
+    ('BIKE', [9000, 1, 75]),
+    ('SKI', [9000, 1, 75]),
+    ('RUN', [9000, 0, 75]),
+])
+def test_read_package_errors(workout_type, data):
+    with pytest.raises(homework.PackageError):
+        compact.read_package(workout_type, data)
+
+
+def test_training_array_unknown_type():
+    with pytest.raises(homework.PackageError):
+        compact.TrainingArray('BIKE')
+
+
+def test_training_array_append_is_atomic():
+    trainings = compact.TrainingArray('RUN', [[9000, 1, 75]])
+    for data in ([100, 1, 'x'], [100, 0, 75], [100, 1]):
+        with pytest.raises(homework.PackageError):
+            trainings.append(data)
+    assert {field: len(column) for field, column in
+            trainings.columns.items()} == dict.fromkeys(trainings.fields, 1), (
+        'Ошибочный пакет не должен оставлять столбцы разной длины'
+    )
+    assert len(trainings.compute().calories) == 1
+
+
+def test_compact_reads_current_constants(monkeypatch):
+    monkeypatch.setattr(homework.Running, 'CALORIES_MEAN_SPEED_MULTIPLIER',
+                        20)
+    data = [9000, 1, 75]
+    trainings = compact.TrainingArray('RUN', [data])
+    expected = homework.read_package('RUN', data).get_spent_calories()
+    assert compact.Running.CALORIES_MEAN_SPEED_MULTIPLIER == 20
+    assert trainings[0].get_spent_calories() == expected, (
+        'Компактные классы должны читать константы из классов homework'
+    )
+    assert float(trainings.compute().calories[0]) == expected
+
+
+def test_compact_registered_types():
+    data = [9000, 1, 75, 300]
+    skiing = compact.read_package('SKI', data).show_training_info()
+    reference = homework.read_package('SKI', data).show_training_info()
+    assert skiing.get_message() == reference.get_message()
+    homework.register_workout(
+        'HIK', 'Hiking', ('action', 'duration', 'weight', 'climb'),
+        {'calories': 'CALORIES_CLIMB_MULTIPLIER * climb * weight'},
+        CALORIES_CLIMB_MULTIPLIER=0.01)
+    try:
+        hiking = compact.read_package('HIK', [1000, 2, 80, 500])
+        assert not hasattr(hiking, '__dict__')
+        assert type(hiking).__name__ == 'Hiking'
+        assert hiking.get_spent_calories() == 0.01 * 500 * 80
+    finally:
+        homework.unregister_workout('HIK')
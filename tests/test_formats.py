@@ -0,0 +1,159 @@
+import io
+import random
+import struct
+import subprocess
+import sys
+
+import pytest
+
+import formats
+import homework
+from conftest import BASE_DIR
+
+
+def random_messages(count, seed=0):
+    rnd = random.Random(seed)
+    return [
+        homework.InfoMessage(
+            rnd.choice(formats.registered_types()),
+            rnd.uniform(0.1, 10), rnd.uniform(0, 100),
+            rnd.uniform(0, 30), rnd.uniform(0, 5000))
+        for _ in range(count)
+    ]
+
+
+MESSAGES = random_messages(500)
+
+
+def test_jsonl_roundtrip():
+    output = io.StringIO()
+    with formats.JsonLinesWriter(output) as writer:
+        writer.write_many(MESSAGES)
+    assert writer.count == len(MESSAGES)
+    output.seek(0)
+    assert list(formats.read_jsonl(output)) == MESSAGES, (
+        'JSON Lines должен восстанавливать сообщения без потерь'
+    )
+
+
+def test_csv_roundtrip():
+    output = io.StringIO()
+    with formats.CsvWriter(output) as writer:
+        writer.write_many(MESSAGES)
+    output.seek(0)
+    assert output.readline() == (
+        'training_type,duration,distance,speed,calories\n')
+    output.seek(0)
+    assert list(formats.read_csv(output)) == MESSAGES
+
+
+def binary_report(messages):
+    output = io.BytesIO()
+    with formats.BinaryWriter(output) as writer:
+        writer.write_many(messages)
+    return output.getvalue()
+
+
+def test_binary_roundtrip():
+    data = binary_report(MESSAGES)
+    with formats.BinaryReader(data) as reader:
+        assert len(reader) == len(MESSAGES)
+        assert reader.training_types == formats.registered_types()
+        assert list(reader) == MESSAGES
+        assert reader[10] == MESSAGES[10]
+        assert reader[-1] == MESSAGES[-1]
+        with pytest.raises(IndexError):
+            reader[len(MESSAGES)]
+
+
+def test_binary_writer_sees_registered_types():
+    homework.register_workout('HIK', 'Hiking', ('action', 'duration',
+                                                'weight'), {})
+    try:
+        message = homework.InfoMessage('Hiking', 2.0, 1.3, 0.65, 120.0)
+        with formats.BinaryReader(binary_report([message])) as reader:
+            assert 'Hiking' in reader.training_types
+            assert list(reader) == [message], (
+                'Тип, зарегистрированный после импорта formats, должен '
+                'записываться'
+            )
+    finally:
+        homework.unregister_workout('HIK')
+
+
+def test_binary_columns_are_zero_copy():
+    data = bytearray(binary_report(MESSAGES))
+    reader = formats.BinaryReader(data)
+    calories = reader.column('calories')
+    assert list(calories) == [info.calories for info in MESSAGES]
+    codes = reader.column('training_type')
+    assert [reader.training_types[code] for code in codes] == [
+        info.training_type for info in MESSAGES
+    ]
+    counts = reader.type_counts()
+    assert sum(counts.values()) == len(MESSAGES)
+    assert calories.obj is not None and not calories.c_contiguous, (
+        'Столбец должен быть срезом буфера, а не копией'
+    )
+    data[-16:-8] = struct.pack('<d', 1.5)
+    assert calories[-1] == 1.5, (
+        'Изменения буфера должны быть видны через столбец'
+    )
+    assert reader[len(MESSAGES) - 1].calories == 1.5
+
+
+def test_binary_reader_mmap(tmp_path):
+    path = tmp_path / 'report.bin'
+    path.write_bytes(binary_report(MESSAGES))
+    with formats.BinaryReader(path) as reader:
+        speed = reader.column('speed')
+        assert speed[0] == MESSAGES[0].speed
+        speed.release()
+        assert list(reader) == MESSAGES
+
+
+@pytest.mark.parametrize('content', [
+    b'', b'NOTAFILE' + bytes(64), b'RPT',
+])
+def test_binary_reader_closes_file_on_error(tmp_path, monkeypatch, content):
+    path = tmp_path / 'report.bin'
+    path.write_bytes(content)
+    opened = []
+    real_open = open
+
+    def tracking_open(*args, **kwargs):
+        opened.append(real_open(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(formats, 'open', tracking_open, raising=False)
+    with pytest.raises(ValueError, match='двоичный отчёт'):
+        formats.BinaryReader(path)
+    assert opened and all(file.closed for file in opened), (
+        'Файл должен закрываться, если заголовок не прочитан'
+    )
+
+
+def test_binary_errors():
+    with pytest.raises(ValueError):
+        formats.BinaryReader(b'NOTAFILE' + bytes(64))
+    with pytest.raises(ValueError):
+        binary_report([homework.InfoMessage('Biking', 1, 1, 1, 1)])
+    with pytest.raises(ValueError):
+        formats.open_writer('xml', io.StringIO())
+    with pytest.raises(TypeError):
+        formats.MessageWriter(io.StringIO())
+
+
+def test_cli_output_format(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text('RUN,15000,1,75\nSWM,720,1,80,25,40\n', encoding='utf-8')
+    result = subprocess.run(
+        [sys.executable, 'homework.py', str(path),
+         '--output-format', 'binary'],
+        cwd=BASE_DIR, capture_output=True, check=True)
+    with formats.BinaryReader(result.stdout) as reader:
+        assert list(reader) == [
+            homework.read_package('RUN', [15000, 1, 75]).show_training_info(),
+            homework.read_package(
+                'SWM', [720, 1, 80, 25, 40]).show_training_info(),
+        ]
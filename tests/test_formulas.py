@@ -0,0 +1,65 @@
+import pytest
+
+import formulas
+
+
+class Sample:
+    SHIFT = 2
+    MULTIPLIER = 0.5
+
+    def __init__(self, action, weight):
+        self.action = action
+        self.weight = weight
+
+
+@pytest.mark.parametrize('metric, expression', [
+    ('power', 'action'),
+    ('calories', 'action +'),
+    ('calories', 'action * UNKNOWN'),
+    ('calories', 'height * weight'),
+    ('distance', 'speed * weight'),
+    ('speed', 'calories / weight'),
+])
+def test_formula_errors(metric, expression):
+    with pytest.raises(ValueError):
+        formulas.Formula(metric, expression, ('action', 'weight'), Sample)
+
+
+def test_formula_params_and_constants():
+    formula = formulas.Formula(
+        'calories', '(MULTIPLIER * speed + SHIFT) * weight + speed',
+        ('action', 'weight'), Sample)
+    assert formula.params == ('weight', 'speed')
+    assert formula.constants == ('MULTIPLIER', 'SHIFT')
+
+
+def test_method_and_kernel_agree():
+    formula = formulas.Formula(
+        'calories', '(MULTIPLIER * speed + SHIFT) * weight / action',
+        ('action', 'weight'), Sample)
+    Sample.get_mean_speed = lambda self: 3.3
+    Sample.get_spent_calories = formula.method()
+    kernel, params = formula.kernel_factory()(Sample)
+    sample = Sample(7, 81.5)
+    assert params == ('action', 'weight', 'speed')
+    assert sample.get_spent_calories() == kernel(7, 81.5, 3.3)
+    assert sample.get_spent_calories.__doc__ == (
+        formulas.METRIC_DOCS['calories'])
+
+
+def test_kernel_reads_constants_on_creation(monkeypatch):
+    formula = formulas.Formula(
+        'distance', 'action * MULTIPLIER', ('action', 'weight'), Sample)
+    factory = formula.kernel_factory()
+    kernel, _ = factory(Sample)
+    monkeypatch.setattr(Sample, 'MULTIPLIER', 4)
+    assert kernel(10) == 5.0
+    assert factory(Sample)[0](10) == 40
+
+
+def test_compile_init():
+    init = formulas.compile_init(('action', 'weight'), '<test>')
+    sample = Sample.__new__(Sample)
+    init(sample, 1, 2)
+    assert (sample.action, sample.weight) == (1, 2)
+    assert init.__code__.co_varnames[:3] == ('self', 'action', 'weight')
@@ -423,3 +423,211 @@ def test_main_output(input_data, expected):
     assert get_message_output == expected, (
         'Метод `main` должен печатать результат в консоль.\n'
     )
+
+
+@pytest.mark.parametrize('input_data', [
+    (['SWM', [720, 1, 80, 25, 40]]),
+    (['RUN', [1206, 12, 6]]),
+    (['WLK', [9000, 1, 75, 180]]),
+    (['SKI', [9000, 1.5, 75, 300]]),
+])
+def test_Training_show_training_info_matches_methods(input_data):
+    training = homework.read_package(*input_data)
+    assert training.show_training_info() == homework.InfoMessage(
+        type(training).__name__, training.duration, training.get_distance(),
+        training.get_mean_speed(), training.get_spent_calories()), (
+        'Расчёт за один проход должен совпадать с методами показателей.'
+    )
+
+
+def test_show_training_info_uses_overridden_methods():
+    class Treadmill(homework.Running):
+        def get_mean_speed(self):
+            return 10.0
+
+    training = Treadmill(15000, 1, 75)
+    info = training.show_training_info()
+    assert info.speed == 10.0
+    assert info.calories == homework.Running.get_spent_calories(training), (
+        'Формулы должны брать показатель из переопределённого метода.'
+    )
+
+
+def test_metrics_are_memoized(monkeypatch):
+    namespace = homework.Running.get_distance.__globals__
+    get_distance = namespace['get_distance_']
+    compute_metrics = homework.Running._compute_metrics
+    calls = []
+
+    def counting(func):
+        def wrapper(self):
+            calls.append(func)
+            return func(self)
+        return wrapper
+
+    monkeypatch.setitem(namespace, 'get_distance_', counting(get_distance))
+    monkeypatch.setattr(
+        homework.Running, '_compute_metrics', counting(compute_metrics))
+    training = homework.Running(9000, 1, 75)
+    calories = training.get_spent_calories()
+    info = training.show_training_info()
+    assert training.show_training_info() == info
+    assert training.get_spent_calories() == calories == info.calories
+    assert calls == [get_distance], (
+        'Показатели должны считаться один раз и браться из памяти '
+        'экземпляра.'
+    )
+    monkeypatch.setattr(homework.Running, 'LEN_STEP', 1.3)
+    assert training.get_distance() == pytest.approx(2 * info.distance), (
+        'Изменённая константа должна сбрасывать запомненные показатели.'
+    )
+
+
+@pytest.mark.parametrize('input_data, field, value', [
+    (['SWM', [720, 1, 80, 25, 40]], 'count_pool', 20),
+    (['SWM', [720, 1, 80, 25, 40]], 'length_pool', 50),
+    (['RUN', [1206, 12, 6]], 'action', 9000),
+    (['RUN', [1206, 12, 6]], 'duration', 1),
+    (['WLK', [9000, 1, 75, 180]], 'height', 160),
+    (['WLK', [9000, 1, 75, 180]], 'weight', 90),
+])
+def test_Training_info_follows_changed_fields(input_data, field, value):
+    training = homework.read_package(*input_data)
+    training.show_training_info()
+    setattr(training, field, value)
+    data = list(input_data[1])
+    data[list(inspect.signature(type(training)).parameters).index(field)] = (
+        value
+    )
+    expected = homework.read_package(input_data[0], data)
+    assert training.show_training_info() == expected.show_training_info(), (
+        'Сообщение должно считаться по текущим данным тренировки.'
+    )
+
+
+@pytest.mark.parametrize('input_data, field', [
+    (['BIKE', [9000, 1, 75]], None),
+    (['RUN', [9000, 1]], None),
+    (['SWM', [720, 1, 80, 25]], None),
+    (['RUN', [9000, 0, 75]], 'duration'),
+    (['RUN', ['9000', 1, 75]], 'action'),
+    (['WLK', [9000, 1, 75, 0]], 'height'),
+    (['SWM', [720, 1, 80, 25, -40]], 'count_pool'),
+    (['RUN', [9000, float('nan'), 75]], 'duration'),
+])
+def test_read_package_errors(input_data, field):
+    with pytest.raises(homework.PackageError) as exc_info:
+        homework.read_package(*input_data)
+    assert isinstance(exc_info.value, ValueError)
+    assert exc_info.value.workout_type == input_data[0]
+    assert exc_info.value.field == field, (
+        '`PackageError` должна указывать поле с ошибкой.'
+    )
+
+
+def test_read_package_accepts_real_numbers():
+    from fractions import Fraction
+    np = pytest.importorskip('numpy')
+    expected = homework.read_package('RUN', [9000, 1, 75]).show_training_info(
+    ).get_message()
+    for data in ([np.int64(9000), np.float32(1), 75],
+                 [Fraction(9000), Fraction(1), Fraction(75)]):
+        assert homework.check_package('RUN', data) is None, (
+            'Числа из numpy и `Fraction` должны проходить проверку'
+        )
+        training = homework.read_package('RUN', data)
+        assert training.show_training_info().get_message() == expected
+    assert homework.check_package('RUN', [9000, True, 75]).field == (
+        'duration'), '`bool` не должен считаться числом'
+
+
+def test_read_packages_collects_errors():
+    packages = [
+        ('RUN', [1206, 12, 6]),
+        ('RUN', [1206, 0, 6]),
+        'broken',
+        ('WLK', [9000, 1, 75, 180]),
+        ('BIKE', [1, 2, 3]),
+    ]
+    errors = []
+    trainings = list(homework.read_packages(packages, errors))
+    assert [type(t).__name__ for t in trainings] == [
+        'Running', 'SportsWalking'
+    ]
+    assert [error.index for error in errors] == [1, 2, 4], (
+        '`read_packages` должна собирать ошибки с номерами пакетов.'
+    )
+    with pytest.raises(homework.PackageError):
+        list(homework.read_packages(packages))
+
+
+@pytest.mark.parametrize('input_data, expected', [
+    (['CYC', [17000, 1, 75]], 'Cycling'),
+    (['ROW', [1500, 1, 75]], 'Rowing'),
+    (['SKI', [4000, 1, 75, 300]], 'Skiing'),
+])
+def test_new_workout_types(input_data, expected):
+    training = homework.read_package(*input_data)
+    assert type(training).__name__ == expected
+    assert isinstance(training, homework.Training)
+    assert type(training.get_spent_calories()) == float, (
+        'Новые типы тренировок должны считать калории.'
+    )
+
+
+def test_registry_matches_declarations():
+    for workout_type, training in homework.TRAININGS.items():
+        assert training.CODE == workout_type
+        assert homework.PACKAGE_FIELDS[workout_type] == training.FIELDS
+        assert list(inspect.signature(training).parameters) == list(
+            training.FIELDS), (
+            '`__init__` должен принимать поля пакета из `FIELDS`.'
+        )
+
+
+def test_package_fields_of_hand_written_init():
+    class Treadmill(homework.Running):
+        def __init__(self, action, duration, weight, incline, *, belt=1.0):
+            scale = belt * (1 + incline)
+            super().__init__(action * scale, duration, weight)
+            self.incline = incline
+
+    assert Treadmill.FIELDS == ('action', 'duration', 'weight', 'incline'), (
+        'Поля пакета — позиционные параметры `__init__`, без локальных '
+        'переменных и keyword-only аргументов.'
+    )
+    with pytest.raises(TypeError):
+        class Broken(homework.Running):
+            def __init__(self, *data):
+                super().__init__(*data)
+
+
+def test_register_workout():
+    training = homework.register_workout(
+        'HIK', 'Hiking', ('action', 'duration', 'weight', 'climb'),
+        {'calories': 'CALORIES_CLIMB_MULTIPLIER * climb * weight'},
+        LEN_STEP=0.7, CALORIES_CLIMB_MULTIPLIER=0.01)
+    try:
+        hiking = homework.read_package('HIK', [1000, 2, 80, 500])
+        assert type(hiking) is training
+        assert hiking.get_distance() == 1000 * 0.7 / 1000
+        assert hiking.get_mean_speed() == hiking.get_distance() / 2
+        assert hiking.get_spent_calories() == 0.01 * 500 * 80
+        with pytest.raises(ValueError):
+            homework.register_workout('HIK', 'Other', ('action',), {})
+    finally:
+        homework.unregister_workout('HIK')
+    assert 'HIK' not in homework.TRAININGS
+    with pytest.raises(homework.PackageError):
+        homework.read_package('HIK', [1000, 2, 80, 500])
+
+
+@pytest.mark.parametrize('fields, formulas', [
+    (('action', 'duration', 'weight', 'slope'), {}),
+    (('action', 'duration', 'weight'), {'calories': 'weight * UNKNOWN'}),
+    (('action', 'duration', 'weight'), {'calories': 'height * weight'}),
+])
+def test_register_workout_errors(fields, formulas):
+    with pytest.raises(ValueError):
+        homework.register_workout('BAD', 'Bad', fields, formulas)
+    assert 'BAD' not in homework.TRAININGS
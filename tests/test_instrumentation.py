@@ -0,0 +1,132 @@
+import io
+import json
+import time
+
+import pytest
+
+import cli
+import homework
+import instrumentation
+import streaming
+import threaded
+import writer
+
+CSV = (
+    'SWM,720,1,80,25,40\n'
+    'RUN,1206,12,6\n'
+    'RUN,1206,0,6\n'
+    'WLK,9000,1,75,180\n'
+)
+
+
+@pytest.fixture
+def collector():
+    collector = instrumentation.enable(
+        profile_rate=1.0, trace_memory_rate=1.0, seed=0)
+    yield collector
+    instrumentation.disable()
+
+
+def run_pipeline():
+    errors = []
+    output = io.StringIO()
+    with writer.ReportWriter(output) as report:
+        report.write_many(streaming.iter_messages(
+            streaming.iter_packages(io.StringIO(CSV)), errors))
+    for workout_type, data in [('RUN', [15000, 1, 75])]:
+        homework.read_package(workout_type, data).show_training_info(
+        ).get_message()
+    return output.getvalue(), errors
+
+
+def test_disabled_pipeline_is_untouched():
+    read_package = homework.read_package
+    get_message = homework.InfoMessage.get_message
+    instrumentation.enable()
+    assert homework.read_package is not read_package
+    instrumentation.disable()
+    assert homework.read_package is read_package, (
+        'После выключения конвейер должен работать без обёрток'
+    )
+    assert homework.InfoMessage.get_message is get_message
+    assert instrumentation.stats() == {}
+
+
+def test_stats_per_stage_and_type(collector):
+    output, errors = run_pipeline()
+    assert len(errors) == 1 and output.count('\n') == 3
+    stats = instrumentation.stats()
+    assert stats['decode']['Running']['count'] == 2
+    assert stats['decode']['Running']['errors'] == 1
+    assert stats['decode']['Swimming']['count'] == 1
+    assert stats['compute']['SportsWalking']['count'] == 1
+    assert stats['render']['block']['count'] == 3
+    assert stats['render']['Running']['count'] == 1
+    running = stats['compute']['Running']
+    assert running['p50_ns'] <= running['p99_ns'] <= running['max_ns']
+    assert sum(running['histogram'].values()) == running['count']
+    assert running['alloc_bytes_per_call'] is not None
+
+
+def test_profile_and_dump(collector):
+    run_pipeline()
+    profile = collector.profile_stats()
+    assert profile is not None and profile.total_calls > 0
+    output = io.StringIO()
+    collector.dump(output)
+    record = json.loads(output.getvalue())
+    assert record['stats']['decode']['Swimming']['count'] == 1
+    collector.reset()
+    assert instrumentation.stats()['decode'] == {}
+
+
+def test_periodic_dump():
+    output = io.StringIO()
+    instrumentation.enable(dump_interval=0.01, output=output)
+    run_pipeline()
+    time.sleep(0.05)
+    instrumentation.disable()
+    assert output.getvalue().count('\n') >= 1
+
+
+def test_stage_percentile():
+    stats = instrumentation.StageStats()
+    for elapsed in (100, 200, 400, 10000):
+        stats.add(elapsed)
+    assert stats.percentile(0.5) == 256
+    assert stats.percentile(1.0) == 10000
+    stats.add(3000, items=3)
+    assert stats.count == 7 and stats.min_ns == 100
+
+
+def test_handle_line_and_threads_are_counted(collector):
+    streaming.handle_line('RUN,1206,12,6')
+    assert instrumentation.stats()['decode']['Running']['count'] == 1, (
+        'Импортированный по имени read_package тоже должен учитываться'
+    )
+    collector.reset()
+    packages = [('RUN', [1206, 12, 6])] * 2000
+    threaded.compute_messages(packages, workers=8, chunk_size=10)
+    stats = instrumentation.stats()
+    assert stats['decode']['Running']['count'] == 2000
+    assert stats['compute']['Running']['count'] == 2000, (
+        'Счётчики не должны теряться при работе из потоков'
+    )
+
+
+def test_threaded_render_is_counted(collector):
+    output = io.StringIO()
+    lines = ['RUN,1206,12,6\n'] * 3
+    threaded.process_threaded(iter(lines), output, workers=2, chunk_size=2)
+    render = instrumentation.stats()['render']
+    assert render['block']['count'] == 3, (
+        'render_block, импортированный в parallel по имени, должен '
+        'учитываться'
+    )
+
+
+def test_stats_rejected_for_worker_processes():
+    with pytest.raises(SystemExit):
+        cli.parse_args(['packages.csv', '--stats', '--workers', '4'])
+    assert cli.parse_args(
+        ['packages.csv', '--stats', '--workers', '4', '--threads']).stats
@@ -0,0 +1,76 @@
+import io
+from collections import Counter
+
+import pytest
+
+import homework
+import loadgen
+import streaming
+
+
+def test_packages_are_reproducible():
+    generator = loadgen.LoadGenerator(seed=3)
+    packages = list(generator.packages(500))
+    assert packages == list(loadgen.LoadGenerator(seed=3).packages(500)), (
+        'Пакеты должны воспроизводиться по seed'
+    )
+    assert packages != list(loadgen.LoadGenerator(seed=4).packages(500))
+
+
+def test_read_package_stress():
+    generator = loadgen.LoadGenerator(seed=1, malformed=0.1)
+    rejected = 0
+    for workout_type, data in generator.packages(20000):
+        error = homework.check_package(workout_type, data)
+        if error is not None:
+            rejected += 1
+            with pytest.raises(homework.PackageError):
+                homework.read_package(workout_type, data)
+            continue
+        info = homework.read_package(workout_type, data).show_training_info()
+        assert info.distance > 0 and info.calories > 0, (
+            'Корректные пакеты должны давать правдоподобные показатели'
+        )
+    assert 1600 < rejected < 2400, (
+        'Доля испорченных пакетов должна соответствовать `malformed`'
+    )
+
+
+def test_mix():
+    generator = loadgen.LoadGenerator(mix={'RUN': 3, 'CYC': 1})
+    counts = Counter(workout_type for workout_type, _ in
+                     generator.packages(4000))
+    assert set(counts) == {'RUN', 'CYC'}
+    assert 2.5 < counts['RUN'] / counts['CYC'] < 3.5
+    for mix in ({'BIKE': 1}, {'RUN': -1}, {}):
+        with pytest.raises(ValueError):
+            loadgen.LoadGenerator(mix=mix)
+    with pytest.raises(ValueError):
+        loadgen.LoadGenerator(malformed=2)
+
+
+@pytest.mark.parametrize('fmt', loadgen.RENDERERS)
+@pytest.mark.parametrize('unique', [True, False])
+def test_write_is_readable(fmt, unique):
+    generator = loadgen.LoadGenerator(seed=2, malformed=0.05, pool_size=256)
+    output = io.BytesIO()
+    written = generator.write(output, 1000, fmt, unique)
+    assert written == len(output.getvalue())
+    lines = output.getvalue().decode('utf-8').splitlines(keepends=True)
+    assert len(lines) == 1000
+    errors = []
+    messages = list(streaming.iter_messages(
+        streaming.iter_packages(lines, fmt), errors))
+    assert len(messages) + len(errors) == 1000 and errors
+    if not unique:
+        pool = set(generator.lines(256, fmt))
+        assert set(lines) <= pool, 'Строки должны браться из пула'
+
+
+def test_main(tmp_path):
+    path = tmp_path / 'packages.jsonl'
+    assert loadgen.main(
+        [str(path), '--count', '50', '--mix', 'SWM', '--seed', '5']) == 0
+    packages = list(streaming.iter_packages(path.open(encoding='utf-8')))
+    assert packages == list(
+        loadgen.LoadGenerator(5, {'SWM': 1}).packages(50))
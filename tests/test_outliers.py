@@ -0,0 +1,166 @@
+import io
+import json
+import math
+
+import pytest
+from conftest import Capturing
+
+import cli
+import homework
+import loadgen
+import outliers
+import streaming
+
+BROKEN = [
+    ('SWM', [720, 1, 80, 25, 4000]),
+    ('RUN', [15000000, 1, 75]),
+    ('WLK', [9000, 1, 75, 1]),
+]
+
+
+def clean_messages(count=20000, seed=0):
+    return [
+        homework.read_package(workout_type, data).show_training_info()
+        for workout_type, data in loadgen.LoadGenerator(seed).packages(count)
+    ]
+
+
+def info_of(workout_type, data):
+    return homework.read_package(workout_type, data).show_training_info()
+
+
+def test_clean_stream_passes():
+    messages = clean_messages()
+    outlier_filter = outliers.OutlierFilter()
+    assert list(outlier_filter.filter(messages)) == messages, (
+        'Фильтр не должен отбраковывать правдоподобные тренировки'
+    )
+    assert outlier_filter.stats.to_dict() == {
+        'seen': len(messages), 'passed': len(messages), 'rejected': 0,
+        'reasons': {}}
+    fences = outlier_filter.fences('Running')
+    assert set(fences) == set(outliers.DEFAULT_METRICS)
+    assert outlier_filter.fences('Rowing') is None
+
+
+@pytest.mark.parametrize('package, reason', [
+    (BROKEN[0], 'limit:speed'),
+    (BROKEN[1], 'limit:distance'),
+    (BROKEN[2], 'limit:calories'),
+])
+def test_limits(package, reason):
+    outlier_filter = outliers.OutlierFilter()
+    assert reason in outlier_filter.check(info_of(*package))
+    assert outlier_filter.stats.rejected == 1
+
+
+def test_non_finite_and_custom_limits():
+    outlier_filter = outliers.OutlierFilter(
+        limits={'RUN': {'speed': (0, 8)}, '*': {'duration': (0, 3)}})
+    assert outlier_filter.check(
+        homework.InfoMessage('Running', 1, 9, math.nan, 500)) == (
+        'non_finite:speed',)
+    assert outlier_filter.check(info_of('RUN', [15000, 1, 75])) == (
+        'limit:speed',)
+    assert outlier_filter.check(info_of('SWM', [720, 4, 80, 25, 40])) == (
+        'limit:duration',)
+    assert outlier_filter.stats.by_reason() == {
+        'non_finite:speed': 1, 'limit:speed': 1, 'limit:duration': 1}
+
+
+@pytest.mark.parametrize('scale', outliers.SCALES)
+def test_robust_statistics_learn_per_type(scale):
+    outlier_filter = outliers.OutlierFilter(scale=scale, warmup=50)
+    for info in clean_messages(4000, seed=1):
+        outlier_filter.check(info)
+    # Вдвое быстрее любого бега в выборке, но в физических пределах.
+    fast = info_of('RUN', [30000, 1, 75])
+    assert 'outlier:speed' in outlier_filter.check(fast)
+    walking = info_of('WLK', [9000, 1, 75, 180])
+    assert outlier_filter.check(walking) == ()
+    counters = outlier_filter.stats.reasons
+    assert counters['Running', 'outlier:speed'] == 1
+
+
+def test_fences_ignore_absurd_values():
+    outlier_filter = outliers.OutlierFilter(warmup=20, sample=1)
+    broken = info_of('SWM', [720, 1, 80, 25, 4000])
+    for info in clean_messages(2000, seed=2):
+        outlier_filter.check(info)
+        outlier_filter.check(broken)
+    low, high = outlier_filter.fences('Swimming')['speed']
+    assert high < 10, (
+        'Значения вне пределов не должны попадать в статистику'
+    )
+    assert outlier_filter.stats.reasons['Swimming', 'limit:speed'] == 2000
+
+
+def test_flag_mode_keeps_messages():
+    flagged = []
+    messages = clean_messages(500) + [info_of(*package) for package in BROKEN]
+    outlier_filter = outliers.OutlierFilter(
+        mode='flag', on_flag=lambda info, reasons: flagged.append(reasons))
+    assert list(outlier_filter(messages)) == messages
+    assert len(flagged) == 3 and outlier_filter.stats.rejected == 3
+    dropping = outliers.OutlierFilter()
+    assert list(dropping(messages)) == messages[:500]
+
+
+def test_merge():
+    messages = clean_messages(6000, seed=3)
+    whole = outliers.OutlierFilter(sample=1)
+    first, second = (outliers.OutlierFilter(sample=1) for _ in range(2))
+    for info in messages:
+        whole.check(info)
+    for info in messages[:3000]:
+        first.check(info)
+    for info in messages[3000:]:
+        second.check(info)
+    first.merge(second)
+    assert first.stats.seen == 6000
+    assert first.fences('Running') == whole.fences('Running'), (
+        'Слитые скетчи должны давать те же границы'
+    )
+
+
+@pytest.mark.parametrize('options', [
+    {'mode': 'skip'},
+    {'scale': 'sqrt'},
+    {'fence': 0},
+    {'sample': 0},
+    {'metrics': ['weight']},
+    {'limits': {'BIKE': {'speed': (0, 1)}}},
+    {'limits': {'RUN': {'weight': (0, 1)}}},
+    {'limits': {'RUN': {'speed': (5, 1)}}},
+])
+def test_invalid_options(options):
+    with pytest.raises(ValueError):
+        outliers.OutlierFilter(**options)
+
+
+def test_streaming_stage_and_cli(tmp_path):
+    path = tmp_path / 'packages.csv'
+    with open(path, 'wb') as output:
+        loadgen.LoadGenerator(seed=4).write(output, 300)
+    with open(path, 'a', encoding='utf-8') as output:
+        for workout_type, data in BROKEN:
+            output.write(','.join(map(str, [workout_type, *data])) + '\n')
+    clean = io.StringIO()
+    with open(path, encoding='utf-8') as stream:
+        lines = stream.readlines()
+    streaming.process(iter(lines[:300]), clean)
+    output = io.StringIO()
+    outlier_filter = outliers.OutlierFilter()
+    assert streaming.process(
+        iter(lines), output, stage=outlier_filter) == 300
+    assert output.getvalue() == clean.getvalue()
+    config = tmp_path / 'outliers.json'
+    config.write_text(json.dumps(
+        {'limits': {'RUN': {'speed': [0, 50]}}, 'mode': 'flag'}),
+        encoding='utf-8')
+    with Capturing() as report:
+        assert cli.run([str(path), '--outliers', 'drop',
+                        '--outlier-config', str(config)]) == 0
+    assert report == clean.getvalue().splitlines()
+    with pytest.raises(SystemExit):
+        cli.parse_args([str(path), '--outliers', 'drop', '--workers', '2'])
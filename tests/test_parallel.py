@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from conftest import Capturing
+
+import cli
+import parallel
+import streaming
+
+LINES = [
+    'SWM,720,1,80,25,40\n',
+    'RUN,1206,12,6\n',
+    'WLK,9000,1.5,75,180\n',
+    'WLK,3000.33,2.512,75.8,180.1\n',
+    'RUN,15000,1,75\n',
+] * 20
+
+
+def serial_report():
+    output = io.StringIO()
+    streaming.process(iter(LINES), output)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize('size, expected', [
+    (2, [2, 2, 1]), (5, [5]), (10, [5]),
+])
+def test_iter_chunks(size, expected):
+    chunks = list(parallel.iter_chunks(range(5), size))
+    assert [len(chunk) for chunk in chunks] == expected
+    with pytest.raises(ValueError):
+        list(parallel.iter_chunks(range(5), 0))
+
+
+def test_process_chunk():
+    block, count = parallel.process_chunk(LINES[:5], 'csv')
+    assert count == 5
+    assert block == serial_report()[:len(block)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_process_parallel_ordered(chunk_size):
+    output = io.StringIO()
+    count = parallel.process_parallel(
+        iter(LINES), output, workers=2, chunk_size=chunk_size)
+    assert count == len(LINES)
+    assert output.getvalue() == serial_report(), (
+        'Параллельный отчёт должен совпадать с последовательным'
+    )
+
+
+def test_process_parallel_unordered():
+    output = io.StringIO()
+    parallel.process_parallel(
+        iter(LINES), output, 'csv', workers=3, chunk_size=3, ordered=False)
+    assert sorted(output.getvalue().splitlines()) == sorted(
+        serial_report().splitlines())
+
+
+def test_cli_workers(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text(''.join(LINES), encoding='utf-8')
+    with Capturing() as output:
+        cli.run([str(path), '--workers', '2', '--chunk-size', '8'])
+    assert output == serial_report().splitlines()
@@ -0,0 +1,155 @@
+import json
+import os
+
+import pytest
+import conftest
+from conftest import PerfBaseline, PerfRecorder, measure, perf_environment
+
+import homework
+import loadgen
+import streaming
+from benchmarks.suite import SAMPLE_PACKAGES
+
+END_TO_END_SIZE = 20000
+
+
+@pytest.fixture(scope='module')
+def packages_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('perf') / 'packages.csv'
+    with open(path, 'wb') as output:
+        loadgen.LoadGenerator(seed=0).write(output, END_TO_END_SIZE)
+    return path
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize('workout_type', list(SAMPLE_PACKAGES))
+def test_read_package(perf, workout_type):
+    data = SAMPLE_PACKAGES[workout_type]
+    perf(lambda: homework.read_package(workout_type, data))
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize('workout_type', list(SAMPLE_PACKAGES))
+def test_show_training_info(perf, workout_type):
+    training = homework.read_package(
+        workout_type, SAMPLE_PACKAGES[workout_type])
+    perf(training.show_training_info)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize('workout_type', list(SAMPLE_PACKAGES))
+def test_get_message(perf, workout_type):
+    info = homework.read_package(
+        workout_type, SAMPLE_PACKAGES[workout_type]).show_training_info()
+    perf(info.get_message)
+
+
+@pytest.mark.perf
+def test_end_to_end(perf, packages_file):
+    def run():
+        with open(packages_file, encoding='utf-8') as stream, \
+                open(os.devnull, 'w', encoding='utf-8') as output:
+            streaming.process(stream, output)
+
+    perf(run, items=END_TO_END_SIZE)
+
+
+def entry(ops_per_sec, peak_bytes=10000):
+    return {'ops_per_sec': ops_per_sec, 'peak_bytes': peak_bytes}
+
+
+def write_baseline(path, entries, environment=None):
+    path.write_text(json.dumps({
+        'version': 1,
+        'environment': environment or perf_environment(),
+        'entries': entries,
+    }), encoding='utf-8')
+
+
+@pytest.mark.parametrize('measurement, regressions', [
+    (entry(1000), 0),
+    (entry(760), 0),
+    (entry(700), 1),
+    (entry(1000, 13000), 1),
+    (entry(500, 20000), 2),
+])
+def test_baseline_tolerances(tmp_path, measurement, regressions):
+    path = tmp_path / 'baseline.json'
+    write_baseline(path, {'case': entry(1000)})
+    baseline = PerfBaseline(path, tolerance=0.25, alloc_tolerance=0.1)
+    assert len(baseline.check('case', measurement)) == regressions, (
+        'Регрессией считается выход за допуск по скорости или памяти'
+    )
+    assert baseline.check('new', entry(1)) == [], (
+        'Замер без базового уровня не может быть регрессией'
+    )
+
+
+def test_micro_tolerance(tmp_path):
+    path = tmp_path / 'baseline.json'
+    write_baseline(path, {'micro': {**entry(1000), 'call_ns': 500},
+                          'macro': {**entry(1000), 'call_ns': 10 ** 7}})
+    baseline = PerfBaseline(path, tolerance=0.25, micro_tolerance=0.5)
+    assert baseline.check('micro', entry(600)) == [], (
+        'Для коротких вызовов действует более широкий допуск'
+    )
+    assert len(baseline.check('micro', entry(400))) == 1
+    assert len(baseline.check('macro', entry(600))) == 1
+
+
+def test_recorder_remeasures(tmp_path, monkeypatch):
+    path = tmp_path / 'baseline.json'
+    write_baseline(path, {'case': entry(1000)})
+    baseline = PerfBaseline(path)
+    series = iter([entry(500), entry(900), entry(300)])
+    monkeypatch.setattr(
+        conftest, 'measure',
+        lambda func, items: {**next(series), 'call_ns': 10 ** 6})
+    result = PerfRecorder(baseline, 'case')(lambda: None)
+    assert result['ops_per_sec'] == 900, (
+        'Выброс должен перемеряться, и сверяется лучший замер'
+    )
+    assert baseline.regressions == []
+    series = iter([entry(2000), entry(1500), entry(2500)])
+    recorded = PerfRecorder(baseline, 'new')(lambda: None)
+    assert recorded['ops_per_sec'] == 2500, (
+        'Новый базовый уровень — лучший из нескольких замеров'
+    )
+
+
+def test_baseline_save_and_update(tmp_path):
+    path = tmp_path / 'baseline.json'
+    baseline = PerfBaseline(path)
+    baseline.check('case', entry(1000))
+    assert baseline.save()
+    assert not path.with_name('baseline.json.tmp').exists()
+    saved = PerfBaseline(path)
+    assert saved.entries == {'case': entry(1000)}
+    saved.check('case', entry(2000))
+    assert not saved.save(), (
+        'Без --perf-update старые замеры не должны перезаписываться'
+    )
+    updated = PerfBaseline(path, update=True)
+    assert updated.check('case', entry(10)) == []
+    assert updated.save()
+    assert PerfBaseline(path).entries == {'case': entry(10)}
+
+
+def test_baseline_other_environment(tmp_path):
+    path = tmp_path / 'baseline.json'
+    write_baseline(path, {'case': entry(1000)}, {'machine': 'other'})
+    baseline = PerfBaseline(path)
+    assert not baseline.comparable
+    assert baseline.check('case', entry(1)) == [], (
+        'Замеры с другой машины не должны сравниваться'
+    )
+    assert not baseline.save()
+    path.write_text(json.dumps({'version': 99}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        PerfBaseline(path)
+
+
+def test_measure():
+    result = measure(lambda: bytearray(100000), items=10, repeat=1)
+    assert result['ops_per_sec'] > 0
+    assert result['peak_bytes'] >= 100000
@@ -0,0 +1,230 @@
+import json
+import os
+
+import pytest
+
+import archive
+import homework
+import loadgen
+import recompute
+
+ATHLETES = ['anna', 'boris', 'vera', 'gleb', 'dina']
+START = 1704067200
+
+
+def make_source(path, count=600):
+    generator = loadgen.LoadGenerator(seed=4, malformed=0.05)
+    with open(path, 'w', encoding='utf-8') as output:
+        for index, (workout_type, data) in enumerate(
+                generator.packages(count)):
+            output.write(json.dumps({
+                'athlete': ATHLETES[index % len(ATHLETES)],
+                'timestamp': START + index * 3600,
+                'workout_type': workout_type, 'data': data,
+            }) + '\n')
+        output.write('not json\n')
+    return str(path)
+
+
+def expected_records(source):
+    result = []
+    with open(source, encoding='utf-8') as stream:
+        for line in stream:
+            try:
+                athlete, timestamp, workout_type, data = (
+                    recompute.parse_record(line))
+                training = homework.read_package(workout_type, data)
+            except ValueError:
+                continue
+            result.append(
+                (athlete, timestamp, training.show_training_info()))
+    return sorted(result, key=lambda record: record[:2])
+
+
+def collected_records(coordinator):
+    result = []
+    for path in coordinator.outputs():
+        with archive.ArchiveReader(path) as reader:
+            result.extend(reader.records())
+    return sorted(result, key=lambda record: record[:2])
+
+
+def flaky_runner(shard):
+    if shard.index == 1 and shard.attempt == 0:
+        raise RuntimeError('узел недоступен')
+    return recompute.run_shard(shard)
+
+
+def crashing_runner(shard):
+    if shard.index == 2 and shard.attempt == 0:
+        os._exit(1)
+    return recompute.run_shard(shard)
+
+
+def dying_runner(shard):
+    state = recompute.run_shard(shard)
+    if shard.index == 1 and shard.attempt == 0:
+        os._exit(1)
+    return state
+
+
+def broken_runner(shard):
+    if shard.index == 2:
+        raise RuntimeError('шард повреждён')
+    return recompute.run_shard(shard)
+
+
+@pytest.fixture
+def source(tmp_path):
+    return make_source(tmp_path / 'packages.jsonl')
+
+
+@pytest.mark.parametrize('by', recompute.PARTITIONS)
+def test_recompute_matches_serial(source, tmp_path, by):
+    coordinator = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=4, by=by, workers=2)
+    report = coordinator.run()
+    expected = expected_records(source)
+    assert (report.completed, report.skipped, report.failed) == (4, 0, [])
+    assert report.records == len(expected) and report.errors > 0
+    assert collected_records(coordinator) == expected, (
+        'Шарды вместе должны дать те же записи, что и последовательный '
+        'пересчёт'
+    )
+    again = coordinator.run()
+    assert (again.completed, again.skipped) == (0, 4), (
+        'Готовые шарды не должны пересчитываться'
+    )
+    assert again.records == report.records
+
+
+def test_athlete_partition_keeps_history_together(source, tmp_path):
+    coordinator = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=3, by='athlete', workers=2)
+    coordinator.run()
+    owners = {}
+    for index, path in enumerate(coordinator.outputs()):
+        with archive.ArchiveReader(path) as reader:
+            for athlete in reader.athletes:
+                assert owners.setdefault(athlete, index) == index
+
+
+def test_range_bounds_cover_file(source):
+    bounds = recompute.range_bounds(source, 7)
+    lines = [line for start, end in bounds
+             for line in recompute.iter_range(source, start, end)]
+    with open(source, encoding='utf-8') as stream:
+        assert lines == stream.readlines()
+
+
+@pytest.mark.parametrize('runner', [flaky_runner, crashing_runner])
+def test_failed_shards_are_retried(source, tmp_path, runner):
+    coordinator = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=4, workers=2, runner=runner)
+    report = coordinator.run()
+    assert report.failed == [] and report.completed == 4
+    assert 1 <= report.retried < 4, (
+        'Повторяться должны только упавшие шарды'
+    )
+    assert collected_records(coordinator) == expected_records(source)
+
+
+def test_finished_shards_survive_broken_pool(source, tmp_path):
+    coordinator = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=4, workers=2,
+        runner=dying_runner)
+    report = coordinator.run()
+    assert report.failed == [] and report.completed == 4
+    shard = coordinator.plan()[1]
+    assert recompute.read_checkpoint(shard)['attempt'] == 0, (
+        'Шард с записанной контрольной точкой не должен повторяться '
+        'после гибели пула'
+    )
+    assert collected_records(coordinator) == expected_records(source)
+
+
+def test_changed_source_is_recomputed(source, tmp_path):
+    workdir = str(tmp_path / 'work')
+    recompute.Coordinator(source, workdir, shards=3, workers=2).run()
+    with open(source, 'a', encoding='utf-8') as output:
+        output.write(json.dumps({
+            'athlete': 'anna', 'timestamp': START - 3600,
+            'workout_type': 'RUN', 'data': [15000, 1, 75]}) + '\n')
+    coordinator = recompute.Coordinator(source, workdir, shards=3,
+                                        workers=2)
+    report = coordinator.run()
+    assert (report.completed, report.skipped) == (3, 0), (
+        'Изменённый исходник должен пересчитываться заново'
+    )
+    assert collected_records(coordinator) == expected_records(source)
+
+
+@pytest.mark.parametrize('by', recompute.PARTITIONS)
+def test_bad_athlete_and_timestamp_are_errors(tmp_path, by):
+    source = tmp_path / 'packages.jsonl'
+    records = [
+        {'athlete': 'anna', 'timestamp': '2024-03-01',
+         'workout_type': 'RUN', 'data': [15000, 1, 75]},
+        {'athlete': 7, 'timestamp': START,
+         'workout_type': 'RUN', 'data': [15000, 1, 75]},
+        {'athlete': 'anna', 'timestamp': START,
+         'workout_type': 'RUN', 'data': [15000, 1, 75]},
+    ]
+    source.write_text(''.join(json.dumps(record) + '\n'
+                              for record in records), encoding='utf-8')
+    coordinator = recompute.Coordinator(
+        str(source), str(tmp_path / 'work'), shards=1, by=by, workers=1)
+    report = coordinator.run()
+    assert (report.completed, report.failed) == (1, [])
+    assert (report.records, report.errors) == (1, 2), (
+        'Записи с неверным спортсменом или временем должны считаться '
+        'ошибками, а не ронять шард'
+    )
+    assert collected_records(coordinator) == expected_records(str(source))
+
+
+def test_failed_shard_is_reported(source, tmp_path):
+    coordinator = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=4, workers=2, retries=1,
+        runner=broken_runner)
+    report = coordinator.run()
+    assert report.failed == [2] and report.completed == 3
+    assert len(coordinator.outputs()) == 3
+    repaired = recompute.Coordinator(
+        source, str(tmp_path / 'work'), shards=4, workers=2)
+    report = repaired.run()
+    assert (report.completed, report.skipped) == (1, 3)
+
+
+def test_overrides_invalidate_checkpoints(source, tmp_path, monkeypatch):
+    workdir = str(tmp_path / 'work')
+    recompute.Coordinator(source, workdir, shards=2, workers=2).run()
+    overrides = {'RUN': {'CALORIES_MEAN_SPEED_SHIFT': 2.5}}
+    coordinator = recompute.Coordinator(
+        source, workdir, shards=2, workers=2, overrides=overrides)
+    report = coordinator.run()
+    assert (report.completed, report.skipped) == (2, 0)
+    assert homework.Running.CALORIES_MEAN_SPEED_SHIFT != 2.5, (
+        'Константы должны меняться только на узлах'
+    )
+    monkeypatch.setattr(homework.Running, 'CALORIES_MEAN_SPEED_SHIFT', 2.5)
+    assert collected_records(coordinator) == expected_records(source)
+    with pytest.raises(ValueError):
+        recompute.Coordinator(source, workdir, overrides={'BIKE': {}})
+    for constants in ({'CALORIES_MEAN_SPEED_SHIF': 2.5}, {'FIELDS': 1.0},
+                      {'FORMULAS': 1.0}, {'CODE': 1.0}):
+        with pytest.raises(ValueError, match='нет константы'):
+            recompute.Coordinator(source, workdir,
+                                  overrides={'RUN': constants})
+    with pytest.raises(ValueError, match='должно быть числом'):
+        recompute.Coordinator(
+            source, workdir,
+            overrides={'RUN': {'CALORIES_MEAN_SPEED_SHIFT': '2.5'}})
+
+
+def test_main(source, tmp_path, capsys):
+    assert recompute.main([
+        source, str(tmp_path / 'work'), '--shards', '2', '--workers', '1',
+        '--set', 'WLK.CALORIES_SPEED_HEIGHT_MULTIPLIER=0.03']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report['shards'] == 2 and report['failed'] == []
@@ -0,0 +1,129 @@
+import time
+
+import pytest
+
+import batch
+import homework
+import segments
+
+
+def constant_pace(total, seconds, step=1):
+    timestamps = list(range(0, seconds + 1, step))
+    counts = [total * t / seconds for t in timestamps]
+    return timestamps, counts
+
+
+@pytest.mark.parametrize('workout_type, data, extra', [
+    ('RUN', [15000, 1, 75], {}),
+    ('WLK', [9000, 1.5, 75, 180], {'height': 180}),
+])
+def test_constant_pace_matches_package(workout_type, data, extra):
+    timestamps, counts = constant_pace(data[0], int(data[1] * 3600), 60)
+    workout = segments.SegmentedWorkout(
+        workout_type, timestamps, counts, data[2], **extra)
+    expected = homework.read_package(workout_type, data).show_training_info()
+    info = workout.show_training_info()
+    assert info.training_type == expected.training_type
+    for field in ('duration', 'distance', 'speed', 'calories'):
+        assert getattr(info, field) == pytest.approx(
+            getattr(expected, field)), (
+            'При ровном темпе итог должен совпадать с расчётом по пакету'
+        )
+    assert info.get_message() == expected.get_message()
+
+
+def test_swimming_constant_pace():
+    timestamps, strokes = constant_pace(720, 3600, 90)
+    laps = [40 * t / 3600 for t in timestamps]
+    workout = segments.SegmentedWorkout(
+        'SWM', timestamps, strokes, 80, length_pool=25, laps=laps)
+    expected = homework.read_package(
+        'SWM', [720, 1, 80, 25, 40]).show_training_info()
+    assert workout.get_mean_speed() == pytest.approx(expected.speed)
+    assert workout.get_spent_calories() == pytest.approx(expected.calories)
+
+
+def test_variable_pace_differs_from_average():
+    timestamps = [0, 1800, 3600]
+    counts = [0, 3000, 15000]
+    workout = segments.SegmentedWorkout('RUN', timestamps, counts, 75)
+    parts = [
+        homework.Running(3000, 0.5, 75), homework.Running(12000, 0.5, 75)]
+    assert workout.get_spent_calories() == pytest.approx(
+        sum(part.get_spent_calories() for part in parts))
+    assert list(workout.segments().distance) == pytest.approx(
+        [part.get_distance() for part in parts])
+
+
+def test_non_cumulative_counts():
+    workout = segments.SegmentedWorkout(
+        'RUN', [0, 1800, 3600], [0, 3000, 12000], 75, cumulative=False)
+    assert workout.get_distance() == pytest.approx(15000 * 0.65 / 1000)
+
+
+@pytest.mark.parametrize('args, kwargs', [
+    (('BIKE', [0, 1], [0, 1], 75), {}),
+    (('RUN', [0], [0], 75), {}),
+    (('RUN', [0, 0], [0, 1], 75), {}),
+    (('WLK', [0, 1], [0, 1], 75), {}),
+    (('SWM', [0, 1], [0, 1], 75), {'length_pool': 25}),
+    (('SKI', [0, 1], [0, 1], 75), {}),
+    (('RUN', [0, 1, 2], [0, 5, 2], 75), {}),
+    (('RUN', [0, 1], [0, -1], 75), {'cumulative': False}),
+    (('SWM', [0, 1, 2], [0, 1, 2], 75),
+     {'length_pool': 25, 'laps': [0, 2, 1]}),
+    (('RUN', [0, 1], [0, 1], 75), {'counters': {'climb': [0, 1]}}),
+])
+def test_invalid_series(args, kwargs):
+    with pytest.raises(ValueError):
+        segments.SegmentedWorkout(*args, **kwargs)
+
+
+def test_registered_speed_formula():
+    homework.register_workout(
+        'AQU', 'AquaJogging', homework.Swimming.FIELDS,
+        {'speed': 'length_pool * count_pool / M_IN_KM / duration',
+         'calories': 'CALORIES_WEIGHT_MULTIPLIER * speed * weight'},
+        LEN_STEP=1.0, CALORIES_WEIGHT_MULTIPLIER=2)
+    try:
+        timestamps, strokes = constant_pace(720, 3600, 90)
+        laps = [40 * t / 3600 for t in timestamps]
+        workout = segments.SegmentedWorkout(
+            'AQU', timestamps, strokes, 80, length_pool=25, laps=laps)
+        expected = homework.read_package('AQU', [720, 1, 80, 25, 40])
+        assert workout.get_mean_speed() == pytest.approx(
+            expected.get_mean_speed()), (
+            'Скорость должна считаться формулой типа, а не по коду'
+        )
+    finally:
+        homework.unregister_workout('AQU')
+
+
+def test_skiing_counters():
+    timestamps, counts = constant_pace(9000, 5400, 60)
+    climbs = [300 * t / 5400 for t in timestamps]
+    workout = segments.SegmentedWorkout(
+        'SKI', timestamps, counts, 75, counters={'climb': climbs})
+    expected = homework.read_package('SKI', [9000, 1.5, 75, 300])
+    assert workout.get_spent_calories() == pytest.approx(
+        expected.get_spent_calories()), (
+        'Поля пакета сверх базовых должны браться из PACKAGE_FIELDS'
+    )
+
+
+def test_two_hour_trace_without_numpy(monkeypatch):
+    monkeypatch.setattr(batch, 'np', None)
+    timestamps, counts = constant_pace(20000, 7200)
+    workout = segments.SegmentedWorkout('RUN', timestamps, counts, 75)
+    expected = homework.Running(20000, 2, 75)
+    assert workout.get_spent_calories() == pytest.approx(
+        expected.get_spent_calories())
+
+
+@pytest.mark.skipif(batch.np is None, reason='NumPy не установлен')
+def test_two_hour_trace_is_fast():
+    timestamps, counts = constant_pace(20000, 7200)
+    start = time.perf_counter()
+    segments.SegmentedWorkout(
+        'WLK', timestamps, counts, 75, height=180).show_training_info()
+    assert time.perf_counter() - start < 0.05
@@ -0,0 +1,116 @@
+import asyncio
+
+import homework
+import server
+
+LINES = [
+    'SWM,720,1,80,25,40',
+    '["RUN", [1206, 12, 6]]',
+    'RUN,1206,0,6',
+    'not a package',
+    '{"workout_type": "WLK", "data": [9000, 1, 75, 180]}',
+]
+
+
+def expected(line):
+    return server.handle_line(line)[0]
+
+
+def test_handle_line():
+    response, ok = server.handle_line('RUN,1206,12,6')
+    assert ok and response == homework.read_package(
+        'RUN', [1206, 12, 6]).show_training_info().get_message()
+    response, ok = server.handle_line('RUN,1206,0,6')
+    assert not ok and response.startswith('ERROR: '), (
+        'Ошибочный пакет должен давать ответ с ошибкой, а не рвать поток'
+    )
+
+
+async def run_clients(clients, lines, **address):
+    responses = await asyncio.gather(*(
+        server.send_packages(lines, **address) for _ in range(clients)))
+    return responses
+
+
+def test_tcp_server_many_connections():
+    async def scenario():
+        package_server = server.PackageServer(read_size=64)
+        await package_server.start_tcp('127.0.0.1', 0)
+        host, port = package_server.address()[:2]
+        try:
+            return package_server, await run_clients(
+                200, LINES * 20, host=host, port=port)
+        finally:
+            await package_server.close()
+
+    package_server, responses = asyncio.run(scenario())
+    assert all(
+        response == [expected(line) for line in LINES * 20]
+        for response in responses
+    ), 'Ответы должны приходить по порядку для каждого соединения'
+    stats = package_server.stats
+    assert stats.connections == 200 and stats.active == 0
+    assert stats.packages == 200 * 100 and stats.errors == 200 * 40
+    assert stats.batches < stats.packages, (
+        'Строки должны обрабатываться микропачками'
+    )
+
+
+def test_unix_server_and_partial_last_line(tmp_path):
+    path = str(tmp_path / 'tracker.sock')
+
+    async def scenario():
+        package_server = server.PackageServer()
+        await package_server.start_unix(path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'RUN,1206,12,6\nSWM,720,1,80,25,40')
+            writer.write_eof()
+            data = await reader.read()
+            writer.close()
+            return data.decode('utf-8').splitlines()
+        finally:
+            await package_server.close()
+
+    assert asyncio.run(scenario()) == [
+        expected('RUN,1206,12,6'), expected('SWM,720,1,80,25,40')]
+
+
+def test_line_too_long():
+    async def scenario():
+        package_server = server.PackageServer(max_line=100)
+        await package_server.start_tcp('127.0.0.1', 0)
+        host, port = package_server.address()[:2]
+        try:
+            return await server.send_packages(
+                ['RUN' * 1000, 'RUN,1206,12,6'], host, port)
+        finally:
+            await package_server.close()
+
+    assert asyncio.run(scenario()) == [
+        server.LINE_TOO_LONG, expected('RUN,1206,12,6')]
+
+
+def test_line_too_long_without_newline():
+    async def scenario(payload):
+        package_server = server.PackageServer(read_size=256, max_line=1000)
+        await package_server.start_tcp('127.0.0.1', 0)
+        host, port = package_server.address()[:2]
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(payload)
+            writer.write_eof()
+            data = await reader.read()
+            writer.close()
+            return data.decode('utf-8').splitlines()
+        finally:
+            await package_server.close()
+
+    long_tail = b'RUN,15000,1,75\n' + b'9' * 5000
+    assert asyncio.run(scenario(long_tail)) == [
+        expected('RUN,15000,1,75'), server.LINE_TOO_LONG], (
+        'На слишком длинную строку нужен один ответ после предыдущих строк'
+    )
+    assert asyncio.run(scenario(long_tail + b'\nRUN,1206,12,6\n')) == [
+        expected('RUN,15000,1,75'), server.LINE_TOO_LONG,
+        expected('RUN,1206,12,6')]
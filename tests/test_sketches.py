@@ -0,0 +1,125 @@
+import math
+import random
+
+import pytest
+
+import homework
+import loadgen
+import sketches
+
+MESSAGES = [
+    homework.read_package(*package).show_training_info()
+    for package in loadgen.LoadGenerator(seed=7).packages(6000)
+]
+
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[math.floor(q * (len(values) - 1))]
+
+
+@pytest.fixture(scope='module')
+def distributions():
+    distributions = sketches.Distributions()
+    for info in MESSAGES:
+        distributions.add(info)
+    return distributions
+
+
+@pytest.mark.parametrize('metric', sketches.METRICS)
+@pytest.mark.parametrize('training_type', ['Running', 'SportsWalking',
+                                           'Swimming', None])
+def test_relative_error(distributions, metric, training_type):
+    values = [getattr(info, metric) for info in MESSAGES
+              if training_type in (None, info.training_type)]
+    for q, estimate in distributions.quantiles(
+            metric, training_type, (0, 0.5, 0.95, 0.99, 1)).items():
+        exact = exact_quantile(values, q)
+        assert abs(estimate - exact) <= 0.01 * abs(exact) + 1e-12, (
+            f'Квантиль {q} должен быть точен до 1 %'
+        )
+
+
+def test_negative_and_zero_values():
+    sketch = sketches.QuantileSketch(0.02)
+    values = [random.Random(index).uniform(-100, 100) for index in range(999)]
+    values.append(0.0)
+    for value in values:
+        sketch.add(value)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.02 * abs(exact)
+    assert math.isnan(sketches.QuantileSketch().quantile(0.5))
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+
+
+def test_non_finite_values_are_counted():
+    distributions = sketches.Distributions()
+    info = distributions.add_package('RUN', [15000, 1e-308, 75])
+    assert math.isinf(info.speed)
+    distributions.add(homework.InfoMessage(
+        'Running', 1.0, math.nan, 10.0, 100.0))
+    speed = distributions.sketch('speed', 'Running')
+    assert (speed.count, speed.non_finite) == (1, 1), (
+        'Бесконечности не должны попадать в квантили'
+    )
+    assert speed.quantile(0.5) == pytest.approx(10.0, rel=0.01)
+    assert len(distributions.histograms['Running', 'speed']) == 1
+    assert distributions.sketch('distance', 'Running').non_finite == 1
+    restored = sketches.Distributions.from_dict(distributions.to_dict())
+    assert restored.sketch('speed', 'Running').non_finite == 1
+
+
+def test_merge_matches_single_stream(distributions):
+    workers = [sketches.Distributions() for _ in range(3)]
+    for index, info in enumerate(MESSAGES):
+        workers[index % 3].add(info)
+    merged = sketches.Distributions()
+    for worker in workers:
+        merged.merge(sketches.Distributions.from_dict(worker.to_dict()))
+    for key, sketch in distributions.sketches.items():
+        assert merged.sketches[key].positive == sketch.positive, (
+            'Слияние должно давать те же корзины, что и один поток'
+        )
+        assert merged.histograms[key].counts == (
+            distributions.histograms[key].counts)
+
+
+def test_snapshot_restore(distributions, tmp_path):
+    path = str(tmp_path / 'sketches.json')
+    distributions.snapshot(path)
+    restored = sketches.Distributions.restore(path)
+    for metric in sketches.METRICS:
+        assert restored.quantiles(metric, 'Running') == (
+            distributions.quantiles(metric, 'Running'))
+    assert restored.training_types() == (
+        'Running', 'SportsWalking', 'Swimming')
+
+
+def test_bounded_memory():
+    sketch = sketches.QuantileSketch(0.01, max_bins=64)
+    values = [10 ** (index / 1000) for index in range(6000)]
+    for value in values:
+        sketch.add(value)
+    assert len(sketch.positive) <= 64
+    assert len(sketch) == len(values)
+    for q in (0.95, 0.99):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+
+
+def test_histogram():
+    histogram = sketches.Histogram([0, 10, 20])
+    for value in (-1, 0, 5, 10, 25, 20):
+        histogram.add(value)
+    assert histogram.counts == [1, 2, 1, 2]
+    other = sketches.Histogram.from_dict(histogram.to_dict())
+    histogram.merge(other)
+    assert histogram.counts == [2, 4, 2, 4] and len(histogram) == 12
+    with pytest.raises(ValueError):
+        histogram.merge(sketches.Histogram([0, 10]))
+    with pytest.raises(ValueError):
+        sketches.Histogram([1, 1])
+    with pytest.raises(ValueError):
+        sketches.QuantileSketch(0.01).merge(sketches.QuantileSketch(0.02))
@@ -0,0 +1,168 @@
+import io
+import itertools
+import subprocess
+import sys
+
+import pytest
+from conftest import Capturing
+
+import cli
+import homework
+import streaming
+from conftest import BASE_DIR
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [1206, 12, 6]),
+    ('WLK', [3000.33, 2.512, 75.8, 180.1]),
+]
+JSONL = (
+    '["SWM", [720, 1, 80, 25, 40]]\n'
+    '\n'
+    '{"workout_type": "RUN", "data": [1206, 12, 6]}\n'
+    '["WLK", [3000.33, 2.512, 75.8, 180.1]]\n'
+)
+CSV = (
+    'SWM,720,1,80,25,40\n'
+    'RUN,1206,12,6\n'
+    '\n'
+    'WLK,3000.33,2.512,75.8,180.1\n'
+)
+
+
+def expected_lines():
+    with Capturing() as output:
+        for workout_type, data in PACKAGES:
+            homework.main(homework.read_package(workout_type, data))
+    return output
+
+
+@pytest.mark.parametrize('text, fmt', [
+    (JSONL, 'jsonl'), (JSONL, None), (CSV, 'csv'), (CSV, None),
+])
+def test_iter_packages(text, fmt):
+    packages = list(streaming.iter_packages(io.StringIO(text), fmt))
+    assert packages == PACKAGES, (
+        '`iter_packages` должна читать пакеты из JSON Lines и CSV'
+    )
+
+
+def test_iter_packages_is_lazy():
+    lines = itertools.cycle(['RUN,15000,1,75\n'])
+    first = list(itertools.islice(
+        streaming.iter_lines(streaming.iter_packages(lines)), 3))
+    assert len(first) == 3, (
+        'Потоковая обработка не должна читать весь поток заранее'
+    )
+
+
+def test_iter_packages_unknown_format():
+    with pytest.raises(ValueError):
+        list(streaming.iter_packages(io.StringIO(CSV), 'xml'))
+
+
+@pytest.mark.parametrize('text', [JSONL, CSV])
+def test_process(text):
+    output = io.StringIO()
+    count = streaming.process(io.StringIO(text), output)
+    assert count == len(PACKAGES)
+    assert output.getvalue().splitlines() == expected_lines(), (
+        'Потоковый отчёт должен совпадать с выводом `main`'
+    )
+
+
+def test_cli_run(tmp_path):
+    path = tmp_path / 'packages.csv'
+    path.write_text(CSV, encoding='utf-8')
+    with Capturing() as output:
+        assert cli.run([str(path)]) == 0
+    assert output == expected_lines()
+
+
+def test_serve_worker():
+    lines = CSV.splitlines(keepends=True) + ['RUN,1206,0,6\n']
+    output = io.StringIO()
+    assert streaming.serve_worker(io.StringIO(''.join(lines)), output) == 4
+    responses = output.getvalue().splitlines()
+    assert responses[:3] == expected_lines()
+    assert responses[3].startswith('ERROR: ')
+
+
+def test_worker_answers_each_line():
+    process = subprocess.Popen(
+        [sys.executable, 'homework.py', '--worker'], cwd=BASE_DIR,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        for line, expected in zip(CSV.split('\n\n'), [
+                expected_lines()[:2], expected_lines()[2:]]):
+            process.stdin.write(line.strip() + '\n')
+            process.stdin.flush()
+            responses = [process.stdout.readline().rstrip('\n')
+                         for _ in expected]
+            assert responses == expected, (
+                'Рабочий процесс должен отвечать, не дожидаясь конца потока'
+            )
+    finally:
+        process.stdin.close()
+        assert process.wait(timeout=10) == 0
+
+
+@pytest.mark.parametrize('argv, heavy', [
+    (['-c', 'import homework'], ()),
+    (['homework.py', 'packages.csv'], ()),
+    (['homework.py', 'packages.csv', '--format', 'csv'], ('argparse', 're')),
+])
+def test_startup_imports(tmp_path, argv, heavy):
+    (tmp_path / 'packages.csv').write_text(CSV, encoding='utf-8')
+    argv = [str(tmp_path / arg) if arg.endswith('.csv') else arg
+            for arg in argv]
+    if argv[0] == 'homework.py':
+        argv[0] = str(BASE_DIR / 'homework.py')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argv], cwd=BASE_DIR,
+        capture_output=True, text=True, check=True)
+    imported = {
+        line.split('|')[-1].strip() for line in result.stderr.splitlines()
+    }
+    lazy = {'typing', 're', 'dataclasses', 'argparse', 'json', 'csv', 'ast',
+            'numpy', 'asyncio', 'batch', 'formats', 'parallel',
+            'instrumentation', 'concurrent.futures'} - set(heavy)
+    assert not imported & lazy, (
+        'Простой запуск не должен импортировать необязательные модули'
+    )
+
+
+@pytest.mark.parametrize('text, fmt, index', [
+    ('RUN,1206,12,6\nRUN,12x,1,75\nRUN,1206,12,6\n', 'csv', 1),
+    ('["RUN", [1206, 12, 6]]\n{"data": [1]}\n', 'jsonl', 1),
+    ('not json\n["RUN", [1206, 12, 6]]\n', 'jsonl', 0),
+])
+def test_parse_errors(text, fmt, index):
+    with pytest.raises(homework.PackageError) as info:
+        list(streaming.iter_packages(io.StringIO(text), fmt))
+    assert info.value.index == index, (
+        'Ошибка разбора должна указывать номер пакета'
+    )
+    errors = []
+    messages = list(streaming.iter_messages(
+        streaming.iter_packages(io.StringIO(text), fmt, True), errors))
+    assert [error.index for error in errors] == [index]
+    assert len(messages) == len(text.splitlines()) - 1, (
+        'Ошибочная строка не должна прерывать поток'
+    )
+
+
+def test_cli_skip_errors(tmp_path, capsys):
+    path = tmp_path / 'packages.csv'
+    path.write_text(
+        'RUN,1206,0,6\nRUN,oops,1,75\n' + CSV, encoding='utf-8')
+    assert cli.run([str(path)]) == 1
+    assert capsys.readouterr().err.startswith('Ошибка в пакете 1: ')
+    assert cli.run([str(path), '--skip-errors']) == 1
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == expected_lines()
+    assert captured.err.splitlines()[1].startswith(
+        'Ошибка в пакете 2: Не удалось разобрать пакет')
+    assert captured.err.splitlines()[-1] == 'Пропущено ошибочных пакетов: 2'
+    with pytest.raises(SystemExit):
+        cli.parse_args([str(path), '--skip-errors', '--workers', '2'])
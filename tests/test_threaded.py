@@ -0,0 +1,147 @@
+import io
+import sys
+import threading
+
+import pytest
+from conftest import Capturing
+
+import cache
+import cli
+import homework
+import loadgen
+import streaming
+import threaded
+from benchmarks import suite
+
+PACKAGES = list(loadgen.LoadGenerator(seed=9, malformed=0.05).packages(3000))
+
+
+def serial_messages(packages, errors=None):
+    return list(streaming.iter_messages(packages, errors))
+
+
+@pytest.fixture
+def switch_often():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.mark.parametrize('workers, chunk_size', [(1, 5000), (4, 1), (8, 97)])
+def test_compute_messages_matches_serial(workers, chunk_size):
+    expected_errors = []
+    expected = serial_messages(PACKAGES, expected_errors)
+    errors = []
+    messages = threaded.compute_messages(
+        iter(PACKAGES), workers, chunk_size, errors)
+    assert messages == expected, (
+        'Сообщения из потоков должны идти в порядке пакетов'
+    )
+    assert [error.index for error in errors] == [
+        error.index for error in expected_errors]
+    with pytest.raises(homework.PackageError) as info:
+        threaded.compute_messages(PACKAGES, workers, chunk_size)
+    assert info.value.index == expected_errors[0].index, (
+        'Без списка ошибок должна выбрасываться первая по порядку ошибка'
+    )
+
+
+def test_map_chunks():
+    shards = threaded.map_chunks(
+        lambda chunk, start: (start, len(chunk)), list(range(10)), 3, 4)
+    assert shards == [(0, 4), (4, 4), (8, 2)]
+    assert threaded.map_chunks(len, [], 2) == []
+    with pytest.raises(ValueError):
+        threaded.map_chunks(len, [1], 2, 0)
+
+
+def test_shared_result_cache(switch_often):
+    packages = [package for package in PACKAGES
+                if homework.check_package(*package) is None][:500] * 6
+    with cache.ResultCache(max_entries=64) as shared:
+        messages = threaded.compute_messages(
+            packages, 8, 25, cache=shared)
+        assert messages == serial_messages(packages)
+        stats = shared.stats
+        assert stats.hits + stats.misses == len(packages), (
+            'Счётчики кэша не должны теряться при работе из потоков'
+        )
+        assert len(shared) <= 64
+
+
+def test_shared_disk_cache(tmp_path, switch_often):
+    packages = [package for package in PACKAGES
+                if homework.check_package(*package) is None][:300]
+    path = str(tmp_path / 'results.cache')
+    with cache.ResultCache(max_entries=1, path=path,
+                           disk_slots=4096) as shared:
+        for _ in range(3):
+            assert threaded.compute_messages(
+                packages, 8, 10, cache=shared) == serial_messages(packages)
+
+
+def test_registry_changes_while_reading(switch_often):
+    stop = threading.Event()
+    failures = []
+    package = ('HIK', [9000, 1, 75, 300])
+
+    def reader():
+        while not stop.is_set():
+            try:
+                homework.check_package(*package)
+                homework.is_valid_package(*package)
+                homework.read_package(*package).get_spent_calories()
+            except homework.PackageError:
+                pass
+            except Exception as error:
+                failures.append(error)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        for _ in range(1000):
+            homework.register_workout(
+                'HIK', 'Hiking', ['action', 'duration', 'weight', 'climb'],
+                {'calories': 'weight * duration + climb'})
+            homework.unregister_workout('HIK')
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+    assert failures == [], (
+        'Чтение реестра во время регистрации типов не должно падать'
+    )
+    assert 'HIK' not in homework.TRAININGS
+    assert 'HIK' not in homework.PACKAGE_FIELDS
+
+
+def test_process_threaded_and_cli(tmp_path):
+    path = tmp_path / 'packages.csv'
+    with open(path, 'wb') as output:
+        loadgen.LoadGenerator(seed=2).write(output, 2000)
+    expected = io.StringIO()
+    with open(path, encoding='utf-8') as stream:
+        streaming.process(stream, expected)
+    output = io.StringIO()
+    with open(path, encoding='utf-8') as stream:
+        assert threaded.process_threaded(
+            stream, output, workers=4, chunk_size=128) == 2000
+    assert output.getvalue() == expected.getvalue()
+    with Capturing() as lines:
+        cli.run([str(path), '--workers', '3', '--threads',
+                 '--chunk-size', '300'])
+    assert lines == expected.getvalue().splitlines()
+    with pytest.raises(SystemExit):
+        cli.parse_args([str(path), '--threads'])
+
+
+def test_thread_benchmarks():
+    results = suite.thread_benchmarks((1, 2), size=500, repeat=1)
+    assert list(results) == ['compute.1', 'compute.2']
+    assert all(value > 0 for value in results.values())
+    assert isinstance(suite.gil_enabled(), bool)
+    regressions = suite.compare(
+        {'threads': {'compute.2': 50.0}}, {'threads': {'compute.2': 100.0}})
+    assert regressions and regressions[0].startswith('threads.compute.2')
@@ -0,0 +1,132 @@
+import json
+import math
+
+import pytest
+from conftest import Capturing
+
+import homework
+import loadgen
+import whatif
+
+GRID_AXES = {
+    'RUN.CALORIES_MEAN_SPEED_MULTIPLIER': [17, 18, 19.5],
+    'SWM.CALORIES_WEIGHT_MULTIPLIER': [2, 2.2],
+    'WLK.KMH_IN_MSEC': [0.278, 0.2778],
+}
+
+
+def packages(count=900, seed=3):
+    return loadgen.LoadGenerator(seed=seed, malformed=0.05).packages(count)
+
+
+def expected_calories(workout_type, columns, coefficients, monkeypatch):
+    with monkeypatch.context() as patch:
+        for code, constants in coefficients.items():
+            for name, value in constants.items():
+                patch.setattr(homework.TRAININGS[code], name, value)
+        return [
+            homework.read_package(workout_type, list(data))
+            .get_spent_calories()
+            for data in zip(*columns.values())
+        ]
+
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def numpy(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(whatif, 'np', None)
+    return request.param
+
+
+def test_product_grid():
+    grid = whatif.product_grid(GRID_AXES)
+    assert len(grid) == 12
+    assert grid[0] == {'RUN': {'CALORIES_MEAN_SPEED_MULTIPLIER': 17},
+                       'SWM': {'CALORIES_WEIGHT_MULTIPLIER': 2},
+                       'WLK': {'KMH_IN_MSEC': 0.278}}
+
+
+def test_sweep_matches_monkeypatched_classes(numpy, monkeypatch):
+    batches = whatif.group_packages(packages())
+    grid = whatif.product_grid(GRID_AXES) + [
+        {'SKI': {'LEN_STEP': 2.7}, 'ROW': {'CALORIES_MEAN_SPEED_SHIFT': 3}}]
+    result = whatif.sweep(batches, grid)
+    assert len(result) == len(grid)
+    for workout_type, columns in batches.items():
+        matrix = result.matrix(workout_type)
+        assert len(matrix) == len(grid)
+        for index, coefficients in enumerate(grid):
+            assert list(matrix[index]) == expected_calories(
+                workout_type, columns, coefficients, monkeypatch), (
+                'Калории сетки должны совпадать с пересчётом объектов '
+                'при тех же константах'
+            )
+    assert homework.Running.CALORIES_MEAN_SPEED_MULTIPLIER == 18, (
+        'Константы классов не должны меняться'
+    )
+
+
+def test_summary(numpy):
+    batches = whatif.group_packages(packages(400))
+    grid = [{}, {'RUN': {'CALORIES_MEAN_SPEED_SHIFT': 2.5}}]
+    result = whatif.sweep(batches, grid)
+    summaries = result.summary()
+    rows = [list(row) for row in result.matrix()]
+    for summary, row in zip(summaries, rows):
+        assert summary['count'] == len(row)
+        assert summary['total'] == pytest.approx(math.fsum(row))
+        assert summary['mean'] == pytest.approx(math.fsum(row) / len(row))
+        mean = math.fsum(row) / len(row)
+        assert summary['std'] == pytest.approx(math.sqrt(
+            math.fsum((value - mean) ** 2 for value in row) / len(row)))
+        assert (summary['min'], summary['max']) == (min(row), max(row))
+    assert summaries[0]['delta'] == pytest.approx(0, abs=1e-6)
+    assert summaries[1]['delta'] > 0
+    running = result.summary('RUN')
+    assert running[1]['delta'] == pytest.approx(summaries[1]['delta'])
+    assert result.summary('SWM')[1]['delta'] == 0, (
+        'Набор не должен менять калории других типов'
+    )
+
+
+def test_unaffected_rows_are_shared():
+    batches = whatif.group_packages(packages(200))
+    grid = [{'RUN': {'CALORIES_MEAN_SPEED_SHIFT': value}}
+            for value in (1.5, 2, 2.5)]
+    result = whatif.sweep(batches, grid)
+    swimming = result.calories['SWM']
+    assert swimming.shape == (3, len(batches['SWM']['action']))
+    assert swimming.strides[0] == 0 and not swimming.flags.writeable
+
+
+@pytest.mark.parametrize('grid', [
+    [],
+    [{'BIKE': {'LEN_STEP': 1}}],
+    [{'RUN': {'CALORIES_WEIGHT_MULTIPLIER': 1}}],
+    [{'RUN': {'kernels': 1}}],
+    [{'RUN': {'FORMULAS': 1}}],
+    [{'RUN': {'CODE': 1}}],
+    [{'RUN': {'LEN_STEP': 'long'}}],
+])
+def test_invalid_grid(grid):
+    with pytest.raises(ValueError):
+        whatif.sweep({}, grid)
+
+
+def test_main(tmp_path):
+    path = tmp_path / 'packages.csv'
+    with open(path, 'wb') as output:
+        loadgen.LoadGenerator(seed=5).write(output, 300, 'csv')
+    with Capturing() as lines:
+        assert whatif.main([
+            str(path), '--grid', 'RUN.CALORIES_MEAN_SPEED_SHIFT=1.79,2',
+            'WLK.CM_IN_M=100']) == 0
+    summaries = [json.loads(line) for line in lines]
+    assert [summary['constants'] for summary in summaries] == [
+        {'RUN': {'CALORIES_MEAN_SPEED_SHIFT': 1.79},
+         'WLK': {'CM_IN_M': 100.0}},
+        {'RUN': {'CALORIES_MEAN_SPEED_SHIFT': 2.0},
+         'WLK': {'CM_IN_M': 100.0}},
+    ]
+    assert summaries[0]['count'] == 300
+    assert summaries[0]['delta'] == pytest.approx(0, abs=1e-6)
@@ -0,0 +1,73 @@
+import io
+import random
+
+import pytest
+from conftest import Capturing
+
+import homework
+import writer
+
+PACKAGES = [
+    ('SWM', [720, 1, 80, 25, 40]),
+    ('RUN', [1206, 12, 6]),
+    ('WLK', [9000, 1, 75, 180]),
+    ('WLK', [9000, 1.5, 75, 180]),
+    ('WLK', [3000.33, 2.512, 75.8, 180.1]),
+]
+
+
+def random_messages(count, seed=0):
+    rnd = random.Random(seed)
+    return [
+        homework.InfoMessage(
+            rnd.choice(['Running', 'SportsWalking', 'Swimming']),
+            rnd.choice([rnd.randint(0, 10), rnd.uniform(0, 10)]),
+            rnd.uniform(0, 100), rnd.uniform(0, 1e-3),
+            rnd.uniform(0, 1e6))
+        for _ in range(count)
+    ]
+
+
+def test_render_block_matches_main():
+    with Capturing() as expected:
+        for workout_type, data in PACKAGES:
+            homework.main(homework.read_package(workout_type, data))
+    messages = [
+        homework.read_package(workout_type, data).show_training_info()
+        for workout_type, data in PACKAGES
+    ]
+    assert writer.render_block(messages).splitlines() == expected, (
+        '`render_block` должна выводить то же, что и `main`'
+    )
+
+
+def test_render_block_random():
+    messages = random_messages(5000)
+    expected = ''.join(info.get_message() + '\n' for info in messages)
+    assert writer.render_block(messages) == expected
+    assert writer.render_block([]) == ''
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 4096])
+def test_report_writer(block_size):
+    messages = random_messages(100, seed=block_size)
+    output = io.StringIO()
+    with writer.ReportWriter(output, block_size) as report:
+        report.write(messages[0])
+        report.write_many(messages[1:])
+    assert report.count == len(messages)
+    assert output.getvalue() == ''.join(
+        info.get_message() + '\n' for info in messages)
+
+
+def test_report_writer_flushes_in_blocks():
+    output = io.StringIO()
+    report = writer.ReportWriter(output, block_size=10)
+    report.write_many(random_messages(25))
+    assert output.getvalue().count('\n') == 20, (
+        '`ReportWriter` должен сбрасывать только полные блоки'
+    )
+    report.close()
+    assert output.getvalue().count('\n') == 25
+    with pytest.raises(ValueError):
+        writer.ReportWriter(output, block_size=0)
@@ -0,0 +1,110 @@
+"""Обработка пакетов в пуле потоков.
+
+Нужна для встраивания в многопоточные сервисы. Пакеты режутся на
+пачки, и каждая пачка целиком обрабатывается в одном потоке. Результат
+пачки записывается в свою ячейку заранее созданного списка: потоки не
+делят ни одной изменяемой структуры, и результаты собираются без
+блокировок, а порядок восстанавливается по номеру ячейки.
+
+Что можно делить между потоками:
+
+- реестр `homework.TRAININGS` и `read_package`: читаются без
+  блокировок, а типы регистрируются и удаляются под блокировкой;
+- `cache.ResultCache`: под собственной блокировкой;
+- объекты тренировок и сообщения, только для чтения.
+
+Накопители (`aggregation.Aggregator`, `sketches.Distributions`,
+`writer.ReportWriter`) не потокобезопасны: заводите свой на каждую
+пачку (`map_chunks`) и объединяйте через `merge`.
+
+На обычной сборке CPython потоки делят GIL, и расчёт на них не
+ускоряется: этот путь нужен для корректной работы в многопоточном
+хосте. На сборке без GIL (3.13t и новее) пропускная способность растёт
+с числом потоков; замер — раздел `threads` в `benchmarks.suite`.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import IO, Callable, Iterable, List, Optional, Sequence, TypeVar
+
+import cache as result_cache
+import parallel
+import streaming
+from homework import InfoMessage, PackageError
+
+DEFAULT_CHUNK_SIZE = 2000
+
+Package = streaming.Package
+Shard = TypeVar('Shard')
+
+
+def map_chunks(func: Callable[[Sequence[Package], int], Shard],
+               packages: Sequence[Package],
+               workers: Optional[int] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Shard]:
+    """Применить `func(chunk, start)` к пачкам пакетов в пуле потоков.
+
+    `start` — номер первого пакета пачки. Результаты возвращаются в
+    порядке пачек.
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер пачки должен быть положительным")
+    starts = range(0, len(packages), chunk_size)
+    shards: List = [None] * len(starts)
+
+    def work(slot: int) -> None:
+        start = starts[slot]
+        shards[slot] = func(packages[start:start + chunk_size], start)
+
+    with ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1) as pool:
+        for _ in pool.map(work, range(len(starts))):
+            pass
+    return shards
+
+
+def compute_messages(packages: Iterable[Package],
+                     workers: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     errors: Optional[List[PackageError]] = None,
+                     cache: Optional[result_cache.ResultCache] = None,
+                     ) -> List[InfoMessage]:
+    """Рассчитать сообщения для пакетов в пуле потоков.
+
+    Порядок сообщений совпадает с порядком пакетов. Ошибки — как в
+    `homework.read_packages`: с `errors` ошибочные пакеты
+    пропускаются, а ошибки с номерами пакетов складываются в список;
+    без него выбрасывается первая по порядку ошибка. `cache` — общий
+    для всех потоков `cache.ResultCache`.
+    """
+    if not isinstance(packages, Sequence):
+        packages = list(packages)
+
+    def work(chunk: Sequence[Package], start: int):
+        failed: List[PackageError] = []
+        if cache is None:
+            messages = list(streaming.iter_messages(chunk, failed))
+        else:
+            messages = list(result_cache.iter_messages(chunk, cache, failed))
+        for error in failed:
+            error.index += start
+        return messages, failed
+
+    shards = map_chunks(work, packages, workers, chunk_size)
+    failed = [error for _, chunk_errors in shards for error in chunk_errors]
+    if failed and errors is None:
+        raise failed[0]
+    if errors is not None:
+        errors.extend(failed)
+    return list(chain.from_iterable(messages for messages, _ in shards))
+
+
+def process_threaded(stream: Iterable[str], output: IO[str],
+                     fmt: Optional[str] = None,
+                     workers: Optional[int] = None,
+                     chunk_size: int = parallel.DEFAULT_CHUNK_SIZE,
+                     ordered: bool = True) -> int:
+    """Как `parallel.process_parallel`, но в пуле потоков."""
+    return parallel.process_parallel(
+        stream, output, fmt, workers, chunk_size, ordered,
+        executor=ThreadPoolExecutor)
@@ -0,0 +1,303 @@
+"""Оценка калорий при разных значениях констант формул (what-if).
+
+Чтобы оценить кандидатное значение, например
+`Running.CALORIES_MEAN_SPEED_MULTIPLIER`, не нужно подменять константы
+классов и заново создавать объекты по каждому пакету: `sweep` считает
+калории сохранённой пачки тренировок сразу для всей сетки наборов.
+
+Набор констант записывается как `{'RUN': {'CALORIES_MEAN_SPEED_SHIFT':
+1.8}}`; константы, которых нет в наборе, берутся из класса. Ядра
+собираются из тех же `FORMULAS`, что и в `batch`, но вместо класса им
+передаётся объект констант, в котором у изменяемой константы столбец
+значений по сетке. С NumPy столбец формы `(k, 1)` транслируется на
+пачку `(n,)`, и вся сетка считается одним векторным проходом на
+формулу. Показатели, не зависящие от изменяемых констант (обычно
+дистанция и средняя скорость), считаются один раз и общие для всех
+наборов. Без NumPy наборы обходятся циклом с теми же общими
+показателями.
+
+Результат побитово совпадает с `get_spent_calories` при таких же
+значениях констант класса.
+"""
+import argparse
+import json
+import math
+import sys
+from array import array
+from dataclasses import dataclass
+from itertools import product
+from numbers import Real
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import cache
+from formulas import METRICS, Kernel
+from homework import PACKAGE_FIELDS, TRAININGS, check_package
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CoefficientSet = Dict[str, Dict[str, float]]
+Columns = Mapping[str, Sequence]
+SUMMARY_FIELDS = ('count', 'total', 'mean', 'std', 'min', 'max', 'delta')
+
+
+def product_grid(axes: Mapping[str, Sequence[float]]) -> List[CoefficientSet]:
+    """Сетка из всех сочетаний значений констант.
+
+    Ключи `axes` — имена вида `RUN.CALORIES_MEAN_SPEED_MULTIPLIER`.
+    """
+    names = [name.partition('.')[::2] for name in axes]
+    grid = []
+    for values in product(*axes.values()):
+        coefficients: CoefficientSet = {}
+        for (workout_type, constant), value in zip(names, values):
+            coefficients.setdefault(workout_type, {})[constant] = value
+        grid.append(coefficients)
+    return grid
+
+
+def check_grid(grid: Sequence[CoefficientSet]) -> None:
+    """Проверить, что в сетке только известные типы и числовые константы."""
+    if not grid:
+        raise ValueError("Сетка констант пуста")
+    for coefficients in grid:
+        for workout_type, constants in coefficients.items():
+            if workout_type not in TRAININGS:
+                raise ValueError(
+                    f"Неизвестный тип тренировки: {workout_type}")
+            training = TRAININGS[workout_type]
+            known = cache.numeric_constant_names(training)
+            for name, value in constants.items():
+                if name not in known:
+                    raise ValueError(
+                        f"У {training.__name__} нет константы {name}")
+                if not isinstance(value, Real) or isinstance(value, bool):
+                    raise ValueError(
+                        f"Значение {name} должно быть числом: {value!r}")
+
+
+def group_packages(packages: Iterable[Tuple[str, list]],
+                   ) -> Dict[str, Dict[str, list]]:
+    """Столбцы полей корректных пакетов по типам тренировок.
+
+    Ошибочные пакеты пропускаются.
+    """
+    batches: Dict[str, Dict[str, list]] = {}
+    for workout_type, data in packages:
+        if check_package(workout_type, data) is not None:
+            continue
+        columns = batches.get(workout_type)
+        if columns is None:
+            columns = batches[workout_type] = {
+                field: [] for field in PACKAGE_FIELDS[workout_type]}
+        for column, value in zip(columns.values(), data):
+            column.append(value)
+    return batches
+
+
+def _apply(kernel: Kernel, values: Mapping[str, Sequence]):
+    func, params = kernel
+    args = [values[name] for name in params]
+    if np is not None:
+        return np.asarray(func(*args), dtype=np.float64)
+    return array('d', map(func, *args))
+
+
+def _constants(training: type, values: Mapping[str, object]):
+    """Объект констант класса с подменёнными значениями `values`."""
+    names = cache.constant_names(training)
+    return SimpleNamespace(**{
+        **{name: getattr(training, name) for name in names}, **values})
+
+
+def _calories(workout_type: str, columns: Columns,
+              grid: Sequence[CoefficientSet]):
+    """Калории пачки одного типа: с текущими константами и по сетке."""
+    training = TRAININGS[workout_type]
+    formulas = training.compiled_formulas()
+    missing = [name for name in METRICS if name not in formulas]
+    if missing:
+        raise KeyError(
+            f"Для {workout_type} нет формул: {', '.join(missing)}")
+    base = {name: np.asarray(column) if np is not None else column
+            for name, column in columns.items()}
+    lengths = {len(column) for column in base.values()}
+    if len(lengths) > 1:
+        raise ValueError("Столбцы пачки должны быть одинаковой длины")
+    swept = sorted({name for coefficients in grid
+                    for name in coefficients.get(workout_type, ())})
+    swept_values = {
+        name: [coefficients.get(workout_type, {}).get(
+            name, getattr(training, name)) for coefficients in grid]
+        for name in swept
+    }
+    varying: List[str] = []
+    for metric, formula in formulas.items():
+        base[metric] = _apply(formula.kernel(training), base)
+        if (set(formula.constants) & set(swept)
+                or set(formula.params) & set(varying)):
+            varying.append(metric)
+    count = len(grid)
+    if np is not None:
+        constants = _constants(training, {
+            name: np.array(column, dtype=np.float64).reshape(count, 1)
+            for name, column in swept_values.items()})
+        values = dict(base)
+        for metric in varying:
+            values[metric] = _apply(
+                formulas[metric].kernel(constants), values)
+        size = len(base['calories'])
+        return base['calories'], np.broadcast_to(
+            values['calories'], (count, size))
+    rows = []
+    for index in range(count):
+        constants = _constants(training, {
+            name: column[index] for name, column in swept_values.items()})
+        values = dict(base)
+        for metric in varying:
+            values[metric] = _apply(
+                formulas[metric].kernel(constants), values)
+        rows.append(values['calories'])
+    return base['calories'], rows
+
+
+@dataclass
+class SweepResult:
+    """Калории пачки тренировок по наборам констант сетки.
+
+    `calories[workout_type]` — матрица `len(grid) x n`: с NumPy
+    массив, иначе список строк `array('d')`. Если набор не меняет
+    калории типа, строки матрицы не копируются, поэтому массив только
+    для чтения. `baseline` — калории с текущими константами классов.
+    """
+
+    grid: List[CoefficientSet]
+    calories: Dict[str, object]
+    baseline: Dict[str, Sequence[float]]
+
+    def __len__(self) -> int:
+        return len(self.grid)
+
+    def matrix(self, workout_type: Optional[str] = None):
+        """Матрица калорий одного типа или всех типов подряд."""
+        if workout_type is not None:
+            return self.calories[workout_type]
+        matrices = list(self.calories.values())
+        if np is not None:
+            return np.concatenate(
+                matrices or [np.empty((len(self.grid), 0))], axis=1)
+        return [
+            array('d', [value for rows in matrices for value in rows[index]])
+            for index in range(len(self.grid))
+        ]
+
+    def summary(self, workout_type: Optional[str] = None,
+                ) -> List[Dict[str, float]]:
+        """Статистика калорий по каждому набору сетки.
+
+        `count`, `total`, `mean`, `std` (по генеральной совокупности),
+        `min`, `max` и `delta` — изменение `total` относительно
+        текущих констант (сумма разностей, поэтому для наборов, не
+        меняющих калории, ровно ноль).
+        """
+        types = list(self.calories) if workout_type is None else [
+            workout_type]
+        matrices = [self.calories[name] for name in types]
+        count = sum(len(self.baseline[name]) for name in types)
+        if np is not None:
+            sets = len(self.grid)
+            totals = sum((matrix.sum(axis=1) for matrix in matrices),
+                         np.zeros(sets))
+            means = totals / count if count else np.full(sets, math.nan)
+            squares = sum((((matrix - means[:, None]) ** 2).sum(axis=1)
+                           for matrix in matrices), np.zeros(sets))
+            deltas = sum(((matrix - self.baseline[name]).sum(axis=1)
+                          for name, matrix in zip(types, matrices)),
+                         np.zeros(sets))
+            lows = [matrix.min(axis=1) for matrix in matrices if matrix.size]
+            highs = [matrix.max(axis=1) for matrix in matrices if matrix.size]
+            columns = zip(
+                totals.tolist(), means.tolist(), squares.tolist(),
+                deltas.tolist(),
+                np.min(lows, axis=0).tolist() if lows else [math.nan] * sets,
+                np.max(highs, axis=0).tolist() if highs else [math.nan] * sets)
+        else:
+            columns = []
+            baseline = [value for name in types
+                        for value in self.baseline[name]]
+            for index in range(len(self.grid)):
+                row = [value for matrix in matrices
+                       for value in matrix[index]]
+                total = math.fsum(row)
+                mean = total / count if count else math.nan
+                columns.append((
+                    total, mean,
+                    math.fsum((value - mean) ** 2 for value in row),
+                    math.fsum(value - base
+                              for value, base in zip(row, baseline)),
+                    min(row, default=math.nan), max(row, default=math.nan)))
+        return [
+            dict(zip(SUMMARY_FIELDS, (
+                count, total, mean,
+                math.sqrt(square / count) if count else math.nan,
+                low, high, delta)))
+            for total, mean, square, delta, low, high in columns
+        ]
+
+
+def sweep(batches: Mapping[str, Columns],
+          grid: Sequence[CoefficientSet]) -> SweepResult:
+    """Рассчитать калории пачек для каждого набора констант сетки.
+
+    `batches` сопоставляет коду тренировки столбцы полей пакета, как
+    в `batch.compute_batch` (подходят и `compact.TrainingArray.columns`,
+    и результат `group_packages`).
+    """
+    grid = list(grid)
+    check_grid(grid)
+    calories = {}
+    baseline = {}
+    for workout_type, columns in batches.items():
+        if workout_type not in TRAININGS:
+            raise KeyError(f"Неизвестный тип тренировки: {workout_type}")
+        baseline[workout_type], calories[workout_type] = _calories(
+            workout_type, columns, grid)
+    return SweepResult(grid, calories, baseline)
+
+
+def parse_axes(items: List[str]) -> Dict[str, List[float]]:
+    """Разобрать оси сетки вида `RUN.CALORIES_MEAN_SPEED_SHIFT=1.7,1.8`."""
+    axes = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        axes[name] = [float(value) for value in values.split(',')]
+    return axes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import streaming
+
+    parser = argparse.ArgumentParser(
+        description='Калории пакетов при разных значениях констант.')
+    parser.add_argument('path', help='файл с пакетами или - для stdin')
+    parser.add_argument('--grid', nargs='+', required=True,
+                        help='оси сетки, например '
+                             'RUN.CALORIES_MEAN_SPEED_SHIFT=1.7,1.8')
+    parser.add_argument('--format', choices=streaming.FORMATS, default=None)
+    args = parser.parse_args(argv)
+    grid = product_grid(parse_axes(args.grid))
+    fmt = args.format or streaming.format_for_path(args.path)
+    with streaming.open_input(args.path) as stream:
+        batches = group_packages(streaming.iter_packages(stream, fmt))
+    result = sweep(batches, grid)
+    for coefficients, summary in zip(grid, result.summary()):
+        print(json.dumps(dict(summary, constants=coefficients),
+                         ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Буферизованный вывод отчёта о тренировках.
+
+Вместо `print(info.get_message())` на каждую тренировку сообщения
+копятся блоками и рендерятся одной операцией `%` по шаблону
+`InfoMessage.MESSAGE`, повторённому на весь блок. Готовый блок
+записывается в поток одним вызовом `write`. Текст совпадает с
+`get_message()` побайтно, каждая строка завершается `\\n`.
+"""
+from __future__ import annotations
+
+import sys
+
+from homework import InfoMessage
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import IO, Iterable, Optional, Sequence
+
+DEFAULT_BLOCK_SIZE = 4096
+
+
+_templates: dict[tuple[int, str], str] = {}
+
+
+def block_template(count: int, message: str = InfoMessage.MESSAGE) -> str:
+    """Шаблон для `count` строк отчёта.
+
+    Шаблоны кэшируются в словаре, а не через `functools.lru_cache`:
+    модуль стоит на пути запуска CLI, а `functools` тянет
+    `collections`. Обычно нужны два шаблона — полный блок и хвост.
+    """
+    template = _templates.get((count, message))
+    if template is None:
+        if len(_templates) >= 8:
+            _templates.clear()
+        template = _templates[count, message] = (message + '\n') * count
+    return template
+
+
+def render_block(messages: Sequence[InfoMessage]) -> str:
+    """Отрендерить сообщения в текст отчёта одной операцией."""
+    values: list = []
+    extend = values.extend
+    for info in messages:
+        extend((
+            info.training_type,
+            info.duration,
+            info.distance,
+            info.speed,
+            info.calories,
+        ))
+    return block_template(len(messages)) % tuple(values)
+
+
+class ReportWriter:
+    """Писатель отчёта, сбрасывающий строки в поток большими блоками."""
+
+    def __init__(self, output: Optional[IO[str]] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        if block_size < 1:
+            raise ValueError("Размер блока должен быть положительным")
+        self.output = sys.stdout if output is None else output
+        self.block_size = block_size
+        self.count = 0
+        self._pending: list[InfoMessage] = []
+
+    def write(self, info: InfoMessage) -> None:
+        """Добавить сообщение в отчёт."""
+        self._pending.append(info)
+        if len(self._pending) >= self.block_size:
+            self.flush()
+
+    def write_many(self, messages: Iterable[InfoMessage]) -> None:
+        """Добавить в отчёт все сообщения из итератора."""
+        pending = self._pending
+        append = pending.append
+        block_size = self.block_size
+        for info in messages:
+            append(info)
+            if len(pending) >= block_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Записать накопленные сообщения в поток."""
+        if self._pending:
+            self.output.write(render_block(self._pending))
+            self.count += len(self._pending)
+            self._pending.clear()
+        flush = getattr(self.output, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()